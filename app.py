@@ -1,63 +1,220 @@
 # app.py
 
+import os
+import shutil
+import hashlib
+from typing import NamedTuple, Optional, Tuple
+import pandas as pd
 import streamlit as st
 
 # Imports do pacote 'src'
 from src.models import DataLoaderConfig
 from src.data_loader import DataLoader
+from src.cache_dados import habilitar_copy_on_write
 from src.analytics import AnalisadorVendas, AnalisadorAluguel
-from src.dashboard import display_vendas_dashboard, display_alugueis_dashboard
+from src.cubo_atrasos import CuboAtrasos
+from src.indice_filtros import Filtro, IndiceVendas, IndiceAlugueis
+from src.particoes import ArmazemParticionado
+from src.validacao import ResultadoValidacao, validar_vendas, validar_locacao
+from src.cliente_relatorios import ClienteRelatorios
+from src.dashboard import (display_vendas_dashboard, display_alugueis_dashboard, display_performance_panel,
+                           display_relatorios_remotos)
+from src.atualizacao import AtualizadorDados
+from src.instrumentacao import rastreador
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Vendas & Aluguéis Insights")
+# O app não depende de atribuições encadeadas: com Copy-on-Write (padrão no pandas 3)
+# os acertos do cache de dados saem como cópias rasas
+habilitar_copy_on_write()
 
-@st.cache_data
-def load_and_process_data():
-    """Carrega e processa todos os dados. A função permanece aqui
-    pois é uma tarefa de 'backend' do app."""
-    configs = {
-        'vendas': DataLoaderConfig(
-            url="https://raw.githubusercontent.com/YuriArduino/Estudos_Pandas/refs/heads/data-tests/dados_vendas_clientes.json",
-            chave='dados_vendas',
-            coluna_valor='Valor da compra',
-            prefixos_remover=['R$ ']
-        ),
-        'locacao': DataLoaderConfig(
-            url="https://raw.githubusercontent.com/YuriArduino/Estudos_Pandas/refs/heads/data-tests/dados_locacao_imoveis.json",
-            chave='dados_locacao',
-            coluna_valor='valor_aluguel',
-            prefixos_remover=['$', ' reais']
-        )
-    }
-    loader = DataLoader()
-    dados_vendas = loader.carregar_dados(configs['vendas'])
-    dados_vendas['Cliente'] = dados_vendas['Cliente'].str.lower().str.strip()
-    dados_vendas = loader.processar_datas(dados_vendas, ['Data de venda'])
+DIRETORIO_CACHE = ".cache_dados"
+# Com RELATORIOS_URL (ex.: http://127.0.0.1:8765) o app consome o src.servidor_relatorios
+# em vez de carregar e analisar os dados no próprio processo
+RELATORIOS_URL = os.environ.get("RELATORIOS_URL")
+# De quanto em quanto tempo as fontes são revalidadas (requisições condicionais, em segundo plano)
+INTERVALO_ATUALIZACAO = float(os.environ.get("ATUALIZACAO_SEGUNDOS", 300))
+
+CONFIGS = {
+    'vendas': DataLoaderConfig(
+        url="https://raw.githubusercontent.com/YuriArduino/Estudos_Pandas/refs/heads/data-tests/dados_vendas_clientes.json",
+        chave='dados_vendas',
+        coluna_valor='Valor da compra',
+        prefixos_remover=['R$ '],
+        colunas_categoricas=['Cliente']
+    ),
+    'locacao': DataLoaderConfig(
+        url="https://raw.githubusercontent.com/YuriArduino/Estudos_Pandas/refs/heads/data-tests/dados_locacao_imoveis.json",
+        chave='dados_locacao',
+        coluna_valor='valor_aluguel',
+        prefixos_remover=['$', ' reais'],
+        colunas_categoricas=['apartamento']
+    )
+}
+
+class DadosApp(NamedTuple):
+    """Tudo o que deriva de uma versão das fontes, trocado de uma só vez pelo atualizador."""
+    dados_vendas: pd.DataFrame
+    dados_locacao: pd.DataFrame
+    cubo_atrasos: CuboAtrasos
+    indice_vendas: IndiceVendas
+    indice_alugueis: IndiceAlugueis
+    armazem_vendas: ArmazemParticionado
+    armazem_locacao: ArmazemParticionado
+    qualidade_vendas: ResultadoValidacao
+    qualidade_locacao: ResultadoValidacao
+
+def processar_fontes(loader: DataLoader, anteriores: Optional[DadosApp]) -> Optional[DadosApp]:
+    """Revalida as fontes e só reprocessa se alguma mudou (None quando nada mudou).
+    Roda fora das requisições dos usuários, na thread do atualizador."""
+    # As duas fontes são revalidadas (ou baixadas) e processadas em paralelo
+    resultados = loader.revalidar_varios(CONFIGS)
+    if anteriores is not None and not any(mudaram for _, mudaram in resultados.values()):
+        return None
+    
+    dados_vendas = loader.preparar_vendas(resultados['vendas'][0])
+    dados_locacao = loader.preparar_locacao(resultados['locacao'][0])
+    
+    # Partições mensais permitem consultar janelas recentes sem ler o histórico
+    armazem_vendas, armazem_locacao = gravar_particoes(loader, dados_vendas, dados_locacao, anteriores)
+    
+    # Agregados mês × apartamento, índices de filtro e validação montados uma vez por versão dos dados
+    return DadosApp(dados_vendas, dados_locacao, CuboAtrasos.de_dados(dados_locacao),
+                    IndiceVendas(dados_vendas), IndiceAlugueis(dados_locacao),
+                    armazem_vendas, armazem_locacao,
+                    validar_vendas(dados_vendas), validar_locacao(dados_locacao))
+
+def gravar_particoes(loader: DataLoader, dados_vendas: pd.DataFrame, dados_locacao: pd.DataFrame,
+                     anteriores: Optional[DadosApp]) -> Tuple[ArmazemParticionado, ArmazemParticionado]:
+    """Cada versão das fontes ganha o seu diretório de partições: quem ainda lê a
+    versão anterior não é afetado, e só as duas últimas são mantidas."""
+    versao = hashlib.sha256(''.join(loader.validadores[config.url].resumo
+                                    for config in CONFIGS.values()).encode()).hexdigest()[:12]
+    raiz = os.path.join(DIRETORIO_CACHE, "particoes")
+    diretorio = os.path.join(raiz, versao)
+    anterior = None if anteriores is None else os.path.dirname(anteriores.armazem_vendas.diretorio)
+    if anterior == diretorio:
+        return anteriores.armazem_vendas, anteriores.armazem_locacao
     
-    dados_locacao = loader.carregar_dados(configs['locacao'])
-    dados_locacao['apartamento'] = dados_locacao['apartamento'].str.replace('(blocoAP)', '', regex=False).str.strip()
-    dados_locacao = loader.processar_datas(dados_locacao, 
-                                         ['datas_combinadas_pagamento', 'datas_de_pagamento'])
-    return dados_vendas, dados_locacao
+    armazem_vendas = ArmazemParticionado(os.path.join(diretorio, "vendas"), 'Data de venda')
+    armazem_locacao = ArmazemParticionado(os.path.join(diretorio, "locacao"), 'datas_combinadas_pagamento')
+    armazem_vendas.gravar(dados_vendas)
+    armazem_locacao.gravar(dados_locacao)
+    for antigo in os.listdir(raiz):
+        if os.path.join(raiz, antigo) not in (diretorio, anterior):
+            shutil.rmtree(os.path.join(raiz, antigo), ignore_errors=True)
+    return armazem_vendas, armazem_locacao
+
+@st.cache_resource
+def atualizador_dados() -> AtualizadorDados:
+    """Atualizador único por processo: carrega na primeira visita e revalida em segundo plano."""
+    loader = DataLoader(diretorio_cache=DIRETORIO_CACHE)
+    atualizador = AtualizadorDados(lambda anteriores: processar_fontes(loader, anteriores),
+                                   intervalo=INTERVALO_ATUALIZACAO)
+    atualizador.iniciar()
+    return atualizador
+
+def load_and_process_data() -> DadosApp:
+    """Dados em uso; depois da primeira carga nunca espera por uma revalidação."""
+    return atualizador_dados().obter().valor
+
+@st.cache_resource
+def cliente_relatorios() -> ClienteRelatorios:
+    """Cliente único por processo, reaproveitando as conexões com o serviço."""
+    return ClienteRelatorios(RELATORIOS_URL)
+
+def filtros_barra_lateral(titulo: str, indice, rotulo_chave: str, rotulo_valor: str) -> Filtro:
+    """Widgets de período, chaves e faixa de valor; o que ficar no padrão não filtra."""
+    with st.sidebar.expander(titulo):
+        data_minima, data_maxima = indice.data_minima, indice.data_maxima
+        inicio = fim = None
+        if data_minima is not None:
+            periodo = st.date_input("Período", value=(data_minima.date(), data_maxima.date()),
+                                    min_value=data_minima.date(), max_value=data_maxima.date(),
+                                    key=f"{titulo}_periodo")
+            # Durante a escolha do intervalo o widget devolve só a data inicial
+            if len(periodo) == 2 and periodo != (data_minima.date(), data_maxima.date()):
+                inicio = pd.Timestamp(periodo[0])
+                fim = pd.Timestamp(periodo[1]) + pd.Timedelta(days=1, nanoseconds=-1)
+        chaves = st.multiselect(rotulo_chave, indice.chaves_ordenadas, key=f"{titulo}_chaves")
+        valor_min = valor_max = None
+        if indice.faixa_valores is not None and indice.faixa_valores[0] < indice.faixa_valores[1]:
+            menor, maior = indice.faixa_valores
+            faixa = st.slider(rotulo_valor, menor, maior, (menor, maior), key=f"{titulo}_valor")
+            valor_min = faixa[0] if faixa[0] > menor else None
+            valor_max = faixa[1] if faixa[1] < maior else None
+    # Chaves ordenadas: a mesma seleção em outra ordem reaproveita o cache do índice
+    return Filtro(inicio, fim, tuple(sorted(chaves)) or None, valor_min, valor_max)
+
+def exibir_qualidade_dados(dados: DadosApp):
+    """Resume na barra lateral as linhas que violam VendaModel/LocacaoModel (validadas na carga)."""
+    with st.sidebar.expander("Qualidade dos dados"):
+        for nome, resultado in (("Vendas", dados.qualidade_vendas),
+                                ("Aluguéis", dados.qualidade_locacao)):
+            if not resultado.linhas_invalidas:
+                st.caption(f"{nome}: todas as linhas válidas")
+                continue
+            st.warning(f"{nome}: {resultado.linhas_invalidas} linha(s) inválida(s)")
+            for regra, quantidade in resultado.violacoes.items():
+                if quantidade:
+                    st.caption(f"{regra}: {quantidade}")
+                    st.dataframe(resultado.amostras[regra])
 
 def main():
     """Função principal que orquestra o app Streamlit."""
     st.title("📈 Vendas & Aluguéis Insights")
     st.markdown("Dashboard interativo para análise de dados de vendas e aluguéis.")
+    if RELATORIOS_URL:
+        st.sidebar.caption(f"Relatórios servidos por {RELATORIOS_URL}")
+        st.divider()
+        try:
+            display_relatorios_remotos(cliente_relatorios())
+        except Exception as e:
+            st.error(f"Ocorreu um erro ao consultar o serviço de relatórios: {e}")
+            st.warning(f"Verifique se o serviço está no ar em {RELATORIOS_URL}.")
+        return
+    periodo = st.sidebar.radio("Período analisado", ["Histórico completo", "Últimos 30 dias"])
+    instrumentar = st.sidebar.checkbox("Medir desempenho por etapa")
+    # A coleta vale só para o contexto desta execução: outras sessões não são afetadas
+    if instrumentar:
+        rastreador.ativar()
+    else:
+        rastreador.desativar()
     st.divider()
 
     try:
-        # 1. CARREGAR DADOS
-        dados_vendas, dados_locacao = load_and_process_data()
+        # 1. CARREGAR DADOS (a versão em uso; revalidações acontecem em segundo plano)
+        dados = load_and_process_data()
+        dados_vendas, dados_locacao = dados.dados_vendas, dados.dados_locacao
+        exibir_qualidade_dados(dados)
         
         # 2. PREPARAR ANÁLISES
-        analisador_vendas = AnalisadorVendas(dados_vendas)
-        analisador_aluguel = AnalisadorAluguel(dados_locacao)
+        if periodo == "Últimos 30 dias":
+            # Só as partições do último mês (ou dois) são lidas do disco
+            fim = dados.armazem_vendas.data_maxima()
+            analisador_vendas = AnalisadorVendas.do_periodo(dados.armazem_vendas, fim - pd.Timedelta(days=30), fim)
+            fim = dados.armazem_locacao.data_maxima()
+            analisador_aluguel = AnalisadorAluguel.do_periodo(dados.armazem_locacao, fim - pd.Timedelta(days=30), fim)
+            dados_locacao = analisador_aluguel.dados_locacao
+            indice_vendas = indice_alugueis = filtro_vendas = filtro_alugueis = None
+        else:
+            analisador_vendas = AnalisadorVendas(dados_vendas)
+            analisador_aluguel = AnalisadorAluguel(dados_locacao, cubo=dados.cubo_atrasos)
+            # Filtros interativos respondem pelos índices, sem refazer as análises
+            indice_vendas, indice_alugueis = dados.indice_vendas, dados.indice_alugueis
+            filtro_vendas = filtros_barra_lateral("Filtrar vendas", indice_vendas,
+                                                  "Clientes", "Valor da compra (R$)")
+            filtro_alugueis = filtros_barra_lateral("Filtrar aluguéis", indice_alugueis,
+                                                    "Apartamentos", "Valor do aluguel (R$)")
         
         # 3. RENDERIZAR DASHBOARDS (chamando o módulo de UI)
-        display_vendas_dashboard(analisador_vendas, dados_vendas)
+        display_vendas_dashboard(analisador_vendas, indice_vendas, filtro_vendas)
         st.divider()
-        display_alugueis_dashboard(analisador_aluguel, dados_locacao)
+        display_alugueis_dashboard(analisador_aluguel, dados_locacao, indice_alugueis, filtro_alugueis)
+        
+        if instrumentar:
+            st.divider()
+            display_performance_panel()
 
     except Exception as e:
         st.error(f"Ocorreu um erro ao carregar ou processar os dados: {e}")
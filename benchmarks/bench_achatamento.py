@@ -0,0 +1,49 @@
+# benchmarks/bench_achatamento.py
+"""Compara DataFrame.explode com achatar_listas em colunas de listas aninhadas.
+
+A entrada imita a de locação depois do json_normalize: uma coluna escalar
+(apartamento) e três colunas de listas de strings, com `linhas` elementos no
+total. Mede tempo e pico de memória (tracemalloc); a equivalência com o
+explode é conferida em tests/test_achatamento.py.
+
+Uso: python -m benchmarks.bench_achatamento [linhas ...]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.achatamento import achatar_listas
+from benchmarks.suite import medir_memoria
+
+ELEMENTOS_POR_LISTA = 12
+
+
+def gerar_aninhado(linhas: int, seed: int = 0) -> pd.DataFrame:
+    """Registros com listas de tamanho variável (em média ELEMENTOS_POR_LISTA)"""
+    rng = np.random.default_rng(seed)
+    tamanhos = rng.integers(1, 2 * ELEMENTOS_POR_LISTA, max(1, linhas // ELEMENTOS_POR_LISTA))
+    datas = np.datetime_as_string(np.datetime64('2020-01-05') + rng.integers(0, 1500, tamanhos.sum()))
+    valores = np.char.add('$', rng.integers(800, 5_000, tamanhos.sum()).astype(str))
+    cortes = np.cumsum(tamanhos)[:-1]
+    return pd.DataFrame({
+        'apartamento': [f'A{i + 101} (blocoAP)' for i in range(len(tamanhos))],
+        'datas_combinadas_pagamento': [l.tolist() for l in np.split(datas, cortes)],
+        'datas_de_pagamento': [l.tolist() for l in np.split(datas[::-1].copy(), cortes)],
+        'valor_aluguel': [l.tolist() for l in np.split(valores, cortes)],
+    })
+
+
+def main(tamanhos: list) -> None:
+    for linhas in tamanhos:
+        df = gerar_aninhado(linhas)
+        colunas = df.columns[1:].tolist()
+        explodido, t_explode, m_explode = medir_memoria(lambda: df.explode(colunas).reset_index(drop=True))
+        _, t_achatar, m_achatar = medir_memoria(lambda: achatar_listas(df, colunas))
+        print(f'Linhas: {len(explodido):>12,} | explode: {t_explode:7.3f}s {m_explode:8.1f} MB | '
+              f'achatar_listas: {t_achatar:7.3f}s {m_achatar:8.1f} MB ({t_explode / t_achatar:.1f}x)')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000])
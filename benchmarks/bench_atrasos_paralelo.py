@@ -0,0 +1,44 @@
+# benchmarks/bench_atrasos_paralelo.py
+"""Escalabilidade do relatório de aluguéis com agregação em vários processos.
+
+Abaixo de paralelo.LINHAS_MINIMAS_PARALELO linhas, ou com mais processos
+que CPUs, a agregação roda (ou se limita) no próprio processo.
+
+Uso: python -m benchmarks.bench_atrasos_paralelo [pagamentos] [apartamentos]
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import AnalisadorAluguel
+from benchmarks.suite import medir
+
+
+def gerar_locacao(linhas: int, apartamentos: int) -> pd.DataFrame:
+    """Gera pagamentos já limpos, como saem do DataLoader"""
+    rng = np.random.default_rng(0)
+    combinadas = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, linhas), 'D')
+    return pd.DataFrame({
+        'apartamento': pd.Categorical.from_codes(rng.integers(0, apartamentos, linhas),
+                                                 [f'A{i}' for i in range(apartamentos)]),
+        'datas_combinadas_pagamento': combinadas,
+        'datas_de_pagamento': combinadas + pd.to_timedelta(rng.integers(-5, 40, linhas), 'D'),
+    })
+
+
+def main(linhas: int = 10_000_000, apartamentos: int = 100_000) -> None:
+    dados = gerar_locacao(linhas, apartamentos)
+    esperado, base = medir(lambda: AnalisadorAluguel(dados).gerar_relatorio())
+    print(f'Pagamentos: {linhas:,} | apartamentos: {apartamentos:,} | CPUs: {os.cpu_count()}')
+    print(f'pandas (1 thread): {base:8.3f}s')
+    for processos in (1, 2, 4, 8):
+        relatorio, tempo = medir(lambda: AnalisadorAluguel(dados, processos=processos).gerar_relatorio())
+        assert relatorio == esperado, f'relatório divergente com {processos} processos'
+        print(f'{processos} processo(s):      {tempo:8.3f}s ({base / tempo:.2f}x)')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
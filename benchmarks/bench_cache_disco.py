@@ -0,0 +1,33 @@
+# benchmarks/bench_cache_disco.py
+"""Compara o tempo de carga a frio (parse do JSON) e a quente (cache Parquet).
+
+Uso: python -m benchmarks.bench_cache_disco [linhas]
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from benchmarks.gerador_dados import gerar_vendas
+from benchmarks.suite import medir
+
+
+def main(linhas: int = 1_000_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = gerar_vendas(Path(tmp) / 'dados_vendas.json', linhas)
+        diretorio_cache = str(Path(tmp) / 'cache')
+
+        # Instâncias novas simulam reinícios do processo (sem cache em memória)
+        primeiro, segundo = (DataLoader(diretorio_cache=diretorio_cache, cache=CacheDados(0)) for _ in range(2))
+        frio = medir(lambda: primeiro.carregar_dados(config))[1]
+        quente = medir(lambda: segundo.carregar_dados(config))[1]
+
+    print(f'Linhas: {linhas:,}')
+    print(f'Carga a frio:   {frio:8.3f}s')
+    print(f'Carga a quente: {quente:8.3f}s ({frio / quente:.1f}x mais rápida)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
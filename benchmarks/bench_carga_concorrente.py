@@ -0,0 +1,54 @@
+# benchmarks/bench_carga_concorrente.py
+"""Compara a carga sequencial e a concorrente de várias fontes com latência.
+
+As fontes são servidas por um servidor HTTP local que atrasa cada resposta,
+imitando o download das URLs remotas usadas pelo app.
+
+Uso: python -m benchmarks.bench_carga_concorrente [fontes] [latencia_s] [linhas]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.models import DataLoaderConfig
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from benchmarks.gerador_dados import gerar_vendas
+from benchmarks.servidor_local import servidor_json
+
+
+def main(fontes: int = 4, latencia: float = 1.0, linhas: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        origem = Path(tmp) / 'dados_vendas.json'
+        gerar_vendas(origem, linhas)
+        conteudo = origem.read_bytes()
+
+    arquivos = {f'/vendas_{i}.json': conteudo for i in range(fontes)}
+    with servidor_json(arquivos, latencia=latencia) as url_base:
+        configs = {
+            caminho: DataLoaderConfig(url=url_base + caminho, chave='dados_vendas',
+                                      coluna_valor='Valor da compra', prefixos_remover=['R$ '])
+            for caminho in arquivos
+        }
+
+        inicio = time.perf_counter()
+        # Sem cache em memória: as duas rodadas baixam e processam tudo
+        loader = DataLoader(cache=CacheDados(0))
+        sequencial = {nome: loader.carregar_dados(config) for nome, config in configs.items()}
+        tempo_sequencial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        concorrente = DataLoader(cache=CacheDados(0)).carregar_varios(configs)
+        tempo_concorrente = time.perf_counter() - inicio
+
+    assert all(sequencial[nome].equals(concorrente[nome]) for nome in configs)
+    print(f'Fontes: {fontes} | latência: {latencia:.2f}s | linhas por fonte: {linhas:,}')
+    print(f'Sequencial:  {tempo_sequencial:8.3f}s')
+    print(f'Concorrente: {tempo_concorrente:8.3f}s ({tempo_sequencial / tempo_concorrente:.1f}x)')
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(*(tipo(valor) for tipo, valor in zip((int, float, int), argumentos)))
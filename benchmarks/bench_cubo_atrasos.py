@@ -0,0 +1,67 @@
+# benchmarks/bench_cubo_atrasos.py
+"""Compara consultas temporais sobre as linhas com as mesmas consultas no cubo de atrasos.
+
+Mede a tendência mensal com o groupby().apply() anterior, o histograma com
+a subtração refeita sobre as linhas e, no cubo, a montagem única e cada
+consulta. Confere que os resultados coincidem.
+
+Uso: python -m benchmarks.bench_cubo_atrasos [linhas ...]
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cubo_atrasos import CuboAtrasos
+from src.data_loader import DataLoader
+from benchmarks.gerador_dados import gerar_locacao
+from benchmarks.suite import medir
+
+# Repetições das consultas rápidas (vale o menor tempo)
+REPETICOES = 3
+
+
+def tendencia_linhas(dados: pd.DataFrame) -> pd.Series:
+    """Implementação anterior de plot_dashboard_alugueis"""
+    return (dados.groupby(dados['datas_de_pagamento'].dt.to_period('M'))
+            .apply(lambda x: ((x['datas_de_pagamento'] - x['datas_combinadas_pagamento']).dt.days.mean())))
+
+
+def histograma_linhas(dados: pd.DataFrame, bins: int = 50) -> np.ndarray:
+    atrasos = (dados['datas_de_pagamento'] - dados['datas_combinadas_pagamento']).dt.days
+    return np.histogram(atrasos.dropna(), bins=bins)[0]
+
+
+def main(tamanhos: list) -> None:
+    for linhas in tamanhos:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = gerar_locacao(Path(tmp) / 'dados_locacao.json', linhas)
+            config.colunas_categoricas = ['apartamento']
+            loader = DataLoader()
+            dados = loader.preparar_locacao(loader.carregar_dados(config))
+
+        tendencia, t_tendencia = medir(lambda: tendencia_linhas(dados))
+        histograma, t_histograma = medir(lambda: histograma_linhas(dados), REPETICOES)
+        cubo, t_cubo = medir(lambda: CuboAtrasos.de_dados(dados))
+        tendencia_cubo, t_tendencia_cubo = medir(cubo.tendencia_mensal, REPETICOES)
+        frequencias, t_histograma_cubo = medir(cubo.histograma, REPETICOES)
+        apartamento = dados['apartamento'].iloc[0]
+        _, t_linha_tempo = medir(lambda: cubo.linha_do_tempo(apartamento), REPETICOES)
+
+        assert np.allclose(tendencia.to_numpy(), tendencia_cubo.to_numpy())
+        assert np.array_equal(histograma, np.histogram(frequencias.index, bins=50,
+                                                      weights=frequencias.to_numpy())[0])
+        print(f'Linhas: {linhas:>12,} | células: {len(cubo.celulas):,}')
+        print(f'  tendência mensal (linhas, apply): {t_tendencia * 1000:9.1f} ms')
+        print(f'  histograma (linhas):              {t_histograma * 1000:9.1f} ms')
+        print(f'  montagem do cubo (uma vez):       {t_cubo * 1000:9.1f} ms')
+        print(f'  tendência mensal (cubo):          {t_tendencia_cubo * 1000:9.1f} ms')
+        print(f'  histograma (cubo):                {t_histograma_cubo * 1000:9.1f} ms')
+        print(f'  linha do tempo de 1 apartamento:  {t_linha_tempo * 1000:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000])
@@ -0,0 +1,133 @@
+# benchmarks/bench_filtros.py
+"""Mede os filtros do dashboard servidos pelos índices de indice_filtros.
+
+Gera vendas e aluguéis já preparados (tipos finais, sem passar pelo JSON),
+monta os índices uma vez e mede, para algumas combinações de filtro, o
+relatório calculado pelos analisadores sobre o DataFrame filtrado, o
+relatório do índice na primeira vez e o mesmo relatório vindo do cache.
+Confere que os relatórios coincidem.
+
+Uso: python -m benchmarks.bench_filtros [linhas ...]
+"""
+
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import AnalisadorVendas, AnalisadorAluguel
+from src.indice_filtros import Filtro, IndiceVendas, IndiceAlugueis
+from benchmarks.suite import medir_ms
+
+LIMITE_MS = 100
+
+
+def gerar_vendas(linhas: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    clientes = pd.Categorical([f'cliente {i}' for i in range(max(10, linhas // 20))])
+    return pd.DataFrame({
+        'Data de venda': np.datetime64('2022-06-01') + rng.integers(0, 1000, linhas).astype('timedelta64[D]'),
+        'Cliente': clientes.take(rng.integers(0, len(clientes.categories), linhas)),
+        'Valor da compra': rng.integers(100, 1_000_000, linhas) / 100,
+    })
+
+
+def gerar_locacao(linhas: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    apartamentos = pd.Categorical([f'A{i + 101}' for i in range(max(1, linhas // 12))])
+    combinadas = (np.datetime64('2020-01-05')
+                  + rng.integers(0, 1500, linhas).astype('timedelta64[D]'))
+    atrasos = np.minimum(rng.geometric(0.15, linhas) - 3, 60).astype('timedelta64[D]')
+    return pd.DataFrame({
+        'apartamento': apartamentos.take(rng.integers(0, len(apartamentos.categories), linhas)),
+        'datas_combinadas_pagamento': combinadas,
+        'datas_de_pagamento': combinadas + atrasos,
+        'valor_aluguel': rng.integers(80_000, 500_000, linhas) / 100,
+    })
+
+
+def filtrar(dados: pd.DataFrame, filtro: Filtro, coluna_data: str, coluna_chave: str,
+            coluna_valor: str) -> pd.DataFrame:
+    """Aplica o filtro com máscaras booleanas (o caminho sem índice)"""
+    mascara = pd.Series(True, index=dados.index)
+    if filtro.inicio is not None:
+        mascara &= dados[coluna_data] >= filtro.inicio
+    if filtro.fim is not None:
+        mascara &= dados[coluna_data] <= filtro.fim
+    if filtro.chaves is not None:
+        mascara &= dados[coluna_chave].isin(filtro.chaves)
+    if filtro.valor_min is not None:
+        mascara &= dados[coluna_valor] >= filtro.valor_min
+    if filtro.valor_max is not None:
+        mascara &= dados[coluna_valor] <= filtro.valor_max
+    return dados[mascara]
+
+
+def conferir(esperado, obtido) -> None:
+    """Compara os relatórios campo a campo (números com tolerância, empates em qualquer ordem)"""
+    obtido = obtido.model_dump()
+    for campo, valor in esperado.model_dump().items():
+        outro = obtido[campo]
+        if campo.startswith('percentis_') and isinstance(next(iter(valor.values()), None), dict):
+            # Percentis por chave: mesmas chaves, exceto as empatadas no ranking
+            assert len(valor) == len(outro), campo
+            for chave in valor.keys() & outro.keys():
+                assert all(math.isclose(valor[chave][p], outro[chave][p]) for p in valor[chave]), campo
+        elif isinstance(valor, dict) and campo.startswith('histograma_'):
+            assert valor['contagens'] == outro['contagens'], campo
+            assert all(math.isclose(a, b) for a, b in zip(valor['limites'], outro['limites'])), campo
+        elif isinstance(valor, dict):
+            assert len(valor) == len(outro) and all(
+                math.isclose(a, b) for a, b in zip(sorted(valor.values()), sorted(outro.values()))), campo
+        elif isinstance(valor, float):
+            assert math.isclose(valor, outro, rel_tol=1e-9), campo
+        elif campo not in ('cliente_vencedor', 'apartamento_mais_atrasado', 'apartamento_mais_pontual'):
+            assert valor == outro, campo
+
+
+def filtros(dados: pd.DataFrame, coluna_data: str, coluna_chave: str, coluna_valor: str) -> dict:
+    datas = dados[coluna_data]
+    meio = datas.min() + (datas.max() - datas.min()) / 2
+    chaves = tuple(sorted(dados[coluna_chave].drop_duplicates().iloc[:20]))
+    valores = dados[coluna_valor]
+    return {
+        'sem filtro': Filtro(),
+        'um mês': Filtro(inicio=meio, fim=meio + pd.Timedelta(days=30)),
+        '20 chaves': Filtro(chaves=chaves),
+        'trimestre + valor': Filtro(inicio=meio, fim=meio + pd.Timedelta(days=90),
+                                    valor_min=valores.quantile(0.25), valor_max=valores.quantile(0.75)),
+        'tudo combinado': Filtro(inicio=datas.min(), fim=meio, chaves=chaves,
+                                 valor_min=valores.quantile(0.5)),
+    }
+
+
+def comparar(nome: str, dados: pd.DataFrame, indice, analisador, colunas) -> bool:
+    print(f'  {nome}: {"filtro":<18} {"pandas":>10} {"índice":>10} {"cache":>10}')
+    dentro_do_limite = True
+    for rotulo, filtro in filtros(dados, *colunas).items():
+        esperado, t_pandas = medir_ms(lambda: analisador(filtrar(dados, filtro, *colunas)).gerar_relatorio())
+        obtido, t_indice = medir_ms(lambda: indice.relatorio(filtro))
+        _, t_cache = medir_ms(lambda: indice.relatorio(filtro))
+        conferir(esperado, obtido)
+        dentro_do_limite &= t_indice < LIMITE_MS
+        print(f'  {"":{len(nome)}}  {rotulo:<18} {t_pandas:8.1f}ms {t_indice:8.1f}ms {t_cache:8.3f}ms')
+    return dentro_do_limite
+
+
+def main(tamanhos: list) -> None:
+    for linhas in tamanhos:
+        vendas, locacao = gerar_vendas(linhas), gerar_locacao(linhas)
+        indice_vendas, t_vendas = medir_ms(lambda: IndiceVendas(vendas))
+        indice_alugueis, t_alugueis = medir_ms(lambda: IndiceAlugueis(locacao))
+        print(f'Linhas: {linhas:,} | montagem dos índices: vendas {t_vendas:.0f}ms, '
+              f'aluguéis {t_alugueis:.0f}ms (uma vez)')
+        ok = comparar('vendas', vendas, indice_vendas, AnalisadorVendas,
+                      ('Data de venda', 'Cliente', 'Valor da compra'))
+        ok &= comparar('aluguéis', locacao, indice_alugueis, AnalisadorAluguel,
+                       ('datas_combinadas_pagamento', 'apartamento', 'valor_aluguel'))
+        print(f'  todas as consultas abaixo de {LIMITE_MS} ms: {"sim" if ok else "não"}')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000])
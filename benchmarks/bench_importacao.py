@@ -0,0 +1,83 @@
+# benchmarks/bench_importacao.py
+"""Mede o custo de importação dos módulos de `src` e vigia dependências pesadas.
+
+Cada módulo é importado num interpretador novo com `python -X importtime`;
+o tempo acumulado vem da própria saída do importtime e os módulos carregados
+são conferidos contra a lista de dependências que não deveriam aparecer
+(ex.: `src.analytics` não deve carregar matplotlib, seaborn nem streamlit).
+
+Uso: python -m benchmarks.bench_importacao [--repeticoes 5] [--limite-ms 1500]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Tuple
+
+# Módulo -> dependências que não podem ser carregadas só pela importação
+PROIBIDOS: Dict[str, Tuple[str, ...]] = {
+    'src.models': ('pandas', 'matplotlib', 'seaborn', 'streamlit', 'requests'),
+    'src.analytics': ('matplotlib', 'seaborn', 'streamlit', 'requests'),
+    'src.data_loader': ('matplotlib', 'seaborn', 'streamlit', 'requests'),
+    'src.visualizations': ('matplotlib', 'seaborn', 'streamlit', 'requests'),
+    'src.cache_figuras': ('matplotlib', 'seaborn', 'streamlit', 'requests'),
+    'src.lote': ('pandas', 'matplotlib', 'seaborn', 'streamlit', 'requests'),
+}
+
+_LINHA = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def medir(modulo: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """Tempo acumulado (ms), 5 dependências mais caras e proibidos carregados"""
+    proibidos = PROIBIDOS.get(modulo, ())
+    codigo = (f'import sys, {modulo}; '
+              f'print(",".join(m for m in {proibidos!r} if m in sys.modules))')
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                              capture_output=True, text=True, check=True)
+    # O importtime lista as dependências antes do módulo que as importou; só
+    # interessam as diretas (um nível de recuo) do bloco que termina em `modulo`
+    total, dependencias, bloco = 0.0, [], []
+    for linha in processo.stderr.splitlines():
+        encontrado = _LINHA.match(linha)
+        if not encontrado:
+            continue
+        acumulado = int(encontrado.group(2)) / 1000
+        recuo, nome = len(encontrado.group(3)), encontrado.group(4)
+        if recuo == 1:
+            if nome == modulo:
+                total, dependencias = acumulado, bloco
+            bloco = []
+        elif recuo == 3:
+            bloco.append((nome, acumulado))
+    carregados = [m for m in processo.stdout.strip().split(',') if m]
+    return total, sorted(dependencias, key=lambda d: -d[1])[:5], carregados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite-ms', type=float, default=None,
+                        help='falha se algum módulo passar deste tempo (mediana)')
+    argumentos = parser.parse_args()
+
+    problemas = 0
+    for modulo in PROIBIDOS:
+        medicoes = [medir(modulo) for _ in range(argumentos.repeticoes)]
+        tempo = median(m[0] for m in medicoes)
+        dependencias, carregados = medicoes[0][1], medicoes[0][2]
+        print(f'{modulo:<22} {tempo:8.1f} ms   ' +
+              ', '.join(f'{nome} {ms:.0f}ms' for nome, ms in dependencias))
+        if carregados:
+            problemas += 1
+            print(f'    carrega dependências pesadas: {", ".join(carregados)}')
+        if argumentos.limite_ms is not None and tempo > argumentos.limite_ms:
+            problemas += 1
+            print(f'    acima do limite de {argumentos.limite_ms:.0f} ms')
+    if problemas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
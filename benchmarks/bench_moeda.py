@@ -0,0 +1,42 @@
+# benchmarks/bench_moeda.py
+"""Compara a cadeia de str.replace original com o conversor monetário vetorizado.
+
+Uso: python -m benchmarks.bench_moeda [linhas ...]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.moeda import converter_valores_monetarios
+from benchmarks.suite import medir
+
+
+def gerar_valores(linhas: int) -> pd.Series:
+    """Gera valores no formato 'R$ 1234,56' da fonte de vendas"""
+    rng = np.random.default_rng(0)
+    reais = rng.integers(1, 10_000, linhas).astype(str)
+    centavos = np.char.zfill(rng.integers(0, 100, linhas).astype(str), 2)
+    return pd.Series(np.char.add(np.char.add('R$ ', reais), np.char.add(',', centavos)), dtype=object)
+
+
+def conversao_original(valores: pd.Series, prefixos: list) -> pd.Series:
+    """Reprodução da implementação anterior de _limpar_valores_monetarios"""
+    for prefixo in prefixos:
+        valores = valores.str.replace(prefixo, '', regex=False)
+    valores = valores.str.replace(',', '.', regex=False).str.strip()
+    return pd.to_numeric(valores, errors='coerce')
+
+
+def main(tamanhos: list) -> None:
+    for linhas in tamanhos:
+        valores = gerar_valores(linhas)
+        original = medir(lambda: conversao_original(valores, ['R$ ']))[1]
+        novo = medir(lambda: converter_valores_monetarios(valores, ['R$ ']))[1]
+        print(f'Linhas: {linhas:>12,} | original: {original:8.3f}s | '
+              f'vetorizado: {novo:8.3f}s ({original / novo:.1f}x)')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000, 10_000_000])
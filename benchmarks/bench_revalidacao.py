@@ -0,0 +1,156 @@
+# benchmarks/bench_revalidacao.py
+"""Revalidação condicional das fontes e atualização em segundo plano.
+
+As fontes são servidas com latência pelo servidor HTTP local, que responde
+304 a requisições condicionais de conteúdo inalterado e 200 quando o
+conteúdo é trocado. Mede e confere:
+
+- primeira carga (200, processamento completo);
+- revalidações sem mudança (304, nenhum reprocessamento);
+- troca do conteúdo (200, reprocessado) e fonte sem ETag/Last-Modified
+  que devolve os mesmos bytes (200, mas sem reprocessar);
+- AtualizadorDados: leitores contínuos em várias threads enquanto a fonte
+  muda; nenhuma leitura espera pela renovação e cada mudança vira
+  exatamente uma nova versão.
+
+Uso: python -m benchmarks.bench_revalidacao [linhas] [latencia_s] [leitores]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from src.atualizacao import AtualizadorDados
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from benchmarks.gerador_dados import gerar_vendas
+from benchmarks.servidor_local import servidor_json
+from benchmarks.suite import medir_ms
+
+INTERVALO = 0.2
+
+
+def versoes_da_fonte(linhas: int, quantidade: int):
+    """Conteúdos diferentes da mesma fonte (seeds diferentes) e a configuração"""
+    conteudos = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for seed in range(quantidade):
+            config = gerar_vendas(Path(tmp) / 'dados_vendas.json', linhas, seed=seed)
+            conteudos.append(Path(config.url).read_bytes())
+    return conteudos, config
+
+
+def conferir_revalidacao(conteudos, config, latencia: float) -> None:
+    arquivos = {'/vendas.json': conteudos[0]}
+    respostas = Counter()
+    with servidor_json(arquivos, latencia=latencia, respostas=respostas) as url:
+        config = config.model_copy(update={'url': url + '/vendas.json'})
+        loader = DataLoader(cache=CacheDados())
+
+        (dados, mudaram), t = medir_ms(lambda: loader.revalidar(config))
+        assert mudaram and respostas == Counter({200: 1})
+        print(f'  primeira carga            {t:8.1f}ms  200, {len(dados):,} linhas processadas')
+
+        tempos = []
+        for _ in range(5):
+            (outros, mudaram), t = medir_ms(lambda: loader.revalidar(config))
+            assert not mudaram and outros.equals(dados)
+            tempos.append(t)
+        assert respostas == Counter({200: 1, 304: 5})
+        print(f'  revalidação sem mudança   {np.median(tempos):8.1f}ms  304 (mediana de 5), '
+              f'latência da fonte {latencia * 1000:.0f}ms')
+
+        arquivos['/vendas.json'] = conteudos[1]
+        (novos, mudaram), t = medir_ms(lambda: loader.revalidar(config))
+        assert mudaram and respostas[200] == 2 and not novos.equals(dados)
+        print(f'  conteúdo trocado          {t:8.1f}ms  200, reprocessado')
+
+    respostas.clear()
+    with servidor_json(arquivos, latencia=latencia, validadores=False, respostas=respostas) as url:
+        config = config.model_copy(update={'url': url + '/vendas.json'})
+        loader = DataLoader(cache=CacheDados())
+        loader.revalidar(config)
+        (_, mudaram), t = medir_ms(lambda: loader.revalidar(config))
+        assert not mudaram and respostas == Counter({200: 2})
+        print(f'  sem validadores, iguais   {t:8.1f}ms  200, mesmo SHA-256: não reprocessado')
+
+
+def conferir_atualizador(conteudos, config, latencia: float, leitores: int) -> None:
+    arquivos = {'/vendas.json': conteudos[0]}
+    respostas = Counter()
+    with servidor_json(arquivos, latencia=latencia, respostas=respostas) as url:
+        config = config.model_copy(update={'url': url + '/vendas.json'})
+        loader = DataLoader(cache=CacheDados())
+        processamentos = []
+
+        def atualizar(anterior):
+            dados, mudaram = loader.revalidar(config)
+            if anterior is not None and not mudaram:
+                return None
+            processamentos.append(len(dados))
+            return loader.validadores[config.url].resumo, dados
+
+        atualizador = AtualizadorDados(atualizar, intervalo=INTERVALO)
+        _, t = medir_ms(atualizador.obter)
+        print(f'  primeira obtenção         {t:8.1f}ms  (única que espera pela carga)')
+
+        latencias, vistas, erros = [], set(), []
+        parar = threading.Event()
+
+        def ler():
+            ultima = -1
+            try:
+                while not parar.is_set():
+                    instantaneo, t = medir_ms(atualizador.obter)
+                    # A troca é atômica: cada leitor só vê versões novas, nunca volta atrás
+                    assert instantaneo.versao >= ultima
+                    ultima = instantaneo.versao
+                    latencias.append(t)
+                    vistas.add((instantaneo.versao, instantaneo.valor[0]))
+                    time.sleep(0.001)
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=ler) for _ in range(leitores)]
+        for thread in threads:
+            thread.start()
+        for conteudo in conteudos[1:]:
+            time.sleep(INTERVALO + 3 * latencia)
+            arquivos['/vendas.json'] = conteudo
+        time.sleep(INTERVALO + 3 * latencia + 1.0)
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+        assert not erros, erros
+        latencias = np.array(latencias)
+        versoes = sorted(vistas)
+        assert [v for v, _ in versoes] == list(range(len(conteudos))), versoes
+        assert len({r for _, r in versoes}) == len(conteudos)
+        assert len(processamentos) == len(conteudos), processamentos
+        estatisticas = atualizador.estatisticas()
+        print(f'  {leitores} leitores, {len(latencias):,} leituras: p50 {np.percentile(latencias, 50):.3f}ms, '
+              f'p99 {np.percentile(latencias, 99):.3f}ms, máx {latencias.max():.2f}ms')
+        print(f'  versões vistas {len(versoes)} (de {len(conteudos)} conteúdos), '
+              f'processamentos {len(processamentos)}, verificações {estatisticas["verificacoes"]}, '
+              f'respostas {dict(respostas)}')
+        assert latencias.max() < latencia * 1000 / 2, 'leitura esperou pela renovação'
+
+
+def main(linhas: int = 50_000, latencia: float = 0.3, leitores: int = 8) -> None:
+    conteudos, config = versoes_da_fonte(linhas, 3)
+    print(f'Linhas: {linhas:,} | latência da fonte: {latencia:.2f}s | leitores: {leitores}')
+    print('DataLoader.revalidar')
+    conferir_revalidacao(conteudos, config, latencia)
+    print('AtualizadorDados (stale-while-revalidate)')
+    conferir_atualizador(conteudos, config, latencia, leitores)
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(*(tipo(valor) for tipo, valor in zip((int, float, int), argumentos)))
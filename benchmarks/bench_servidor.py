@@ -0,0 +1,137 @@
+# benchmarks/bench_servidor.py
+"""Teste de carga do servidor_relatorios com muitos clientes simultâneos.
+
+As fontes são servidas com latência pelo servidor HTTP local e o serviço de
+relatórios roda numa thread própria, numa porta livre. Cada cliente abre uma
+conexão keep-alive e pede relatórios e gráficos dos dois conjuntos. São
+três rodadas: a frio (todos chegam antes da primeira carga terminar), a
+quente (tudo no cache) e depois do TTL vencer. Confere que cada rodada fria
+carregou cada conjunto e renderizou cada gráfico uma única vez.
+
+Uso: python -m benchmarks.bench_servidor [clientes] [pedidos_por_cliente] [linhas] [latencia_s]
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from src.models import ItemLote
+from src.servidor_relatorios import ServicoRelatorios
+from benchmarks.gerador_dados import gerar_vendas, gerar_locacao
+from benchmarks.servidor_local import servidor_json
+
+TTL = 10.0
+ROTAS = ['/relatorios/vendas', '/relatorios/locacao',
+         '/graficos/vendas/top_clientes.png', '/graficos/vendas/vendas_por_dia.png',
+         '/graficos/locacao/ranking_apartamentos.png', '/graficos/locacao/distribuicao_atrasos.png']
+GRAFICOS = sum(rota.startswith('/graficos/') for rota in ROTAS)
+
+
+@contextmanager
+def servico_em_segundo_plano(itens: List[ItemLote], ttl: float) -> Iterator[Tuple[str, ServicoRelatorios]]:
+    """Roda o serviço no event loop de outra thread e devolve a URL base"""
+    laco = asyncio.new_event_loop()
+    thread = threading.Thread(target=laco.run_forever, daemon=True)
+    thread.start()
+    servico = ServicoRelatorios(itens, ttl)
+    porta = asyncio.run_coroutine_threadsafe(servico.iniciar('127.0.0.1', 0), laco).result()
+    try:
+        yield f'127.0.0.1:{porta}', servico
+    finally:
+        asyncio.run_coroutine_threadsafe(servico.encerrar(), laco).result()
+        laco.call_soon_threadsafe(laco.stop)
+        thread.join()
+        laco.close()
+
+
+async def cliente(endereco: str, rotas: List[str]) -> List[Tuple[float, int, str]]:
+    """Pede as rotas em sequência numa conexão keep-alive: (segundos, status, X-Cache)"""
+    host, porta = endereco.split(':')
+    leitor, escritor = await asyncio.open_connection(host, int(porta))
+    resultados = []
+    try:
+        for rota in rotas:
+            inicio = time.perf_counter()
+            escritor.write(f'GET {rota} HTTP/1.1\r\nHost: {endereco}\r\n\r\n'.encode('latin-1'))
+            status = int((await leitor.readline()).split()[1])
+            cabecalhos = {}
+            while (linha := await leitor.readline()) != b'\r\n':
+                nome, _, valor = linha.decode('latin-1').partition(':')
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            await leitor.readexactly(int(cabecalhos['content-length']))
+            resultados.append((time.perf_counter() - inicio, status, cabecalhos.get('x-cache', '-')))
+    finally:
+        escritor.close()
+    return resultados
+
+
+async def rodada(endereco: str, clientes: int, pedidos: int, seed: int) -> Tuple[list, float]:
+    rng = np.random.default_rng(seed)
+    planos = [[ROTAS[i] for i in rng.integers(0, len(ROTAS), pedidos)] for _ in range(clientes)]
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(cliente(endereco, plano) for plano in planos))
+    return [r for parcial in resultados for r in parcial], time.perf_counter() - inicio
+
+
+def resumir(nome: str, resultados: list, segundos: float, estatisticas: dict) -> None:
+    latencias = np.array([r[0] for r in resultados]) * 1000
+    status = Counter(r[1] for r in resultados)
+    origens = Counter(r[2] for r in resultados)
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    print(f'{nome:<10} {len(resultados):>6} pedidos em {segundos:6.2f}s ({len(resultados) / segundos:8.0f}/s) | '
+          f'p50 {p50:7.1f}ms p95 {p95:7.1f}ms p99 {p99:7.1f}ms máx {latencias.max():7.1f}ms')
+    print(f'{"":<10} status {dict(status)} | origem {dict(origens)} | '
+          f'cargas {estatisticas["cargas"]}, renderizações {estatisticas["renderizacoes"]}')
+
+
+def main(clientes: int = 200, pedidos: int = 20, linhas: int = 100_000, latencia: float = 0.5) -> None:
+    import matplotlib
+    matplotlib.use('Agg')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vendas = gerar_vendas(Path(tmp) / 'dados_vendas.json', linhas)
+        locacao = gerar_locacao(Path(tmp) / 'dados_locacao.json', linhas)
+        arquivos = {'/vendas.json': Path(vendas.url).read_bytes(),
+                    '/locacao.json': Path(locacao.url).read_bytes()}
+
+    with servidor_json(arquivos, latencia=latencia) as url_fontes:
+        vendas.url, locacao.url = url_fontes + '/vendas.json', url_fontes + '/locacao.json'
+        itens = [ItemLote(nome='vendas', tipo='vendas', config=vendas),
+                 ItemLote(nome='locacao', tipo='locacao', config=locacao)]
+        with servico_em_segundo_plano(itens, TTL) as (endereco, servico):
+            def estatisticas() -> dict:
+                return {**servico.cache.estatisticas(), 'cargas': servico.cargas,
+                        'renderizacoes': servico.renderizacoes}
+
+            print(f'Clientes: {clientes} | pedidos por cliente: {pedidos} | linhas por fonte: {linhas:,} | '
+                  f'latência da fonte: {latencia:.2f}s | TTL: {TTL:g}s')
+            resultados, segundos = asyncio.run(rodada(endereco, clientes, pedidos, 0))
+            resumir('a frio', resultados, segundos, estatisticas())
+            assert all(r[1] == 200 for r in resultados)
+            assert servico.cargas == len(itens) and servico.renderizacoes <= GRAFICOS
+
+            resultados, segundos = asyncio.run(rodada(endereco, clientes, pedidos, 1))
+            resumir('a quente', resultados, segundos, estatisticas())
+            assert all(r[2] == 'acerto' for r in resultados)
+
+            time.sleep(TTL)
+            cargas, renderizacoes = servico.cargas, servico.renderizacoes
+            resultados, segundos = asyncio.run(rodada(endereco, clientes, pedidos, 2))
+            resumir('após TTL', resultados, segundos, estatisticas())
+            assert servico.cargas - cargas == len(itens)
+            assert servico.renderizacoes - renderizacoes <= GRAFICOS
+            print(json.dumps(estatisticas(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(*(tipo(valor) for tipo, valor in zip((int, int, int, float), argumentos)))
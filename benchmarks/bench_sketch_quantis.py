@@ -0,0 +1,95 @@
+# benchmarks/bench_sketch_quantis.py
+"""Confere e mede os sketches de quantis de sketch_quantis.
+
+Para valores de compra e atrasos gerados (além de uma distribuição
+log-normal com negativos e zeros), compara p50/p90/p99 e outros quantis do
+sketch com os exatos (np.quantile, method='lower'), globais e por chave, e
+confere que o erro fica dentro de α·|x|. Confere também que montar bloco a
+bloco e combinar shards dá exatamente o mesmo sketch que montar de uma vez.
+Mede o tempo contra np.percentile e groupby().quantile e mostra quantos
+buckets cada sketch guarda.
+
+Uso: python -m benchmarks.bench_sketch_quantis [linhas] [blocos]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import AnalisadorAluguel
+from src.sketch_quantis import ALFA_PADRAO, PERCENTIS, MINIMO_INDEXAVEL, SketchQuantis, SketchesPorChave
+from benchmarks.bench_filtros import gerar_vendas, gerar_locacao
+from benchmarks.suite import medir_ms
+
+QUANTIS = (0.0, 0.01, 0.25) + PERCENTIS + (0.999, 1.0)
+
+
+def erro_relativo(aproximado, exato) -> np.ndarray:
+    aproximado, exato = np.asarray(aproximado), np.asarray(exato)
+    return np.abs(aproximado - exato) / np.maximum(np.abs(exato), MINIMO_INDEXAVEL)
+
+
+def conferir_global(nome: str, valores: np.ndarray, blocos: int) -> None:
+    sketch, t_sketch = medir_ms(lambda: SketchQuantis.de_valores(valores))
+    exatos, t_exato = medir_ms(lambda: np.quantile(valores, QUANTIS, method='lower'))
+    _, t_percentil = medir_ms(lambda: np.percentile(valores, [q * 100 for q in PERCENTIS]))
+    erros = erro_relativo(sketch.quantis(QUANTIS), exatos)
+    assert (erros <= ALFA_PADRAO + 1e-12).all(), (nome, dict(zip(QUANTIS, erros)))
+
+    combinado = SketchQuantis.combinar_todos(SketchQuantis.de_valores(parte)
+                                             for parte in np.array_split(valores, blocos))
+    fluxo = SketchQuantis()
+    for parte in np.array_split(valores, blocos):
+        fluxo.adicionar(parte)
+    for outro in (combinado, fluxo):
+        assert np.array_equal(outro.codigos, sketch.codigos) and np.array_equal(outro.contagens, sketch.contagens)
+        assert (outro.minimo, outro.maximo, len(outro)) == (sketch.minimo, sketch.maximo, len(sketch))
+
+    print(f'  {nome:<22} {len(sketch.codigos):>6} buckets | erro máx. {erros.max():.4%} '
+          f'(limite {ALFA_PADRAO:.0%}) | sketch {t_sketch:7.1f}ms, np.percentile {t_percentil:7.1f}ms, '
+          f'consulta {medir_ms(lambda: sketch.percentis())[1]:.3f}ms')
+
+
+def conferir_por_chave(nome: str, chaves: pd.Series, valores: pd.Series, blocos: int) -> None:
+    sketches, t_sketch = medir_ms(lambda: SketchesPorChave.de_valores(chaves, valores))
+    tabela, t_consulta = medir_ms(lambda: sketches.quantis())
+    grupos = valores.groupby(chaves, observed=True)
+    exatos, t_exato = medir_ms(lambda: grupos.quantile(list(PERCENTIS), interpolation='lower').unstack())
+    exatos = exatos.loc[tabela.index]
+    pior = 0.0
+    for q, coluna in zip(PERCENTIS, tabela.columns):
+        erros = erro_relativo(tabela[coluna].to_numpy(), exatos[q].to_numpy())
+        assert (erros <= ALFA_PADRAO + 1e-12).all(), (nome, coluna, erros.max())
+        pior = max(pior, erros.max())
+
+    limites = np.linspace(0, len(chaves), blocos + 1).astype(int)
+    combinado = SketchesPorChave.combinar_todos([SketchesPorChave.de_valores(chaves.iloc[i:j], valores.iloc[i:j])
+                                                  for i, j in zip(limites[:-1], limites[1:])])
+    assert combinado.quantis().loc[tabela.index].equals(tabela), nome
+
+    print(f'  {nome:<22} {len(tabela):>6} chaves, {len(sketches.codigos) / max(len(tabela), 1):5.1f} buckets/chave | '
+          f'erro máx. {pior:.4%} | sketches {t_sketch:7.1f}ms + consulta {t_consulta:6.1f}ms, '
+          f'groupby().quantile {t_exato:7.1f}ms')
+
+
+def main(linhas: int = 1_000_000, blocos: int = 8) -> None:
+    rng = np.random.default_rng(0)
+    vendas, locacao = gerar_vendas(linhas), gerar_locacao(linhas)
+    atrasos = AnalisadorAluguel(locacao).obter_atrasos()
+    diversos = np.concatenate([rng.lognormal(3, 2, linhas), -rng.exponential(50, linhas // 10),
+                               np.zeros(linhas // 100)])
+    rng.shuffle(diversos)
+
+    print(f'Linhas: {linhas:,} | blocos/shards: {blocos} | alfa: {ALFA_PADRAO}')
+    conferir_global('valor da compra', vendas['Valor da compra'].to_numpy(), blocos)
+    conferir_global('atraso', atrasos.to_numpy(dtype=np.float64), blocos)
+    conferir_global('log-normal com sinal', diversos, blocos)
+    conferir_por_chave('valor por cliente', vendas['Cliente'], vendas['Valor da compra'], blocos)
+    conferir_por_chave('atraso por apartamento', locacao['apartamento'], atrasos, blocos)
+    print('  todos os quantis dentro do limite de erro e combinações idênticas: sim')
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(*(int(valor) for valor in argumentos))
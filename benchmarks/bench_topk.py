@@ -0,0 +1,39 @@
+# benchmarks/bench_topk.py
+"""Compara a ordenação completa (sort_values) com a seleção parcial de top-k.
+
+Uso: python -m benchmarks.bench_topk [grupos ...]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.topk import maiores, menores
+from benchmarks.suite import medir
+
+
+def ordenacao_completa(totais: pd.Series) -> tuple:
+    """Reprodução do uso anterior nos relatórios: sort + head/index[0]/index[-1]"""
+    ordenado = totais.sort_values(ascending=False)
+    return ordenado.head(10), ordenado.index[-1]
+
+
+def selecao_parcial(totais: pd.Series) -> tuple:
+    return maiores(totais, 10), menores(totais, 1).index[0]
+
+
+def main(tamanhos: list) -> None:
+    rng = np.random.default_rng(0)
+    for grupos in tamanhos:
+        totais = pd.Series(rng.uniform(0, 1e6, grupos),
+                           index=pd.Index(np.arange(grupos).astype(str), name='Cliente'))
+        assert ordenacao_completa(totais)[0].equals(selecao_parcial(totais)[0])
+        completo = medir(lambda: ordenacao_completa(totais))[1]
+        parcial = medir(lambda: selecao_parcial(totais))[1]
+        print(f'Grupos: {grupos:>12,} | sort_values: {completo:8.3f}s | '
+              f'top-k: {parcial:8.3f}s ({completo / parcial:.1f}x)')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000, 10_000_000])
@@ -0,0 +1,81 @@
+# benchmarks/bench_validacao.py
+"""Mede a validação colunar contra a carga dos dados e confere a equivalência com Pydantic.
+
+Para cada tamanho, carrega vendas sintéticas (carregar_dados + preparar_vendas),
+injeta linhas inválidas e compara o tempo de validar_vendas com o da carga.
+Numa amostra, as linhas rejeitadas precisam ser exatamente as que VendaModel
+rejeita linha a linha.
+
+Uso: python -m benchmarks.bench_validacao [linhas ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from src.data_loader import DataLoader
+from src.models import VendaModel
+from src.validacao import validar_vendas
+from benchmarks.gerador_dados import gerar_vendas
+
+AMOSTRA_PYDANTIC = 20_000
+
+
+def _injetar_invalidos(dados: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """Troca ~1% dos valores por ausentes, zeros, negativos e nomes vazios"""
+    rng = np.random.default_rng(seed)
+    linhas = len(dados)
+    dados['Valor da compra'] = dados['Valor da compra'].mask(rng.random(linhas) < 0.003)
+    dados.loc[rng.random(linhas) < 0.003, 'Valor da compra'] = 0.0
+    dados.loc[rng.random(linhas) < 0.003, 'Valor da compra'] = -1.0
+    clientes = dados['Cliente'].cat.add_categories([''])
+    dados['Cliente'] = clientes.mask(rng.random(linhas) < 0.002, '')
+    dados['Data de venda'] = dados['Data de venda'].mask(rng.random(linhas) < 0.001)
+    return dados
+
+
+def rejeitados_pydantic(dados: pd.DataFrame) -> np.ndarray:
+    """Posições das linhas que VendaModel rejeita, validando uma a uma"""
+    rejeitados = []
+    for i, (data, cliente, valor) in enumerate(dados[['Data de venda', 'Cliente', 'Valor da compra']]
+                                               .itertuples(index=False)):
+        try:
+            VendaModel(cliente=cliente, valor_compra=valor,
+                       data_venda=None if pd.isna(data) else data.to_pydatetime())
+        except ValidationError:
+            rejeitados.append(i)
+    return np.asarray(rejeitados, dtype=np.int64)
+
+
+def main(tamanhos: list) -> None:
+    for linhas in tamanhos:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = gerar_vendas(Path(tmp) / 'dados_vendas.json', linhas)
+            config.colunas_categoricas = ['Cliente']
+            inicio = time.perf_counter()
+            loader = DataLoader()
+            dados = loader.preparar_vendas(loader.carregar_dados(config))
+            carga = time.perf_counter() - inicio
+
+        dados = _injetar_invalidos(dados)
+        inicio = time.perf_counter()
+        resultado = validar_vendas(dados)
+        validacao = time.perf_counter() - inicio
+        print(f'Linhas: {linhas:>12,} | carga: {carga:8.3f}s | validação: {validacao:7.3f}s '
+              f'({validacao / carga:.1%}) | inválidas: {resultado.linhas_invalidas:,}')
+
+        amostra = dados.iloc[:AMOSTRA_PYDANTIC].reset_index(drop=True)
+        colunar = validar_vendas(amostra, acao='quarentena')
+        esperado = rejeitados_pydantic(amostra)
+        mantidas = np.setdiff1d(np.arange(len(amostra)), esperado)
+        assert colunar.linhas_invalidas == len(esperado), 'contagem diferente da do Pydantic'
+        pd.testing.assert_frame_equal(colunar.dados, amostra.iloc[mantidas].reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1_000_000])
@@ -0,0 +1,81 @@
+# benchmarks/bench_vendas_incremental.py
+"""Compara o relatório incremental de vendas com o recálculo completo.
+
+Acrescenta lotes pequenos a um histórico grande, mede o custo de cada
+atualização nos dois modos e confere se os relatórios coincidem.
+
+Uso: python -m benchmarks.bench_vendas_incremental [linhas_historico] [lotes]
+"""
+
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from src.analytics import AnalisadorVendas
+
+
+def gerar_vendas(linhas: int, clientes: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Gera vendas já limpas, como saem do DataLoader"""
+    return pd.DataFrame({
+        'Data de venda': pd.Timestamp('2022-06-01') + pd.to_timedelta(rng.integers(0, 30, linhas), 'D'),
+        'Cliente': np.char.add('cliente ', rng.integers(0, clientes, linhas).astype(str)).astype(object),
+        'Valor da compra': rng.uniform(1, 10_000, linhas),
+    })
+
+
+def conferir(incremental, completo) -> None:
+    """Falha se os relatórios divergirem além do arredondamento de ponto flutuante"""
+    for campo, esperado in completo.model_dump().items():
+        assert iguais(getattr(incremental, campo), esperado), campo
+
+
+def iguais(obtido, esperado) -> bool:
+    """Compara valores de relatório, descendo em modelos, dicionários e listas"""
+    if isinstance(obtido, BaseModel):
+        obtido = obtido.model_dump()
+    if isinstance(esperado, float):
+        return math.isclose(obtido, esperado, rel_tol=1e-9)
+    if isinstance(esperado, dict):
+        return (list(obtido) == list(esperado) and
+                all(iguais(obtido[chave], valor) for chave, valor in esperado.items()))
+    if isinstance(esperado, list):
+        return len(obtido) == len(esperado) and all(map(iguais, obtido, esperado))
+    return obtido == esperado
+
+
+def main(linhas: int = 1_000_000, lotes: int = 20) -> None:
+    rng = np.random.default_rng(0)
+    clientes = max(1, linhas // 20)
+    historico = gerar_vendas(linhas, clientes, rng)
+    novos = [gerar_vendas(100, clientes, rng) for _ in range(lotes)]
+
+    incremental = AnalisadorVendas(historico)
+    incremental.adicionar_vendas(novos[0].iloc[:0])  # monta os agregados correntes
+    tempo_incremental = tempo_completo = 0.0
+    acumulado = historico
+    for lote in novos:
+        inicio = time.perf_counter()
+        incremental.adicionar_vendas(lote)
+        relatorio_incremental = incremental.gerar_relatorio()
+        tempo_incremental += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        acumulado = pd.concat([acumulado, lote], ignore_index=True)
+        relatorio_completo = AnalisadorVendas(acumulado).gerar_relatorio()
+        tempo_completo += time.perf_counter() - inicio
+
+        conferir(relatorio_incremental, relatorio_completo)
+
+    print(f'Histórico: {linhas:,} linhas | {lotes} lotes de 100 vendas | relatórios idênticos')
+    print(f'Recálculo completo: {tempo_completo / lotes * 1000:9.2f} ms/lote')
+    print(f'Incremental:        {tempo_incremental / lotes * 1000:9.2f} ms/lote '
+          f'({tempo_completo / tempo_incremental:.0f}x)')
+
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:]]
+    main(*argumentos)
@@ -0,0 +1,117 @@
+# benchmarks/gerador_dados.py
+"""Gera dados_vendas e dados_locacao sintéticos no formato das fontes remotas.
+
+Os arquivos têm a mesma estrutura aninhada que o DataLoader espera: a
+primeira coluna de cada registro é escalar e as demais são listas a explodir,
+com prefixos monetários ('R$ ', '$', ' reais'), sufixos '(blocoAP)' e nomes
+de clientes com caixa e espaços irregulares.
+
+Uso: python -m benchmarks.gerador_dados <diretorio> [linhas]
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import IO
+
+import numpy as np
+
+from src.models import DataLoaderConfig
+
+PAGAMENTOS_POR_APARTAMENTO = 12
+
+
+def config_vendas(caminho: Path) -> DataLoaderConfig:
+    return DataLoaderConfig(url=str(caminho), chave='dados_vendas',
+                            coluna_valor='Valor da compra', prefixos_remover=['R$ '])
+
+
+def config_locacao(caminho: Path) -> DataLoaderConfig:
+    return DataLoaderConfig(url=str(caminho), chave='dados_locacao',
+                            coluna_valor='valor_aluguel', prefixos_remover=['$', ' reais'])
+
+
+def _valores_monetarios(rng: np.random.Generator, quantidade: int,
+                        minimo: int, maximo: int) -> np.ndarray:
+    """Valores no formato '1234,56' (vírgula decimal, sem milhar)"""
+    reais = rng.integers(minimo, maximo, quantidade).astype(str)
+    centavos = np.char.zfill(rng.integers(0, 100, quantidade).astype(str), 2)
+    return np.char.add(np.char.add(reais, ','), centavos)
+
+
+def _escrever_array(arquivo: IO[str], chave: str, registros) -> None:
+    """Escreve {chave: [registros...]} um registro por vez, sem montar a lista inteira"""
+    arquivo.write(f'{{"{chave}": [')
+    for i, registro in enumerate(registros):
+        if i:
+            arquivo.write(',')
+        arquivo.write(json.dumps(registro, ensure_ascii=False))
+    arquivo.write(']}')
+
+
+def gerar_vendas(caminho: Path, linhas: int, dias: int = 30, seed: int = 0) -> DataLoaderConfig:
+    """Vendas agrupadas por dia: cada registro traz listas de clientes e valores"""
+    rng = np.random.default_rng(seed)
+    clientes = max(10, linhas // 20)
+    nomes = np.array([f'Cliente {i}' for i in range(clientes)])
+    # Variações de caixa e espaços que a normalização precisa unificar
+    variantes = np.stack([nomes, np.char.upper(nomes),
+                          np.char.add(np.char.add(' ', np.char.lower(nomes)), ' ')])
+    dias = max(1, min(dias, linhas))
+    por_dia = np.diff(np.linspace(0, linhas, dias + 1).astype(int))
+
+    def registros():
+        inicio = np.datetime64('2022-06-01')
+        for dia, quantidade in enumerate(por_dia):
+            sorteados = rng.integers(0, clientes, quantidade)
+            estilos = rng.integers(0, variantes.shape[0], quantidade)
+            valores = np.char.add('R$ ', _valores_monetarios(rng, quantidade, 1, 10_000))
+            yield {
+                'Data de venda': str(inicio + dia),
+                'Cliente': variantes[estilos, sorteados].tolist(),
+                'Valor da compra': valores.tolist(),
+            }
+
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        _escrever_array(arquivo, 'dados_vendas', registros())
+    return config_vendas(caminho)
+
+
+def gerar_locacao(caminho: Path, linhas: int, seed: int = 0) -> DataLoaderConfig:
+    """Pagamentos agrupados por apartamento, com datas combinadas e efetivas"""
+    rng = np.random.default_rng(seed)
+    apartamentos = max(1, linhas // PAGAMENTOS_POR_APARTAMENTO)
+    por_apartamento = np.diff(np.linspace(0, linhas, apartamentos + 1).astype(int))
+    inicio = np.datetime64('2020-01-05')
+
+    def registros():
+        for apartamento, quantidade in enumerate(por_apartamento):
+            meses = np.arange(quantidade)
+            combinadas = (inicio.astype('datetime64[M]') + meses).astype('datetime64[D]') + 4
+            # Maioria pontual, com cauda longa de atrasos
+            atrasos = np.minimum(rng.geometric(0.15, quantidade) - 3, 60)
+            pagamentos = combinadas + atrasos
+            valores = np.char.add(np.char.add('$', _valores_monetarios(rng, quantidade, 800, 5_000)),
+                                  ' reais')
+            yield {
+                'apartamento': f'A{apartamento + 101} (blocoAP)',
+                'datas_combinadas_pagamento': combinadas.astype(str).tolist(),
+                'datas_de_pagamento': pagamentos.astype(str).tolist(),
+                'valor_aluguel': valores.tolist(),
+            }
+
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        _escrever_array(arquivo, 'dados_locacao', registros())
+    return config_locacao(caminho)
+
+
+def main(diretorio: str, linhas: int = 100_000) -> None:
+    destino = Path(diretorio)
+    destino.mkdir(parents=True, exist_ok=True)
+    gerar_vendas(destino / 'dados_vendas.json', linhas)
+    gerar_locacao(destino / 'dados_locacao.json', linhas)
+    print(f'{linhas:,} linhas de vendas e de locação geradas em {destino}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], *(int(a) for a in sys.argv[2:]))
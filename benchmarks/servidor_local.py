@@ -0,0 +1,86 @@
+# benchmarks/servidor_local.py
+"""Servidor HTTP local que imita as fontes remotas de dados nos benchmarks."""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+
+@contextmanager
+def servidor_json(arquivos: Dict[str, bytes], latencia: float = 0.0, validadores: bool = True,
+                  respostas: Optional[Counter] = None) -> Iterator[str]:
+    """Serve `arquivos` (caminho -> conteúdo) em uma porta livre e devolve a URL base
+
+    Cada resposta espera `latencia` segundos antes de ser enviada, simulando
+    uma fonte remota lenta. Com `validadores`, as respostas levam ETag e
+    Last-Modified e requisições condicionais (If-None-Match ou
+    If-Modified-Since) de um conteúdo que não mudou recebem 304 sem corpo.
+    Trocar o conteúdo de um caminho em `arquivos` durante o teste gera um
+    novo ETag (e 200) no pedido seguinte. `respostas` conta os status
+    enviados, por exemplo Counter({200: 2, 304: 5}).
+    """
+    # Versão servida de cada caminho: (conteúdo, ETag, Last-Modified)
+    versoes: Dict[str, Tuple[bytes, str, str]] = {}
+    trava = threading.Lock()
+
+    def versao(caminho: str, conteudo: bytes) -> Tuple[bytes, str, str]:
+        with trava:
+            atual = versoes.get(caminho)
+            if atual is None or atual[0] is not conteudo:
+                etag = f'"{hashlib.sha256(conteudo).hexdigest()[:32]}"'
+                atual = versoes[caminho] = (conteudo, etag, formatdate(time.time(), usegmt=True))
+            return atual
+
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            conteudo = arquivos.get(self.path)
+            time.sleep(latencia)
+            if conteudo is None:
+                self._contar(404)
+                self.send_error(404)
+                return
+            cabecalhos = {'Content-Type': 'application/json'}
+            if validadores:
+                _, etag, modificado = versao(self.path, conteudo)
+                cabecalhos.update({'ETag': etag, 'Last-Modified': modificado})
+                if_none_match = self.headers.get('If-None-Match')
+                if (etag in (if_none_match or '').split(', ') or
+                        (if_none_match is None and self.headers.get('If-Modified-Since') == modificado)):
+                    self._contar(304)
+                    self.send_response(304)
+                    for nome, valor in cabecalhos.items():
+                        self.send_header(nome, valor)
+                    self.end_headers()
+                    return
+            self._contar(200)
+            self.send_response(200)
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.send_header('Content-Length', str(len(conteudo)))
+            self.end_headers()
+            self.wfile.write(conteudo)
+
+        def _contar(self, status: int) -> None:
+            if respostas is not None:
+                with trava:
+                    respostas[status] += 1
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+    servidor.daemon_threads = True
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{servidor.server_address[1]}'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,192 @@
+# benchmarks/suite.py
+"""Benchmark de ponta a ponta do pipeline carregar → analisar → plotar.
+
+Gera dados sintéticos de cada tamanho, mede tempo e pico de memória
+(tracemalloc) de cada etapa e grava o resultado em JSON, identificado pelo
+commit atual, para comparação automática entre commits.
+
+Uso:
+    python -m benchmarks.suite executar [--tamanhos 1000 100000] [--saida arquivo.json]
+    python -m benchmarks.suite comparar base.json novo.json [--tolerancia 0.2]
+"""
+
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from src.analytics import AnalisadorVendas, AnalisadorAluguel
+from src.visualizations import VisualizadorVendas, VisualizadorAlugueis
+from benchmarks.gerador_dados import gerar_vendas, gerar_locacao
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / 'resultados'
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def medir(funcao: Callable[[], Any], repeticoes: int = 1) -> Tuple[Any, float]:
+    """Último resultado de `funcao` e o menor tempo (s) entre as repetições"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos)
+
+
+def medir_ms(funcao: Callable[[], Any], repeticoes: int = 1) -> Tuple[Any, float]:
+    """Como `medir`, com o tempo em milissegundos"""
+    resultado, segundos = medir(funcao, repeticoes)
+    return resultado, segundos * 1000
+
+
+def medir_memoria(funcao: Callable[[], Any]) -> Tuple[Any, float, float]:
+    """Resultado, tempo (s) e pico de memória (MB)
+
+    Uma execução é cronometrada e outra roda sob tracemalloc, que deixaria a
+    primeira mais lenta.
+    """
+    _, segundos = medir(funcao)
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        pico = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def _renderizar(gerar_figura: Callable[[], object]) -> Callable[[], None]:
+    """Inclui a rasterização (Agg) no custo do plot, como acontece no dashboard"""
+    def etapa():
+        figura = gerar_figura()
+        figura.savefig(io.BytesIO(), format='png')
+        figura.clear()
+    return etapa
+
+
+def executar_tamanho(linhas: int, memoria: bool = True) -> List[dict]:
+    """Mede todas as etapas do pipeline para um tamanho de entrada"""
+    resultados = []
+
+    def registrar(etapa: str, funcao: Callable[[], object]) -> None:
+        if memoria:
+            _, segundos, pico = medir_memoria(funcao)
+            medicao = {'segundos': segundos, 'pico_memoria_mb': pico}
+        else:
+            medicao = {'segundos': medir(funcao)[1]}
+        resultados.append({'linhas': linhas, 'etapa': etapa, **medicao})
+        print(f'{linhas:>12,} | {etapa:<46} {medicao["segundos"]:9.3f}s', file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_vendas = gerar_vendas(Path(tmp) / 'dados_vendas.json', linhas)
+        config_locacao = gerar_locacao(Path(tmp) / 'dados_locacao.json', linhas)
+
+        # Cache em memória desligado para medir a carga completa a cada execução
+        loader = DataLoader(cache=CacheDados(0))
+        registrar('carregar_dados[vendas]', lambda: loader.carregar_dados(config_vendas))
+        registrar('carregar_dados[locacao]', lambda: loader.carregar_dados(config_locacao))
+        dados_vendas = loader.carregar_dados(config_vendas)
+        dados_locacao = loader.carregar_dados(config_locacao)
+
+    dados_vendas['Cliente'] = dados_vendas['Cliente'].str.lower().str.strip()
+    dados_locacao['apartamento'] = (dados_locacao['apartamento']
+                                    .str.replace('(blocoAP)', '', regex=False).str.strip())
+    colunas_locacao = ['datas_combinadas_pagamento', 'datas_de_pagamento']
+    registrar('processar_datas[vendas]',
+              lambda: loader.processar_datas(dados_vendas, ['Data de venda']))
+    registrar('processar_datas[locacao]',
+              lambda: loader.processar_datas(dados_locacao, colunas_locacao))
+    dados_vendas = loader.processar_datas(dados_vendas, ['Data de venda'])
+    dados_locacao = loader.processar_datas(dados_locacao, colunas_locacao)
+
+    registrar('AnalisadorVendas.gerar_relatorio',
+              lambda: AnalisadorVendas(dados_vendas).gerar_relatorio())
+    registrar('AnalisadorAluguel.gerar_relatorio',
+              lambda: AnalisadorAluguel(dados_locacao).gerar_relatorio())
+    relatorio_vendas = AnalisadorVendas(dados_vendas).gerar_relatorio()
+    relatorio_alugueis = AnalisadorAluguel(dados_locacao).gerar_relatorio()
+
+    viz_vendas = VisualizadorVendas(relatorio_vendas, dados_vendas)
+    viz_alugueis = VisualizadorAlugueis(relatorio_alugueis, dados_locacao)
+    for visualizador in (viz_vendas, viz_alugueis):
+        for nome in sorted(n for n in dir(visualizador) if n.startswith('plot_')):
+            registrar(f'{type(visualizador).__name__}.{nome}',
+                      _renderizar(getattr(visualizador, nome)))
+    return resultados
+
+
+def executar(tamanhos: List[int], saida: Path, memoria: bool = True) -> dict:
+    relatorio = {
+        'commit': _commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': [r for linhas in tamanhos for r in executar_tamanho(linhas, memoria)],
+    }
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'Resultados gravados em {saida}')
+    return relatorio
+
+
+def comparar(base: Path, novo: Path, tolerancia: float = 0.2) -> bool:
+    """Compara dois resultados e aponta etapas mais lentas que base * (1 + tolerancia)"""
+    def indexar(caminho: Path) -> Dict[tuple, dict]:
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+        return {(r['linhas'], r['etapa']): r for r in dados['resultados']}
+
+    anteriores, atuais = indexar(base), indexar(novo)
+    regressoes = 0
+    for chave in sorted(anteriores.keys() & atuais.keys()):
+        antes, depois = anteriores[chave]['segundos'], atuais[chave]['segundos']
+        razao = depois / antes if antes else float('inf')
+        regrediu = razao > 1 + tolerancia
+        regressoes += regrediu
+        marca = 'REGRESSÃO' if regrediu else ''
+        print(f'{chave[0]:>12,} | {chave[1]:<46} {antes:9.3f}s -> {depois:9.3f}s ({razao:5.2f}x) {marca}')
+    print(f'{regressoes} regressão(ões) acima de {tolerancia:.0%}')
+    return regressoes == 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    cmd_executar = comandos.add_parser('executar', help='mede o pipeline e grava um JSON')
+    cmd_executar.add_argument('--tamanhos', type=int, nargs='+', default=[1_000, 100_000])
+    cmd_executar.add_argument('--saida', type=Path, default=None)
+    cmd_executar.add_argument('--sem-memoria', action='store_true',
+                              help='não repete as etapas sob tracemalloc')
+
+    cmd_comparar = comandos.add_parser('comparar', help='compara dois JSONs de resultados')
+    cmd_comparar.add_argument('base', type=Path)
+    cmd_comparar.add_argument('novo', type=Path)
+    cmd_comparar.add_argument('--tolerancia', type=float, default=0.2)
+
+    argumentos = parser.parse_args()
+    if argumentos.comando == 'executar':
+        saida = argumentos.saida or DIRETORIO_RESULTADOS / f'{_commit_atual()}.json'
+        executar(argumentos.tamanhos, saida, memoria=not argumentos.sem_memoria)
+    elif not comparar(argumentos.base, argumentos.novo, argumentos.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# src/achatamento.py
+
+import itertools
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .instrumentacao import rastreador
+
+
+class ErroTamanhoListas(ValueError):
+    """Linhas cujas listas têm tamanhos diferentes entre as colunas a achatar
+
+    `divergencias` traz, por linha divergente, a quantidade de elementos
+    (listas vazias, ausentes e escalares contam 1, como no DataFrame.explode).
+    """
+
+    def __init__(self, divergencias: pd.DataFrame, exibir: int = 5):
+        self.divergencias = divergencias
+        exemplos = '; '.join(
+            f"linha {linha}: " + ', '.join(f'{coluna}={tamanho}' for coluna, tamanho in tamanhos.items())
+            for linha, tamanhos in divergencias.head(exibir).iterrows())
+        mais = f' (e mais {len(divergencias) - exibir})' if len(divergencias) > exibir else ''
+        super().__init__(f"{len(divergencias)} linha(s) com listas de tamanhos diferentes: "
+                         f"{exemplos}{mais}")
+
+
+def _e_lista(valor) -> bool:
+    return isinstance(valor, (list, tuple, np.ndarray))
+
+
+def _achatar_coluna(valores: np.ndarray) -> Tuple[pd.api.extensions.ExtensionArray, np.ndarray]:
+    """Elementos concatenados e quantidade de elementos de cada linha
+
+    Colunas só de listas homogêneas passam pelo Arrow (concatenação em C, já
+    tipada); listas misturadas a escalares ou tipos mistos vão pelo caminho
+    Python, com escalares valendo como listas de um elemento.
+    """
+    try:
+        listas = pa.array(valores, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        listas = None
+    if listas is not None and pa.types.is_list(listas.type):
+        tamanhos = pc.list_value_length(listas).fill_null(0).to_numpy(zero_copy_only=False)
+        return listas.flatten().to_pandas().array, tamanhos.astype(np.int64, copy=False)
+
+    tamanhos = np.fromiter((len(v) if _e_lista(v) else 1 for v in valores),
+                           dtype=np.int64, count=len(valores))
+    # Escalares nulos (NaN/None) também contam como um elemento, como no explode
+    elementos = list(itertools.chain.from_iterable(v if _e_lista(v) else (v,) for v in valores))
+    return pd.array(np.array(elementos, dtype=object), dtype=object), tamanhos
+
+
+def achatar_listas(df: pd.DataFrame, colunas: List[str]) -> pd.DataFrame:
+    """Equivalente a `df.explode(colunas).reset_index(drop=True)` sem o explode do pandas
+
+    Os tamanhos das listas de cada linha são calculados uma vez por coluna e
+    comparados entre as colunas antes de qualquer cópia; cada coluna achatada
+    é montada com uma única concatenação e as demais são repetidas com
+    `np.repeat` das posições. Listas vazias ou ausentes viram uma linha com
+    valor ausente.
+    """
+    if not colunas:
+        return df
+    n = len(df)
+    with rastreador.etapa('achatar_listas', n) as etapa:
+        achatadas, tamanhos = {}, {}
+        for coluna in colunas:
+            achatadas[coluna], tamanhos[coluna] = _achatar_coluna(df[coluna].to_numpy(dtype=object))
+
+        # Listas vazias ocupam uma linha (com valor ausente) na saída
+        efetivos = {coluna: np.maximum(t, 1) for coluna, t in tamanhos.items()}
+        referencia = efetivos[colunas[0]]
+        divergentes = np.zeros(n, dtype=bool)
+        for coluna in colunas[1:]:
+            divergentes |= efetivos[coluna] != referencia
+        if divergentes.any():
+            linhas = np.flatnonzero(divergentes)
+            raise ErroTamanhoListas(pd.DataFrame({coluna: efetivos[coluna][linhas] for coluna in colunas},
+                                                 index=pd.Index(linhas, name='linha')))
+
+        total = int(referencia.sum())
+        repetidas = np.repeat(np.arange(n), referencia)
+        resultado = {}
+        for coluna in df.columns:
+            if coluna not in achatadas:
+                resultado[coluna] = df[coluna].array.take(repetidas)
+                continue
+            valores, tamanho = achatadas[coluna], tamanhos[coluna]
+            if len(valores) != total:
+                # Posição de cada elemento na saída; as lacunas (listas vazias) ficam ausentes
+                inicio_saida = np.cumsum(referencia) - referencia
+                inicio_entrada = np.cumsum(tamanho) - tamanho
+                destino = np.repeat(inicio_saida - inicio_entrada, tamanho) + np.arange(len(valores))
+                indices = np.full(total, -1, dtype=np.int64)
+                indices[destino] = np.arange(len(valores))
+                valores = valores.take(indices, allow_fill=True)
+            resultado[coluna] = valores
+        dados = pd.DataFrame(resultado, columns=df.columns)
+        etapa.linhas_saida = len(dados)
+    return dados
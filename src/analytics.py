@@ -1,29 +1,272 @@
+import heapq
+from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, List
+from typing import Any, Callable, Tuple, Dict, List, Optional
 from .models import RelatorioVendas, RelatorioAlugueis # Importe os modelos de relatório
+from .topk import maiores, menores
+from .particoes import ArmazemParticionado
+from .paralelo import AgregadosAtraso, agregar_atrasos_paralelo
+from .cubo_atrasos import CuboAtrasos
+from .sketch_quantis import SketchQuantis, SketchesPorChave
+from .instrumentacao import rastreador, rastrear
 
-class AnalisadorVendas:
+
+class _AnalisadorMemorizado(ABC):
+    """Base com memorização preguiçosa dos resultados intermediários
+
+    Cada intermediário é calculado uma única vez por versão dos dados. Atribuir
+    um novo DataFrame incrementa a versão e descarta o que foi memorizado; após
+    alterar o DataFrame no próprio lugar, chame `invalidar_cache()`.
+    """
+    
+    def __init__(self):
+        self.versao_dados = 0
+        self._memo: Dict[str, Any] = {}
+    
+    def invalidar_cache(self) -> None:
+        """Descarta os intermediários memorizados e avança a versão dos dados"""
+        self.versao_dados += 1
+        self._memo.clear()
+    
+    def _memorizar(self, nome: str, calcular: Callable[[], Any]) -> Any:
+        if nome not in self._memo:
+            with rastreador.etapa(f'{type(self).__name__}.{nome}', self._linhas()) as etapa:
+                self._memo[nome] = calcular()
+                etapa.linhas_saida = getattr(self._memo[nome], 'size', None)
+        return self._memo[nome]
+    
+    @abstractmethod
+    def _linhas(self) -> int:
+        """Quantidade de linhas dos dados analisados (para a instrumentação)"""
+    
+    @classmethod
+    def do_periodo(cls, armazem: ArmazemParticionado, inicio: Optional[pd.Timestamp] = None,
+                   fim: Optional[pd.Timestamp] = None, **opcoes):
+        """Cria um analisador só com os dados de [inicio, fim], lendo apenas as partições necessárias"""
+        return cls(armazem.ler(inicio, fim), **opcoes)
+
+
+class _SketchesIncrementais:
+    """Sketches de quantis por chave, atualizados lote a lote
+
+    Ficam numa tabela do histórico (a base) mais as contagens por bucket de
+    cada chave que recebeu lotes. Os percentis de poucas chaves combinam só
+    as linhas delas; a tabela completa só é refeita quando pedida.
+    """
+    
+    def __init__(self):
+        self._base: Optional[SketchesPorChave] = None
+        # {chave: {código do bucket: contagem}} dos valores chegados depois da base
+        self._buckets_lotes: Dict[Any, Dict[int, int]] = {}
+    
+    def atualizar(self, chaves: pd.Series, valores: pd.Series) -> None:
+        if self._base is None:
+            # Primeira chamada (o histórico): monta a tabela base de uma vez
+            self._base = SketchesPorChave.de_valores(chaves, valores)
+        elif len(chaves):
+            por_chave = SketchesPorChave.de_valores(chaves, valores)
+            for chave, codigo, contagem in zip(por_chave.chaves[por_chave.codigo_chave],
+                                               por_chave.codigos.tolist(), por_chave.contagens.tolist()):
+                buckets = self._buckets_lotes.setdefault(chave, {})
+                buckets[codigo] = buckets.get(codigo, 0) + contagem
+    
+    @property
+    def tabela(self) -> SketchesPorChave:
+        """Tabela completa (incorpora à base os lotes pendentes)"""
+        if self._buckets_lotes:
+            self._base = SketchesPorChave.combinar_todos([self._base, self._tabela_lotes(self._buckets_lotes)])
+            self._buckets_lotes = {}
+        return self._base
+    
+    def percentis(self, chaves: List[Any]) -> Dict[Any, Dict[str, float]]:
+        """Percentis das chaves pedidas, combinando só as linhas delas"""
+        tabelas = [self._base.selecionar(chaves)]
+        pendentes = [chave for chave in chaves if chave in self._buckets_lotes]
+        if pendentes:
+            tabelas.append(self._tabela_lotes({chave: self._buckets_lotes[chave] for chave in pendentes}))
+        return SketchesPorChave.combinar_todos(tabelas).percentis(chaves)
+    
+    @staticmethod
+    def _tabela_lotes(buckets: Dict[Any, Dict[int, int]]) -> SketchesPorChave:
+        tamanhos = [len(contagens) for contagens in buckets.values()]
+        return SketchesPorChave.de_contagens(
+            pd.Index(list(buckets), dtype=object), np.repeat(np.arange(len(buckets)), tamanhos),
+            np.fromiter((c for contagens in buckets.values() for c in contagens), np.int64, sum(tamanhos)),
+            np.fromiter((n for contagens in buckets.values() for n in contagens.values()), np.int64,
+                        sum(tamanhos)))
+
+
+class _TotaisIncrementais:
+    """Agregados correntes de vendas, atualizados lote a lote
+
+    Mantém o total por cliente, a soma e a contagem globais, o período das
+    vendas, os `tamanho_top` maiores clientes e sketches de quantis dos
+    valores de compra (global e por cliente). Como compras só aumentam os
+    totais, o novo top sai do top anterior somado aos clientes do lote, e
+    cada atualização custa O(tamanho do lote).
+    """
+    
+    def __init__(self, tamanho_top: int):
+        self.tamanho_top = tamanho_top
+        self.totais: Dict[str, float] = {}
+        # Posição de cada cliente na ordem em que apareceu: desempata o top como no recálculo
+        self._ordem: Dict[str, int] = {}
+        self.soma = 0.0
+        self.quantidade_vendas = 0
+        self.data_inicio: Optional[pd.Timestamp] = None
+        self.data_fim: Optional[pd.Timestamp] = None
+        self.top: List[Tuple[str, float]] = []
+        self.sketch = SketchQuantis()
+        self.sketches_clientes = _SketchesIncrementais()
+    
+    def atualizar(self, lote: pd.DataFrame) -> None:
+        self.sketches_clientes.atualizar(lote['Cliente'], lote['Valor da compra'])
+        if lote.empty:
+            return
+        parciais = lote.groupby('Cliente', observed=True)['Valor da compra'].sum()
+        for cliente, valor in parciais.items():
+            if cliente not in self.totais:
+                self._ordem[cliente] = len(self._ordem)
+            self.totais[cliente] = self.totais.get(cliente, 0.0) + valor
+        self.soma += parciais.sum()
+        self.quantidade_vendas += len(lote)
+        self.sketch.adicionar(lote['Valor da compra'])
+        
+        inicio, fim = lote['Data de venda'].min(), lote['Data de venda'].max()
+        if pd.notna(inicio) and (self.data_inicio is None or inicio < self.data_inicio):
+            self.data_inicio = inicio
+        if pd.notna(fim) and (self.data_fim is None or fim > self.data_fim):
+            self.data_fim = fim
+        
+        if (parciais >= 0).all():
+            # nlargest mantém a ordem de entrada nos empates: candidatos na ordem de chegada
+            candidatos = sorted({cliente for cliente, _ in self.top}.union(parciais.index),
+                                key=self._ordem.__getitem__)
+            itens = ((cliente, self.totais[cliente]) for cliente in candidatos)
+        else:
+            # Estornos podem derrubar alguém do top: refaz a seleção completa
+            itens = self.totais.items()
+        self.top = heapq.nlargest(self.tamanho_top, itens, key=lambda item: item[1])
+
+
+class AnalisadorVendas(_AnalisadorMemorizado):
     """Analisador de dados de vendas com Pydantic"""
     
-    def __init__(self, dados_vendas: pd.DataFrame):
+    def __init__(self, dados_vendas: pd.DataFrame, tamanho_top: int = 5):
+        super().__init__()
+        self.tamanho_top = max(tamanho_top, 5)
         self.dados_vendas = dados_vendas
     
-    def calcular_total_por_cliente(self) -> pd.Series:
-        """Calcula total de compras por cliente"""
-        return (self.dados_vendas
-                .groupby('Cliente')['Valor da compra']
-                .sum()
-                .sort_values(ascending=False))
+    @property
+    def dados_vendas(self) -> pd.DataFrame:
+        # Lotes recebidos incrementalmente só são concatenados quando alguém lê o DataFrame
+        if self._lotes_pendentes:
+            self._dados_vendas = pd.concat([self._dados_vendas, *self._lotes_pendentes],
+                                           ignore_index=True)
+            self._lotes_pendentes = []
+        return self._dados_vendas
+    
+    @dados_vendas.setter
+    def dados_vendas(self, dados: pd.DataFrame) -> None:
+        self._dados_vendas = dados
+        self._lotes_pendentes: List[pd.DataFrame] = []
+        self._incremental: Optional[_TotaisIncrementais] = None
+        self.invalidar_cache()
+    
+    def _linhas(self) -> int:
+        return len(self._dados_vendas) + sum(len(lote) for lote in self._lotes_pendentes)
+    
+    @rastrear('AnalisadorVendas.adicionar_vendas')
+    def adicionar_vendas(self, lote: pd.DataFrame) -> None:
+        """Acrescenta um lote de vendas atualizando os agregados em O(tamanho do lote)
+
+        Na primeira chamada os agregados correntes são montados a partir do
+        histórico; a partir daí `gerar_relatorio` passa a usá-los diretamente.
+        """
+        if self._incremental is None:
+            self._incremental = _TotaisIncrementais(self.tamanho_top)
+            self._incremental.atualizar(self.dados_vendas)
+        self._incremental.atualizar(lote)
+        self._lotes_pendentes.append(lote)
+        self.invalidar_cache()
+    
+    def _total_por_cliente(self) -> pd.Series:
+        # Sem ordenar: os relatórios só precisam do top-k, obtido por seleção parcial
+        return self._memorizar('total_por_cliente', lambda: (
+            self.dados_vendas
+            .groupby('Cliente', observed=True, sort=False)['Valor da compra']
+            .sum()))
+    
+    def _periodo_vendas(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        return self._memorizar('periodo_vendas', lambda: (
+            self.dados_vendas['Data de venda'].min(),
+            self.dados_vendas['Data de venda'].max()))
+    
+    def calcular_vendas_por_dia(self) -> pd.DataFrame:
+        """Total vendido por dia, no formato de IndiceVendas.vendas_por_dia"""
+        return self._memorizar('vendas_por_dia', lambda: (
+            self.dados_vendas
+            .groupby(self.dados_vendas['Data de venda'].dt.normalize())['Valor da compra']
+            .sum()
+            .reset_index()))
+    
+    def obter_sketch_valores(self) -> SketchQuantis:
+        """Sketch de quantis dos valores de compra (mantido lote a lote no modo incremental)"""
+        if self._incremental is not None:
+            return self._incremental.sketch
+        return self._memorizar('sketch_valores', lambda: (
+            SketchQuantis.de_valores(self.dados_vendas['Valor da compra'])))
+    
+    def obter_sketches_por_cliente(self) -> SketchesPorChave:
+        """Sketches de quantis dos valores de compra de cada cliente"""
+        if self._incremental is not None:
+            return self._incremental.sketches_clientes.tabela
+        return self._memorizar('sketches_por_cliente', lambda: SketchesPorChave.de_valores(
+            self.dados_vendas['Cliente'], self.dados_vendas['Valor da compra']))
+    
+    def calcular_percentis_por_cliente(self, clientes: Optional[List[str]] = None) -> pd.DataFrame:
+        """Percentis aproximados (p50, p90, p99) do valor de compra por cliente, com a contagem"""
+        return self.obter_sketches_por_cliente().quantis(chaves=clientes)
+    
+    def _percentis_clientes(self, clientes: List[str]) -> Dict[str, Dict[str, float]]:
+        if self._incremental is not None:
+            return self._incremental.sketches_clientes.percentis(clientes)
+        if 'sketches_por_cliente' in self._memo:
+            return self.obter_sketches_por_cliente().percentis(clientes)
+        # Só as compras dos clientes pedidos, sem montar os sketches de todos
+        dados = self.dados_vendas
+        linhas = dados['Cliente'].isin(clientes)
+        return SketchesPorChave.de_valores(dados.loc[linhas, 'Cliente'],
+                                           dados.loc[linhas, 'Valor da compra']).percentis(clientes)
+    
+    def calcular_total_por_cliente(self, top_n: Optional[int] = None) -> pd.Series:
+        """Calcula total de compras por cliente, em ordem decrescente
+
+        Com `top_n`, devolve só os maiores clientes usando seleção parcial.
+        """
+        if top_n is not None:
+            return maiores(self._total_por_cliente(), top_n)
+        return self._total_por_cliente().sort_values(ascending=False)
     
     def identificar_cliente_vencedor(self) -> Tuple[str, float]:
         """Identifica cliente com maior compra"""
-        total_compras = self.calcular_total_por_cliente()
-        return total_compras.index[0], total_compras.iloc[0]
+        if self._incremental is not None:
+            return self._incremental.top[0]
+        vencedor = maiores(self._total_por_cliente(), 1)
+        return vencedor.index[0], vencedor.iloc[0]
     
+    @rastrear('AnalisadorVendas.gerar_relatorio')
     def gerar_relatorio(self) -> RelatorioVendas:
         """Gera relatório estruturado com Pydantic"""
-        total_compras = self.calcular_total_por_cliente()
+        if self._incremental is not None:
+            return self._gerar_relatorio_incremental()
+        
+        total_compras = self._total_por_cliente()
         cliente_vencedor, valor_vencedor = self.identificar_cliente_vencedor()
+        data_inicio, data_fim = self._periodo_vendas()
+        top_5 = maiores(total_compras, 5)
+        sketch = self.obter_sketch_valores()
         
         return RelatorioVendas(
             cliente_vencedor=cliente_vencedor,
@@ -31,58 +274,240 @@ class AnalisadorVendas:
             total_clientes=len(total_compras),
             valor_total_evento=total_compras.sum(),
             valor_medio_por_cliente=total_compras.mean(),
-            duracao_evento_dias=(self.dados_vendas['Data de venda'].max() - 
-                               self.dados_vendas['Data de venda'].min()).days + 1,
-            top_5_clientes=total_compras.head(5).to_dict(),
-            data_inicio=self.dados_vendas['Data de venda'].min(),
-            data_fim=self.dados_vendas['Data de venda'].max()
+            duracao_evento_dias=(data_fim - data_inicio).days + 1,
+            top_5_clientes=top_5.to_dict(),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            percentis_valor_compra=sketch.percentis(),
+            histograma_valor_compra=sketch.histograma(),
+            percentis_top_clientes=self._percentis_clientes(top_5.index.tolist()),
+            alfa_percentis=sketch.alfa
         )
+    
+    def _gerar_relatorio_incremental(self) -> RelatorioVendas:
+        """Monta o relatório a partir dos agregados correntes, sem reler o histórico"""
+        estado = self._incremental
+        cliente_vencedor, valor_vencedor = estado.top[0]
+        
+        return RelatorioVendas(
+            cliente_vencedor=cliente_vencedor,
+            valor_vencedor=valor_vencedor,
+            total_clientes=len(estado.totais),
+            valor_total_evento=estado.soma,
+            valor_medio_por_cliente=estado.soma / len(estado.totais),
+            duracao_evento_dias=(estado.data_fim - estado.data_inicio).days + 1,
+            top_5_clientes=dict(estado.top[:5]),
+            data_inicio=estado.data_inicio,
+            data_fim=estado.data_fim,
+            percentis_valor_compra=estado.sketch.percentis(),
+            histograma_valor_compra=estado.sketch.histograma(),
+            percentis_top_clientes=self._percentis_clientes([cliente for cliente, _ in estado.top[:5]]),
+            alfa_percentis=estado.sketch.alfa
+        )
+
 
+class _AtrasosIncrementais:
+    """Agregados correntes de atraso, atualizados lote a lote
 
-class AnalisadorAluguel:
+    Mantém soma e contagem dos atrasos de cada apartamento (na ordem em que
+    os apartamentos aparecem, como no groupby sem ordenar) e os sketches de
+    quantis dos atrasos, global e por apartamento. Cada atualização custa
+    O(tamanho do lote).
+    """
+    
+    def __init__(self):
+        self.somas: Dict[Any, float] = {}
+        self.contagens: Dict[Any, int] = {}
+        self.sketch = SketchQuantis()
+        self.sketches_apartamentos = _SketchesIncrementais()
+    
+    def atualizar(self, lote: pd.DataFrame, atrasos: pd.Series) -> None:
+        self.sketches_apartamentos.atualizar(lote['apartamento'], atrasos)
+        if lote.empty:
+            return
+        parciais = atrasos.groupby(lote['apartamento'], observed=True, sort=False).agg(['sum', 'count'])
+        for apartamento, soma, contagem in parciais.itertuples():
+            self.somas[apartamento] = self.somas.get(apartamento, 0.0) + soma
+            self.contagens[apartamento] = self.contagens.get(apartamento, 0) + contagem
+        self.sketch.adicionar(atrasos)
+    
+    def media_por_apartamento(self) -> pd.Series:
+        somas = pd.Series(self.somas, dtype=float)
+        media = somas / pd.Series(self.contagens, dtype=float)
+        return media.rename('atraso').rename_axis('apartamento')
+    
+    def media_geral(self) -> float:
+        contagem = sum(self.contagens.values())
+        return sum(self.somas.values()) / contagem if contagem else float('nan')
+
+
+def faixas_pontualidade(media_atraso: pd.Series) -> Dict[str, pd.Series]:
+    """Máscara de cada faixa de pontualidade sobre o atraso médio (dias) por apartamento"""
+    return {
+        'pontuais': media_atraso <= 0,
+        'atraso_leve': (media_atraso > 0) & (media_atraso <= 5),
+        'atraso_moderado': (media_atraso > 5) & (media_atraso <= 15),
+        'atraso_severo': media_atraso > 15
+    }
+
+
+class AnalisadorAluguel(_AnalisadorMemorizado):
     """Analisador de dados de aluguel com Pydantic"""
     
-    def __init__(self, dados_locacao: pd.DataFrame):
+    def __init__(self, dados_locacao: pd.DataFrame, processos: Optional[int] = None,
+                 cubo: Optional[CuboAtrasos] = None):
+        super().__init__()
+        # Com `processos`, as agregações por apartamento rodam em um pool de processos
+        self.processos = processos
         self.dados_locacao = dados_locacao
+        # Cubo já montado na carga (deve corresponder a `dados_locacao`)
+        self._cubo = cubo
+    
+    @property
+    def dados_locacao(self) -> pd.DataFrame:
+        # Lotes recebidos incrementalmente só são concatenados quando alguém lê o DataFrame
+        if self._lotes_pendentes:
+            self._dados_locacao = pd.concat([self._dados_locacao, *self._lotes_pendentes],
+                                            ignore_index=True)
+            self._lotes_pendentes = []
+        return self._dados_locacao
+    
+    @dados_locacao.setter
+    def dados_locacao(self, dados: pd.DataFrame) -> None:
+        self._dados_locacao = dados
+        self._lotes_pendentes: List[pd.DataFrame] = []
+        self._incremental: Optional[_AtrasosIncrementais] = None
+        self._cubo: Optional[CuboAtrasos] = None
+        self.invalidar_cache()
+    
+    @rastrear('AnalisadorAluguel.adicionar_pagamentos')
+    def adicionar_pagamentos(self, lote: pd.DataFrame) -> None:
+        """Acrescenta um lote de pagamentos atualizando os agregados em O(tamanho do lote)
+
+        Na primeira chamada os agregados correntes são montados a partir do
+        histórico; a partir daí `gerar_relatorio` passa a usá-los diretamente.
+        O cubo de atrasos, se já montado, também é atualizado só com o lote.
+        """
+        if self._incremental is None:
+            self._incremental = _AtrasosIncrementais()
+            self._incremental.atualizar(self.dados_locacao, self.obter_atrasos())
+        atrasos = self._calcular_atrasos(lote)
+        self._incremental.atualizar(lote, atrasos)
+        if self._cubo is not None:
+            self._cubo.adicionar(lote, atrasos)
+        self._lotes_pendentes.append(lote)
+        self.invalidar_cache()
+    
+    def obter_cubo(self) -> CuboAtrasos:
+        """Cubo mês × apartamento com os agregados de atraso, montado uma única vez"""
+        if self._cubo is None:
+            self._cubo = CuboAtrasos.de_dados(self.dados_locacao, self.obter_atrasos())
+        return self._cubo
+    
+    def _linhas(self) -> int:
+        return len(self._dados_locacao) + sum(len(lote) for lote in self._lotes_pendentes)
+    
+    @staticmethod
+    def _calcular_atrasos(dados: pd.DataFrame) -> pd.Series:
+        return (dados['datas_de_pagamento'] - dados['datas_combinadas_pagamento']).dt.days.rename('atraso')
+    
+    def obter_atrasos(self) -> pd.Series:
+        """Vetor de atrasos em dias, alinhado ao índice dos dados de locação"""
+        return self._memorizar('atrasos', lambda: self._calcular_atrasos(self.dados_locacao))
+    
+    def obter_agregados_paralelos(self) -> AgregadosAtraso:
+        """Soma, contagem, mín., máx. e faixas de atraso por apartamento, calculados em paralelo"""
+        return self._memorizar('agregados_paralelos', lambda: (
+            agregar_atrasos_paralelo(self.dados_locacao, self.processos or 1)))
+    
+    def obter_sketch_atrasos(self) -> SketchQuantis:
+        """Sketch de quantis dos atrasos (no modo paralelo, combinado a partir dos shards)"""
+        if self._incremental is not None:
+            return self._incremental.sketch
+        if self.processos:
+            return self.obter_agregados_paralelos().sketch
+        return self._memorizar('sketch_atrasos', lambda: SketchQuantis.de_valores(self.obter_atrasos()))
+    
+    def obter_sketches_por_apartamento(self) -> SketchesPorChave:
+        """Sketches de quantis dos atrasos de cada apartamento (no modo paralelo, montados nos shards)"""
+        if self._incremental is not None:
+            return self._incremental.sketches_apartamentos.tabela
+        if self.processos:
+            return self.obter_agregados_paralelos().sketches
+        return self._memorizar('sketches_por_apartamento', lambda: SketchesPorChave.de_valores(
+            self.dados_locacao['apartamento'], self.obter_atrasos()))
+    
+    def calcular_percentis_por_apartamento(self, apartamentos: Optional[List[str]] = None) -> pd.DataFrame:
+        """Percentis aproximados (p50, p90, p99) do atraso por apartamento, com a contagem"""
+        return self.obter_sketches_por_apartamento().quantis(chaves=apartamentos)
+    
+    def _percentis_apartamentos(self, apartamentos: List[str]) -> Dict[str, Dict[str, float]]:
+        if self._incremental is not None:
+            return self._incremental.sketches_apartamentos.percentis(apartamentos)
+        if self.processos or 'sketches_por_apartamento' in self._memo:
+            return self.obter_sketches_por_apartamento().percentis(apartamentos)
+        linhas = self.dados_locacao['apartamento'].isin(apartamentos)
+        return SketchesPorChave.de_valores(self.dados_locacao.loc[linhas, 'apartamento'],
+                                           self.obter_atrasos()[linhas]).percentis(apartamentos)
+    
+    def _media_por_apartamento(self) -> pd.Series:
+        if self._incremental is not None:
+            return self._memorizar('media_por_apartamento', self._incremental.media_por_apartamento)
+        if self.processos:
+            return self._memorizar('media_por_apartamento', lambda: (
+                self.obter_agregados_paralelos().media_por_apartamento()))
+        # Sem ordenar: ranking e extremos saem por seleção parcial
+        return self._memorizar('media_por_apartamento', lambda: (
+            self.obter_atrasos()
+            .groupby(self.dados_locacao['apartamento'], observed=True, sort=False)
+            .mean()))
+    
+    def _media_geral(self) -> float:
+        if self._incremental is not None:
+            return self._incremental.media_geral()
+        if self.processos:
+            return self.obter_agregados_paralelos().media_geral()
+        return self.obter_atrasos().mean()
     
     def calcular_atrasos(self) -> pd.DataFrame:
         """Calcula atrasos nos pagamentos"""
-        df_copy = self.dados_locacao.copy()
-        df_copy['atraso'] = (df_copy['datas_de_pagamento'] - 
-                            df_copy['datas_combinadas_pagamento']).dt.days
-        return df_copy
-    
-    def calcular_media_atraso_por_apartamento(self) -> pd.Series:
-        """Calcula média de atraso por apartamento"""
-        dados_com_atraso = self.calcular_atrasos()
-        return (dados_com_atraso
-                .groupby('apartamento')['atraso']
-                .mean()
-                .sort_values(ascending=False))
+        return self.dados_locacao.assign(atraso=self.obter_atrasos())
+    
+    def calcular_media_atraso_por_apartamento(self, top_n: Optional[int] = None) -> pd.Series:
+        """Calcula média de atraso por apartamento, em ordem decrescente
+
+        Com `top_n`, devolve só os mais atrasados usando seleção parcial.
+        """
+        if top_n is not None:
+            return maiores(self._media_por_apartamento(), top_n)
+        return self._media_por_apartamento().sort_values(ascending=False)
     
     def classificar_apartamentos(self) -> Dict[str, List[str]]:
         """Classifica apartamentos por pontualidade"""
         media_atraso = self.calcular_media_atraso_por_apartamento()
-        
-        return {
-            'pontuais': media_atraso[media_atraso <= 0].index.tolist(),
-            'atraso_leve': media_atraso[(media_atraso > 0) & (media_atraso <= 5)].index.tolist(),
-            'atraso_moderado': media_atraso[(media_atraso > 5) & (media_atraso <= 15)].index.tolist(),
-            'atraso_severo': media_atraso[media_atraso > 15].index.tolist()
-        }
+        return {faixa: media_atraso[mascara].index.tolist()
+                for faixa, mascara in faixas_pontualidade(media_atraso).items()}
     
+    @rastrear('AnalisadorAluguel.gerar_relatorio')
     def gerar_relatorio(self) -> RelatorioAlugueis:
         """Gera relatório estruturado com Pydantic"""
-        media_atraso = self.calcular_media_atraso_por_apartamento()
-        distribuicao = self.classificar_apartamentos()
+        media_atraso = self._media_por_apartamento()
+        ranking = maiores(media_atraso, 10)
+        mais_pontual = menores(media_atraso, 1)
+        sketch = self.obter_sketch_atrasos()
         
         return RelatorioAlugueis(
-            apartamento_mais_atrasado=media_atraso.index[0],
-            atraso_maximo_medio=media_atraso.iloc[0],
-            apartamento_mais_pontual=media_atraso.index[-1],
-            atraso_minimo_medio=media_atraso.iloc[-1],
+            apartamento_mais_atrasado=ranking.index[0],
+            atraso_maximo_medio=ranking.iloc[0],
+            apartamento_mais_pontual=mais_pontual.index[0],
+            atraso_minimo_medio=mais_pontual.iloc[0],
             total_apartamentos=len(media_atraso),
-            atraso_medio_geral=self.calcular_atrasos()['atraso'].mean(),
-            distribuicao_pontualidade={k: len(v) for k, v in distribuicao.items()},
-            ranking_atrasos=media_atraso.head(10).to_dict()
+            atraso_medio_geral=self._media_geral(),
+            distribuicao_pontualidade={faixa: int(mascara.sum()) for faixa, mascara
+                                       in faixas_pontualidade(media_atraso).items()},
+            ranking_atrasos=ranking.to_dict(),
+            percentis_atraso=sketch.percentis(),
+            histograma_atraso=sketch.histograma(),
+            percentis_ranking=self._percentis_apartamentos(ranking.index.tolist()),
+            alfa_percentis=sketch.alfa
         )
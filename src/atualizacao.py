@@ -0,0 +1,125 @@
+# src/atualizacao.py
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+
+class Instantaneo(NamedTuple):
+    """Versão dos dados em uso: trocada inteira, nunca alterada no lugar"""
+    versao: int
+    valor: Any
+    # Relógio do atualizador na última verificação bem-sucedida da fonte
+    verificado_em: float
+
+
+class AtualizadorDados:
+    """Mantém o último resultado de uma carga e o renova em segundo plano (stale-while-revalidate)
+
+    `atualizar(anterior)` recebe o valor em uso (None na primeira carga) e
+    devolve o novo valor, ou None se a fonte não mudou. Só a primeira
+    chamada de `obter` espera pela carga; depois dela, `obter` devolve na
+    hora o instantâneo atual e, se a última verificação tiver mais de
+    `intervalo` segundos, dispara uma renovação em outra thread. O novo
+    instantâneo substitui o anterior numa única atribuição: quem já o leu
+    continua com a versão antiga, consistente, até terminar. Falhas na
+    renovação mantêm os dados antigos e ficam em `ultimo_erro`; a próxima
+    tentativa espera outro `intervalo`. A renovação roda no contexto de quem
+    a disparou, então as etapas da carga entram na coleta do `rastreador`
+    daquela sessão.
+    """
+
+    def __init__(self, atualizar: Callable[[Optional[Any]], Optional[Any]], intervalo: float = 300,
+                 relogio: Callable[[], float] = time.monotonic):
+        self.intervalo = intervalo
+        self.ultimo_erro: Optional[BaseException] = None
+        self.verificacoes = 0
+        self.trocas = 0
+        self._atualizar = atualizar
+        self._relogio = relogio
+        self._atual: Optional[Instantaneo] = None
+        self._proxima_verificacao = 0.0
+        self._trava = threading.Lock()
+        self._renovacao: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._periodica: Optional[threading.Thread] = None
+
+    @property
+    def atual(self) -> Optional[Instantaneo]:
+        return self._atual
+
+    def obter(self) -> Instantaneo:
+        """Instantâneo em uso, sem esperar por renovações (exceto a primeira carga)"""
+        atual = self._atual
+        if atual is None:
+            self.renovar(esperar=True)
+            atual = self._atual
+            if atual is None:
+                raise RuntimeError(f'Falha na primeira carga dos dados: {self.ultimo_erro}') from self.ultimo_erro
+            return atual
+        if self._relogio() >= self._proxima_verificacao:
+            self.renovar()
+        return atual
+
+    def renovar(self, esperar: bool = False) -> None:
+        """Verifica a fonte em segundo plano; chamadas durante uma renovação se juntam a ela"""
+        with self._trava:
+            if self._renovacao is None or not self._renovacao.is_alive():
+                self._renovacao = threading.Thread(target=contextvars.copy_context().run, args=(self._renovar,),
+                                                   name='atualizador-dados', daemon=True)
+                self._renovacao.start()
+            renovacao = self._renovacao
+        if esperar:
+            renovacao.join()
+
+    def _renovar(self) -> None:
+        anterior = self._atual
+        try:
+            novo = self._atualizar(None if anterior is None else anterior.valor)
+        except Exception as e:
+            self.ultimo_erro = e
+        else:
+            self.ultimo_erro = None
+            agora = self._relogio()
+            if anterior is not None and novo is None:
+                self._atual = anterior._replace(verificado_em=agora)
+            elif novo is not None:
+                self._atual = Instantaneo(0 if anterior is None else anterior.versao + 1, novo, agora)
+                self.trocas += 1
+        finally:
+            self.verificacoes += 1
+            self._proxima_verificacao = self._relogio() + self.intervalo
+
+    def iniciar(self) -> None:
+        """Renova a cada `intervalo` segundos mesmo sem ninguém chamar `obter`"""
+        with self._trava:
+            if self._periodica is not None:
+                return
+            self._parar.clear()
+            self._periodica = threading.Thread(target=self._renovar_periodicamente,
+                                               name='atualizador-dados-periodico', daemon=True)
+            self._periodica.start()
+
+    def _renovar_periodicamente(self) -> None:
+        while not self._parar.wait(max(0.0, self._proxima_verificacao - self._relogio())):
+            if self._relogio() >= self._proxima_verificacao:
+                self.renovar(esperar=True)
+
+    def parar(self) -> None:
+        self._parar.set()
+        with self._trava:
+            periodica, self._periodica = self._periodica, None
+        if periodica is not None:
+            periodica.join()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores para monitoramento"""
+        atual = self._atual
+        return {
+            'versao': None if atual is None else atual.versao,
+            'idade_s': None if atual is None else round(self._relogio() - atual.verificado_em, 3),
+            'verificacoes': self.verificacoes,
+            'trocas': self.trocas,
+            'ultimo_erro': None if self.ultimo_erro is None else str(self.ultimo_erro),
+        }
@@ -0,0 +1,123 @@
+# src/cache_dados.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+LIMITE_PADRAO = 512 * 2**20
+_PANDAS_3 = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _copy_on_write() -> bool:
+    """Copy-on-Write é o padrão no pandas 3; no 2.x depende de `mode.copy_on_write`"""
+    if _PANDAS_3:
+        return True
+    return pd.get_option('mode.copy_on_write') is True
+
+
+def habilitar_copy_on_write() -> None:
+    """Liga o Copy-on-Write no pandas 2.x (no 3 ele já é o único modo)
+
+    Opcional e explícito: a opção vale para o processo inteiro e muda a
+    semântica de atribuições encadeadas de todo código que usa pandas. Com
+    ela ligada os acertos do cache deixam de custar uma cópia profunda.
+    """
+    if not _copy_on_write():
+        pd.set_option('mode.copy_on_write', True)
+
+
+class CacheDados:
+    """Cache LRU de DataFrames compartilhado pelo processo, limitado em bytes
+
+    Cada quadro é guardado uma única vez e o tamanho real (memory_usage com
+    deep=True) conta para o orçamento `limite_bytes`; ao ultrapassá-lo os
+    menos usados recentemente são removidos. Acertos devolvem cópias rasas:
+    com Copy-on-Write elas compartilham os buffers e qualquer alteração do
+    chamador copia só a coluna alterada, sem tocar na versão em cache. No
+    pandas 2 sem Copy-on-Write (ver `habilitar_copy_on_write`) os acertos
+    são cópias profundas, para que uma alteração no lugar não alcance o
+    quadro guardado.
+    """
+
+    def __init__(self, limite_bytes: int = LIMITE_PADRAO):
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+        self.bytes_usados = 0
+        self._itens: 'OrderedDict[str, Tuple[pd.DataFrame, int]]' = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _entregar(dados: pd.DataFrame) -> pd.DataFrame:
+        return dados.copy(deep=not _copy_on_write())
+
+    def obter(self, chave: str) -> Optional[pd.DataFrame]:
+        """Cópia do quadro guardado em `chave` (rasa com Copy-on-Write) ou None"""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+        return self._entregar(item[0])
+
+    def guardar(self, chave: str, dados: pd.DataFrame) -> pd.DataFrame:
+        """Guarda o quadro e devolve a cópia que o chamador deve usar
+
+        Quadros maiores que o orçamento inteiro não são guardados.
+        """
+        tamanho = int(dados.memory_usage(index=True, deep=True).sum())
+        with self._trava:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+            if tamanho <= self.limite_bytes:
+                self._itens[chave] = (dados, tamanho)
+                self.bytes_usados += tamanho
+                self._liberar()
+        return self._entregar(dados)
+
+    def _liberar(self) -> None:
+        """Remove os menos usados até caber no orçamento (chamar com a trava)"""
+        while self.bytes_usados > self.limite_bytes and self._itens:
+            _, (_, tamanho) = self._itens.popitem(last=False)
+            self.bytes_usados -= tamanho
+            self.remocoes += 1
+
+    def definir_limite(self, limite_bytes: int) -> None:
+        with self._trava:
+            self.limite_bytes = limite_bytes
+            self._liberar()
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+            self.bytes_usados = 0
+
+    def __contains__(self, chave: str) -> bool:
+        with self._trava:
+            return chave in self._itens
+
+    def __len__(self) -> int:
+        with self._trava:
+            return len(self._itens)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Contadores para monitoramento"""
+        with self._trava:
+            return {
+                'itens': len(self._itens),
+                'bytes_usados': self.bytes_usados,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+                'remocoes': self.remocoes,
+            }
+
+
+# Instância compartilhada por todos os DataLoaders do processo
+cache_dados = CacheDados()
@@ -0,0 +1,103 @@
+# src/cache_figuras.py
+
+import contextvars
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, TYPE_CHECKING
+
+import pandas as pd
+from pydantic import BaseModel
+
+from .instrumentacao import rastreador
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+class CacheFiguras:
+    """Cache LRU de figuras já renderizadas em bytes (PNG ou SVG)
+
+    As figuras são identificadas por uma chave derivada do conteúdo do
+    relatório, dos dados usados no gráfico e dos parâmetros do plot. Em um
+    acerto os bytes são devolvidos sem nenhum trabalho do matplotlib; em uma
+    falta a figura é renderizada pelo backend Agg em um pool de threads e
+    fechada logo em seguida. Pedidos simultâneos da mesma chave compartilham
+    a mesma renderização.
+    """
+
+    def __init__(self, capacidade: int = 64, max_workers: int = 2,
+                 formato: str = 'png', dpi: int = 100):
+        self.capacidade = capacidade
+        self.formato = formato
+        self.dpi = dpi
+        self.acertos = 0
+        self.faltas = 0
+        self._itens: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._em_andamento: Dict[str, Future] = {}
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='render-figuras')
+
+    @staticmethod
+    def chave(*partes: Any) -> str:
+        """Gera a chave de cache a partir de relatórios, dados e parâmetros"""
+        resumo = hashlib.sha256()
+        for parte in partes:
+            if isinstance(parte, BaseModel):
+                resumo.update(parte.model_dump_json().encode('utf-8'))
+            elif isinstance(parte, (pd.DataFrame, pd.Series)):
+                resumo.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+            else:
+                resumo.update(repr(parte).encode('utf-8'))
+            resumo.update(b'\x00')
+        return resumo.hexdigest()
+
+    def obter(self, chave: str, gerar: Callable[[], 'Figure']) -> 'Future[bytes]':
+        """Devolve um Future com os bytes da figura, renderizando-a só se necessário"""
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                futuro: Future = Future()
+                futuro.set_result(self._itens[chave])
+                return futuro
+            if chave in self._em_andamento:
+                return self._em_andamento[chave]
+            self.faltas += 1
+            # A renderização herda o contexto de quem pediu (e a coleta de etapas dele)
+            futuro = self._executor.submit(contextvars.copy_context().run, self._renderizar, chave, gerar)
+            self._em_andamento[chave] = futuro
+            return futuro
+
+    def _renderizar(self, chave: str, gerar: Callable[[], 'Figure']) -> bytes:
+        try:
+            with rastreador.etapa('CacheFiguras.renderizar'):
+                figura = gerar()
+                buffer = io.BytesIO()
+                figura.savefig(buffer, format=self.formato, dpi=self.dpi)
+                figura.clear()
+                conteudo = buffer.getvalue()
+        except Exception:
+            with self._trava:
+                self._em_andamento.pop(chave, None)
+            raise
+
+        with self._trava:
+            self._em_andamento.pop(chave, None)
+            self._itens[chave] = conteudo
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return conteudo
+
+    def limpar(self) -> None:
+        """Descarta todas as figuras armazenadas"""
+        with self._trava:
+            self._itens.clear()
+
+
+# Instância compartilhada pelo dashboard (sobrevive entre reruns do Streamlit)
+cache_figuras = CacheFiguras()
@@ -0,0 +1,62 @@
+# src/cliente_relatorios.py
+
+import threading
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+
+from .models import RelatorioVendas, RelatorioAlugueis
+
+if TYPE_CHECKING:
+    import requests
+
+_MODELOS = {'vendas': RelatorioVendas, 'locacao': RelatorioAlugueis}
+
+
+class ClienteRelatorios:
+    """Cliente do `servidor_relatorios`: relatórios e gráficos sem carregar dados localmente"""
+
+    def __init__(self, url_base: str, timeout: float = 120):
+        self.url_base = url_base.rstrip('/')
+        # A primeira consulta pode esperar a carga completa dos dados no serviço
+        self.timeout = timeout
+        self._sessao = None
+        self._trava_sessao = threading.Lock()
+        self._tipos: Optional[Dict[str, str]] = None
+
+    @property
+    def sessao(self) -> 'requests.Session':
+        """Sessão HTTP (keep-alive), criada no primeiro acesso"""
+        if self._sessao is None:
+            with self._trava_sessao:
+                if self._sessao is None:
+                    import requests
+                    self._sessao = requests.Session()
+        return self._sessao
+
+    def _get(self, caminho: str) -> 'requests.Response':
+        resposta = self.sessao.get(f'{self.url_base}{caminho}', timeout=self.timeout)
+        if not resposta.ok:
+            try:
+                detalhe = resposta.json().get('erro', resposta.text)
+            except ValueError:
+                detalhe = resposta.text
+            raise RuntimeError(f'Serviço de relatórios respondeu {resposta.status_code}: {detalhe}')
+        return resposta
+
+    def conjuntos(self) -> List[dict]:
+        """Conjuntos servidos: nome, tipo ('vendas' ou 'locacao') e gráficos"""
+        conjuntos = self._get('/conjuntos').json()
+        self._tipos = {conjunto['nome']: conjunto['tipo'] for conjunto in conjuntos}
+        return conjuntos
+
+    def primeiro_do_tipo(self, tipo: str) -> Optional[str]:
+        return next((c['nome'] for c in self.conjuntos() if c['tipo'] == tipo), None)
+
+    def relatorio(self, nome: str) -> Union[RelatorioVendas, RelatorioAlugueis]:
+        """Relatório do conjunto, validado pelo modelo do seu tipo"""
+        if self._tipos is None or nome not in self._tipos:
+            self.conjuntos()
+        return _MODELOS[self._tipos[nome]].model_validate_json(self._get(f'/relatorios/{nome}').content)
+
+    def grafico(self, nome: str, arquivo: str) -> bytes:
+        """Bytes PNG de um gráfico (ex.: 'top_clientes.png')"""
+        return self._get(f'/graficos/{nome}/{arquivo}').content
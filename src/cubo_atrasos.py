@@ -0,0 +1,137 @@
+# src/cubo_atrasos.py
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .paralelo import LIMITES_FAIXAS, FAIXAS
+from .instrumentacao import rastreador
+
+_CHAVES = ['mes', 'apartamento']
+_AGREGACOES = {'soma': 'sum', 'contagem': 'sum', 'minimo': 'min', 'maximo': 'max',
+               **{faixa: 'sum' for faixa in FAIXAS}}
+
+
+class CuboAtrasos:
+    """Agregados de atraso por (mês do pagamento × apartamento), montados uma vez
+
+    `celulas` guarda, por célula, soma, contagem, mínimo e máximo dos atrasos
+    e quantos pagamentos caíram em cada faixa de pontualidade (FAIXAS);
+    `frequencias` guarda quantos pagamentos tiveram cada atraso (em dias) por
+    célula, o que permite histogramas filtrados. Tendências, linhas do tempo e
+    histogramas saem só desses agregados, sem reler as linhas. Pagamentos sem
+    uma das datas ficam de fora, como na média de atrasos.
+    """
+
+    def __init__(self, celulas: pd.DataFrame, frequencias: pd.Series):
+        self._celulas = celulas
+        self._frequencias = frequencias
+        # Cubos dos lotes recebidos por `adicionar`, combinados na próxima consulta
+        self._pendentes: List['CuboAtrasos'] = []
+
+    @property
+    def celulas(self) -> pd.DataFrame:
+        self._incorporar_pendentes()
+        return self._celulas
+
+    @property
+    def frequencias(self) -> pd.Series:
+        self._incorporar_pendentes()
+        return self._frequencias
+
+    @classmethod
+    def de_dados(cls, dados: pd.DataFrame, atrasos: Optional[pd.Series] = None) -> 'CuboAtrasos':
+        """Monta o cubo a partir dos pagamentos (com `atrasos` já calculados, se houver)"""
+        with rastreador.etapa('CuboAtrasos.de_dados', len(dados)) as etapa:
+            if atrasos is None:
+                atrasos = (dados['datas_de_pagamento'] - dados['datas_combinadas_pagamento']).dt.days
+            validos = atrasos.notna().to_numpy()
+            base = pd.DataFrame({
+                'mes': dados['datas_de_pagamento'][validos].dt.to_period('M'),
+                'apartamento': dados['apartamento'][validos],
+                'atraso': atrasos[validos].astype(np.int64),
+            })
+            frequencias = (base.groupby(['mes', 'apartamento', 'atraso'], observed=True, dropna=False)
+                           .size().rename('contagem'))
+            cubo = cls(cls._celulas_de(frequencias), frequencias)
+            etapa.linhas_saida = len(cubo.celulas)
+        return cubo
+
+    @staticmethod
+    def _celulas_de(frequencias: pd.Series) -> pd.DataFrame:
+        """Agregados por célula a partir das frequências de cada atraso"""
+        tabela = frequencias.reset_index()
+        atraso, contagem = tabela['atraso'].to_numpy(), tabela['contagem'].to_numpy()
+        faixa = np.searchsorted(np.asarray(LIMITES_FAIXAS), atraso, side='left')
+        colunas = {'soma': atraso * contagem, 'contagem': contagem, 'minimo': atraso, 'maximo': atraso}
+        for i, nome in enumerate(FAIXAS):
+            colunas[nome] = np.where(faixa == i, contagem, 0)
+        celulas = pd.DataFrame(colunas, index=pd.MultiIndex.from_frame(tabela[_CHAVES]))
+        return celulas.groupby(level=_CHAVES, observed=True, dropna=False).agg(_AGREGACOES)
+
+    def adicionar(self, lote: pd.DataFrame, atrasos: Optional[pd.Series] = None) -> None:
+        """Incorpora novos pagamentos em O(tamanho do lote)
+
+        Só os agregados do lote são montados; eles são combinados aos do cubo
+        (de uma vez, para todos os lotes acumulados) na próxima consulta.
+        """
+        self._pendentes.append(CuboAtrasos.de_dados(lote, atrasos))
+
+    def _incorporar_pendentes(self) -> None:
+        if not self._pendentes:
+            return
+        pendentes, self._pendentes = self._pendentes, []
+        with rastreador.etapa('CuboAtrasos.incorporar_lotes', sum(len(cubo._celulas) for cubo in pendentes)):
+            self._frequencias = (pd.concat([self._frequencias, *(cubo._frequencias for cubo in pendentes)])
+                                 .groupby(level=[*_CHAVES, 'atraso'], observed=True, dropna=False).sum())
+            self._celulas = (pd.concat([self._celulas, *(cubo._celulas for cubo in pendentes)])
+                             .groupby(level=_CHAVES, observed=True, dropna=False).agg(_AGREGACOES))
+
+    @staticmethod
+    def _filtro(indice: pd.MultiIndex, inicio, fim, apartamentos: Optional[Iterable]) -> np.ndarray:
+        mascara = np.ones(len(indice), dtype=bool)
+        meses = indice.get_level_values('mes')
+        if inicio is not None:
+            mascara &= meses >= pd.Period(inicio, 'M')
+        if fim is not None:
+            mascara &= meses <= pd.Period(fim, 'M')
+        if apartamentos is not None:
+            mascara &= indice.get_level_values('apartamento').isin(list(apartamentos))
+        return mascara
+
+    def _selecionar(self, inicio=None, fim=None, apartamentos: Optional[Iterable] = None) -> pd.DataFrame:
+        if inicio is None and fim is None and apartamentos is None:
+            return self.celulas
+        return self.celulas[self._filtro(self.celulas.index, inicio, fim, apartamentos)]
+
+    @staticmethod
+    def _resumir(celulas: pd.DataFrame, nivel: str) -> pd.DataFrame:
+        resumo = celulas.groupby(level=nivel, observed=True, dropna=False).agg(_AGREGACOES)
+        resumo.insert(0, 'media', resumo['soma'] / resumo['contagem'])
+        return resumo
+
+    def tendencia_mensal(self, inicio=None, fim=None, apartamentos: Optional[Iterable] = None) -> pd.Series:
+        """Atraso médio por mês de pagamento"""
+        return self._resumir(self._selecionar(inicio, fim, apartamentos), 'mes')['media']
+
+    def linha_do_tempo(self, apartamento, inicio=None, fim=None) -> pd.DataFrame:
+        """Média, contagem, extremos e faixas mês a mês de um apartamento"""
+        celulas = self._selecionar(inicio, fim, [apartamento])
+        return self._resumir(celulas, 'mes')
+
+    def por_apartamento(self, inicio=None, fim=None) -> pd.DataFrame:
+        """Média, contagem, extremos e faixas de cada apartamento no período"""
+        return self._resumir(self._selecionar(inicio, fim), 'apartamento')
+
+    def histograma(self, inicio=None, fim=None, apartamentos: Optional[Iterable] = None) -> pd.Series:
+        """Quantidade de pagamentos por atraso (dias), ordenada pelo atraso"""
+        frequencias = self.frequencias
+        if inicio is not None or fim is not None or apartamentos is not None:
+            frequencias = frequencias[self._filtro(frequencias.index, inicio, fim, apartamentos)]
+        return frequencias.groupby(level='atraso').sum().sort_index()
+
+    def media_geral(self, inicio=None, fim=None, apartamentos: Optional[Iterable] = None) -> float:
+        celulas = self._selecionar(inicio, fim, apartamentos)
+        contagem = celulas['contagem'].sum()
+        return celulas['soma'].sum() / contagem if contagem else float('nan')
@@ -1,19 +1,25 @@
 # src/dashboard.py
 
+import json
+from typing import Optional
 import streamlit as st
 import pandas as pd
 
 # Imports relativos para acessar os outros módulos dentro do pacote 'src'
+from .models import RelatorioVendas, RelatorioAlugueis
 from .analytics import AnalisadorVendas, AnalisadorAluguel
+from .topk import maiores
 from .visualizations import VisualizadorVendas, VisualizadorAlugueis
+from .cache_figuras import cache_figuras
+from .cache_dados import cache_dados
+from .indice_filtros import Filtro, IndiceVendas, IndiceAlugueis
+from .cliente_relatorios import ClienteRelatorios
+from .instrumentacao import rastreador
 
-def display_vendas_dashboard(analisador_vendas: AnalisadorVendas, dados_vendas: pd.DataFrame):
-    """Renderiza a seção de vendas do dashboard."""
-    st.header("📊 Análise de Vendas")
-    
-    # Gera o relatório dentro da função de display
-    relatorio_vendas = analisador_vendas.gerar_relatorio()
-    
+def _filtrado(indice, filtro: Optional[Filtro]) -> bool:
+    return indice is not None and filtro is not None and not filtro.vazio
+
+def _exibir_metricas_vendas(relatorio_vendas: RelatorioVendas):
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total de Clientes", relatorio_vendas.total_clientes)
     col2.metric("Valor Total do Evento", f"R$ {relatorio_vendas.valor_total_evento:,.2f}")
@@ -22,38 +28,157 @@ def display_vendas_dashboard(analisador_vendas: AnalisadorVendas, dados_vendas:
     col4.metric("Duração do Evento", f"{relatorio_vendas.duracao_evento_dias} dias")
     
     st.markdown(f"#### 🏆 Cliente Vencedor: *{relatorio_vendas.cliente_vencedor.title()}* com R$ {relatorio_vendas.valor_vencedor:,.2f}")
+    _exibir_percentis("Valor da Compra", relatorio_vendas.percentis_valor_compra,
+                      relatorio_vendas.alfa_percentis, "R$ {:,.2f}")
     st.divider()
+
+def _exibir_metricas_alugueis(relatorio_alugueis: RelatorioAlugueis):
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total de Apartamentos", relatorio_alugueis.total_apartamentos)
+    col2.metric("Atraso Médio Geral", f"{relatorio_alugueis.atraso_medio_geral:.1f} dias")
+    col3.metric("Apto Mais Atrasado", f"{relatorio_alugueis.apartamento_mais_atrasado} ({relatorio_alugueis.atraso_maximo_medio:.1f}d)")
+    _exibir_percentis("Atraso", relatorio_alugueis.percentis_atraso,
+                      relatorio_alugueis.alfa_percentis, "{:.1f} dias")
+    st.divider()
+
+def _exibir_percentis(rotulo: str, percentis: dict, alfa: Optional[float], formato: str):
+    if not percentis:
+        return
+    ajuda = f"Aproximado: erro relativo de até {alfa:.0%}" if alfa else None
+    for coluna, (nome, valor) in zip(st.columns(len(percentis)), percentis.items()):
+        coluna.metric(f"{rotulo} {nome.upper()}", formato.format(valor), help=ajuda)
+
+def display_vendas_dashboard(analisador_vendas: AnalisadorVendas, indice: Optional[IndiceVendas] = None,
+                             filtro: Optional[Filtro] = None):
+    """Renderiza a seção de vendas do dashboard (filtrada pelo índice, se houver filtro)."""
+    st.header("📊 Análise de Vendas")
+    
+    # Gera o relatório dentro da função de display
+    if _filtrado(indice, filtro):
+        relatorio_vendas = indice.relatorio(filtro)
+        if relatorio_vendas is None:
+            st.info("Nenhuma venda corresponde aos filtros selecionados.")
+            return
+    else:
+        relatorio_vendas = analisador_vendas.gerar_relatorio()
+    _exibir_metricas_vendas(relatorio_vendas)
     
-    viz_vendas = VisualizadorVendas(relatorio_vendas, dados_vendas)
+    # Só os totais diários (já memorizados no índice) chegam ao gráfico e à chave do
+    # cache: um rerun sem mudanças não percorre as linhas das vendas
+    if indice is not None:
+        vendas_diarias = indice.vendas_por_dia(filtro or Filtro())
+    else:
+        vendas_diarias = analisador_vendas.calcular_vendas_por_dia()
+    
+    # Figuras saem do cache; só as ausentes são renderizadas, em paralelo
+    fig_top = cache_figuras.obter(
+        cache_figuras.chave('plot_top_clientes', relatorio_vendas, (8, 6)),
+        lambda: VisualizadorVendas(relatorio_vendas, vendas_diarias).plot_top_clientes(figsize=(8, 6)))
+    fig_dia = cache_figuras.obter(
+        cache_figuras.chave('plot_vendas_por_dia', relatorio_vendas, vendas_diarias, (8, 6)),
+        lambda: VisualizadorVendas(relatorio_vendas, vendas_diarias).plot_vendas_por_dia(figsize=(8, 6)))
     
     c1, c2 = st.columns(2)
     with c1:
-        st.pyplot(viz_vendas.plot_top_clientes(figsize=(8, 6)))
+        st.image(fig_top.result())
     with c2:
-        st.pyplot(viz_vendas.plot_vendas_por_dia(figsize=(8, 6)))
+        st.image(fig_dia.result())
     
     with st.expander("Ver Relatório Detalhado de Vendas (JSON)"):
         st.json(relatorio_vendas.model_dump_json(indent=4))
 
-def display_alugueis_dashboard(analisador_aluguel: AnalisadorAluguel, dados_locacao: pd.DataFrame):
-    """Renderiza a seção de aluguéis do dashboard."""
+def display_alugueis_dashboard(analisador_aluguel: AnalisadorAluguel, dados_locacao: pd.DataFrame,
+                               indice: Optional[IndiceAlugueis] = None, filtro: Optional[Filtro] = None):
+    """Renderiza a seção de aluguéis do dashboard (filtrada pelo índice, se houver filtro)."""
     st.header("🏠 Análise de Aluguéis")
 
-    relatorio_alugueis = analisador_aluguel.gerar_relatorio()
-    
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total de Apartamentos", relatorio_alugueis.total_apartamentos)
-    col2.metric("Atraso Médio Geral", f"{relatorio_alugueis.atraso_medio_geral:.1f} dias")
-    col3.metric("Apto Mais Atrasado", f"{relatorio_alugueis.apartamento_mais_atrasado} ({relatorio_alugueis.atraso_maximo_medio:.1f}d)")
-    st.divider()
+    if _filtrado(indice, filtro):
+        relatorio_alugueis = indice.relatorio(filtro)
+        if relatorio_alugueis is None:
+            st.info("Nenhum pagamento corresponde aos filtros selecionados.")
+            return
+    else:
+        relatorio_alugueis = analisador_aluguel.gerar_relatorio()
+    _exibir_metricas_alugueis(relatorio_alugueis)
 
-    viz_alugueis = VisualizadorAlugueis(relatorio_alugueis, dados_locacao)
+    # O histograma depende só das frequências (do cubo ou da seleção), bem menores que o vetor de atrasos
+    if _filtrado(indice, filtro):
+        cubo, frequencias = None, indice.frequencias_atraso(filtro)
+        ranking = maiores(indice.media_por_apartamento(filtro), 15)
+        # As chaves das figuras não olham o índice das séries: o filtro entra na chave
+        contexto, chave_frequencias = filtro, frequencias
+    else:
+        cubo, frequencias = analisador_aluguel.obter_cubo(), None
+        ranking = analisador_aluguel.calcular_media_atraso_por_apartamento(top_n=15)
+        contexto, chave_frequencias = None, cubo.frequencias
+    fig_ranking = cache_figuras.obter(
+        cache_figuras.chave('plot_ranking_apartamentos', relatorio_alugueis, contexto, ranking),
+        lambda: VisualizadorAlugueis(relatorio_alugueis, dados_locacao, cubo=cubo,
+                                     media_por_apartamento=ranking).plot_ranking_apartamentos(top_n=15))
+    fig_distribuicao = cache_figuras.obter(
+        cache_figuras.chave('plot_distribuicao_atrasos', relatorio_alugueis, contexto,
+                            chave_frequencias, (8, 7)),
+        lambda: VisualizadorAlugueis(relatorio_alugueis, dados_locacao, cubo=cubo,
+                                     frequencias=frequencias).plot_distribuicao_atrasos(figsize=(8, 7)))
     
     c1, c2 = st.columns([0.6, 0.4]) 
     with c1:
-         st.pyplot(viz_alugueis.plot_ranking_apartamentos())
+        st.image(fig_ranking.result())
     with c2:
-        st.pyplot(viz_alugueis.plot_distribuicao_atrasos(figsize=(8, 7)))
+        st.image(fig_distribuicao.result())
 
     with st.expander("Ver Relatório Detalhado de Aluguéis (JSON)"):
         st.json(relatorio_alugueis.model_dump_json(indent=4))
+
+def display_relatorios_remotos(cliente: ClienteRelatorios):
+    """Renderiza vendas e aluguéis com relatórios e gráficos vindos do serviço de relatórios."""
+    vendas, locacao = cliente.primeiro_do_tipo('vendas'), cliente.primeiro_do_tipo('locacao')
+    if vendas is not None:
+        st.header("📊 Análise de Vendas")
+        relatorio_vendas = cliente.relatorio(vendas)
+        _exibir_metricas_vendas(relatorio_vendas)
+        c1, c2 = st.columns(2)
+        with c1:
+            st.image(cliente.grafico(vendas, 'top_clientes.png'))
+        with c2:
+            st.image(cliente.grafico(vendas, 'vendas_por_dia.png'))
+        with st.expander("Ver Relatório Detalhado de Vendas (JSON)"):
+            st.json(relatorio_vendas.model_dump_json(indent=4))
+    if vendas is not None and locacao is not None:
+        st.divider()
+    if locacao is not None:
+        st.header("🏠 Análise de Aluguéis")
+        relatorio_alugueis = cliente.relatorio(locacao)
+        _exibir_metricas_alugueis(relatorio_alugueis)
+        c1, c2 = st.columns([0.6, 0.4])
+        with c1:
+            st.image(cliente.grafico(locacao, 'ranking_apartamentos.png'))
+        with c2:
+            st.image(cliente.grafico(locacao, 'distribuicao_atrasos.png'))
+        with st.expander("Ver Relatório Detalhado de Aluguéis (JSON)"):
+            st.json(relatorio_alugueis.model_dump_json(indent=4))
+
+def display_performance_panel():
+    """Renderiza o detalhamento por etapa da última execução instrumentada."""
+    with st.expander("⏱️ Performance"):
+        cache = cache_dados.estatisticas()
+        st.caption(f"Cache de dados: {cache['itens']} quadro(s), "
+                   f"{cache['bytes_usados'] / 2**20:.1f} de {cache['limite_bytes'] / 2**20:.0f} MB | "
+                   f"acertos {cache['acertos']}, faltas {cache['faltas']}, remoções {cache['remocoes']}")
+        etapas = pd.DataFrame(rastreador.etapas)
+        if etapas.empty:
+            st.info("Nenhuma etapa registrada nesta execução (dados vindos do cache).")
+            return
+        
+        etapas['etapa'] = ['  ' * p + n for p, n in zip(etapas['profundidade'], etapas['nome'])]
+        st.dataframe(etapas[['etapa', 'duracao_s', 'cpu_s', 'linhas_entrada',
+                             'linhas_saida', 'pico_memoria_mb']],
+                     hide_index=True, use_container_width=True)
+        
+        # Só as etapas de primeiro nível somam o tempo total sem contar nada duas vezes
+        por_etapa = (etapas[etapas['profundidade'] == 0]
+                     .groupby('nome')['duracao_s'].sum().sort_values(ascending=False))
+        st.bar_chart(por_etapa)
+        st.download_button("Baixar trace (Chrome/Perfetto)",
+                           data=json.dumps(rastreador.exportar_chrome_trace()),
+                           file_name="trace.json", mime="application/json")
@@ -1,72 +1,437 @@
 import pandas as pd
 import numpy as np
-from typing import List
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
 import re
+import io
+import os
+import hashlib
+import contextlib
+import contextvars
+import threading
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
 from .models import DataLoaderConfig # Importe o modelo DataLoaderConfig
+from .json_stream import iterar_blocos
+from .moeda import converter_valores_monetarios
+from .achatamento import achatar_listas
+from .instrumentacao import rastreador, rastrear
+from .cache_dados import CacheDados, cache_dados
+
+if TYPE_CHECKING:
+    import requests
+
+# Nome dos arquivos do cache em disco antes de levarem o hash da configuração
+_CACHE_LEGADO = re.compile(r'[0-9a-f]{32}\.parquet')
+
+class Validadores(NamedTuple):
+    """O que identifica a versão de uma fonte já lida, para revalidar sem baixar de novo
+
+    Em URLs, `etag` e `ultima_modificacao` vêm dos cabeçalhos ETag e
+    Last-Modified; em arquivos locais, `etag` combina data de modificação e
+    tamanho. `resumo` é o SHA-256 do conteúdo, que detecta respostas 200
+    com os mesmos bytes (fontes sem validadores).
+    """
+    etag: Optional[str]
+    ultima_modificacao: Optional[str]
+    resumo: str
 
 class DataLoader:
     """Carregador de dados otimizado com validação Pydantic"""
     
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, diretorio_cache: Optional[str] = None, timeout: float = 30,
+                 tentativas: int = 3, conexoes: int = 10, cache: Optional[CacheDados] = None):
+        # Cache em memória; por padrão o compartilhado por todo o processo
+        self.cache = cache_dados if cache is None else cache
+        # Quantidade de valores monetários não convertidos, por URL
+        self.falhas_monetarias = {}
+        # Quantidade de datas não convertidas por conjunto ('vendas', 'locacao') e coluna,
+        # da última preparação de cada conjunto
+        self.falhas_datas: Dict[str, Dict[str, int]] = {}
+        # Uso de memória (bytes) antes e depois da compactação de tipos, por URL
+        self.memoria_compactacao = {}
+        # Diretório do cache colunar em disco (desativado quando None)
+        self.diretorio_cache = diretorio_cache
+        # Versão do último conteúdo lido de cada URL, para requisições condicionais
+        self.validadores: Dict[str, Validadores] = {}
+        # Sessão HTTP compartilhada, com pool de conexões e novas tentativas
+        self.timeout = timeout
+        self._opcoes_sessao = (tentativas, conexoes)
+        self._sessao = None
+        self._trava_sessao = threading.Lock()
+    
+    @property
+    def sessao(self) -> 'requests.Session':
+        """Sessão HTTP, criada no primeiro acesso (fontes locais não importam requests)"""
+        if self._sessao is None:
+            with self._trava_sessao:
+                if self._sessao is None:
+                    self._sessao = self._criar_sessao(*self._opcoes_sessao)
+        return self._sessao
+    
+    @staticmethod
+    def _criar_sessao(tentativas: int, conexoes: int) -> 'requests.Session':
+        """Cria uma sessão que reaproveita conexões e repete falhas transitórias"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        repeticao = Retry(total=tentativas, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(['GET']))
+        adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes,
+                                max_retries=repeticao)
+        sessao = requests.Session()
+        sessao.mount('http://', adaptador)
+        sessao.mount('https://', adaptador)
+        return sessao
+    
+    def carregar_varios(self, configs: Dict[str, DataLoaderConfig],
+                        max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """Carrega várias fontes em paralelo, na mesma sessão HTTP
+
+        Cada fonte é baixada e processada na sua própria thread, então o
+        processamento de uma começa assim que o download dela termina e o
+        tempo total fica próximo ao da fonte mais lenta.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(configs))) as executor:
+            futuros = {nome: executor.submit(contextvars.copy_context().run, self.carregar_dados, config)
+                       for nome, config in configs.items()}
+            return {nome: futuro.result() for nome, futuro in futuros.items()}
+    
+    def revalidar_varios(self, configs: Dict[str, DataLoaderConfig],
+                         max_workers: Optional[int] = None) -> Dict[str, Tuple[pd.DataFrame, bool]]:
+        """Revalida várias fontes em paralelo (ver `revalidar`): {nome: (dados, mudaram)}"""
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(configs))) as executor:
+            futuros = {nome: executor.submit(contextvars.copy_context().run, self.revalidar, config)
+                       for nome, config in configs.items()}
+            return {nome: futuro.result() for nome, futuro in futuros.items()}
+    
+    @rastrear('DataLoader.carregar_dados')
+    def carregar_dados(self, config: DataLoaderConfig, conteudo: Optional[bytes] = None) -> pd.DataFrame:
+        """Carrega dados usando configuração validada
+
+        `conteudo` permite reaproveitar bytes já lidos da fonte, sem novo download.
+        O cache em memória é indexado só pela configuração: com `conteudo` ele
+        não é consultado (os bytes podem ser de outra versão da fonte) e passa a
+        guardar o resultado desses bytes.
+        """
+        try:
+            if conteudo is None:
+                # Verifica cache
+                dados = self.cache.obter(config.model_dump_json())
+                if dados is not None:
+                    return dados
+                conteudo = self.ler_conteudo(config.url)
+            # Converte o conteúdo bruto, verificando antes o cache em disco
+            return self._processar_conteudo(config, conteudo)
+            
+        except Exception as e:
+            raise RuntimeError(f"Erro ao carregar dados: {str(e)}")
+    
+    def ler_conteudo(self, url: str) -> bytes:
+        """Lê o conteúdo bruto de uma URL ou de um arquivo local, sem processá-lo
+
+        Os bytes podem ser passados depois a `carregar_dados`, sem novo download.
+        """
+        with rastreador.etapa('DataLoader.download'):
+            return self._ler_conteudo(url)
     
-    def carregar_dados(self, config: DataLoaderConfig) -> pd.DataFrame:
-        """Carrega dados usando configuração validada"""
+    @rastrear('DataLoader.revalidar')
+    def revalidar(self, config: DataLoaderConfig) -> Tuple[pd.DataFrame, bool]:
+        """Confere com a fonte se os dados mudaram: devolve (dados, mudaram)
+
+        Com os validadores da última leitura a requisição é condicional
+        (If-None-Match/If-Modified-Since): um 304 devolve os dados em cache
+        sem download nem processamento. Uma resposta 200 com os mesmos bytes
+        também não é processada de novo. Sem dados em cache (primeira carga ou
+        removidos pelo LRU) a leitura é completa.
+        """
+        try:
+            chave_cache = config.model_dump_json()
+            dados = self.cache.obter(chave_cache) if config.url in self.validadores else None
+            anteriores = self.validadores.get(config.url) if dados is not None else None
+            with rastreador.etapa('DataLoader.download'):
+                conteudo = self._ler_conteudo(config.url, anteriores)
+            if conteudo is None:
+                return dados, False
+            if anteriores is not None and self.validadores[config.url].resumo == anteriores.resumo:
+                return dados, False
+            return self._processar_conteudo(config, conteudo), True
+            
+        except Exception as e:
+            raise RuntimeError(f"Erro ao carregar dados: {str(e)}")
+    
+    def _processar_conteudo(self, config: DataLoaderConfig, conteudo: bytes) -> pd.DataFrame:
+        """Converte o conteúdo bruto no DataFrame limpo (via cache em disco, se houver) e o guarda no cache"""
+        chave_cache = config.model_dump_json()
+        caminho_cache = self._caminho_cache(config, conteudo)
+        if caminho_cache and os.path.exists(caminho_cache):
+            with rastreador.etapa('DataLoader.ler_cache_disco') as etapa:
+                dados = pd.read_parquet(caminho_cache, memory_map=True)
+                etapa.linhas_saida = len(dados)
+            return self.cache.guardar(chave_cache, dados)
+        
+        # Carrega dados do JSON
+        with rastreador.etapa('DataLoader.read_json'):
+            dados_json = pd.read_json(io.BytesIO(conteudo))
+        
+        if config.chave not in dados_json:
+            raise ValueError(f"Chave '{config.chave}' não encontrada no JSON")
+        
+        # Normaliza e processa dados
+        with rastreador.etapa('DataLoader.json_normalize', len(dados_json)) as etapa:
+            dados = pd.json_normalize(dados_json[config.chave])
+            etapa.linhas_saida = len(dados)
+        dados = self._explodir_colunas_lista(dados)
+        dados = self._limpar_valores_monetarios(dados, config)
+        dados = self._compactar_tipos(dados, config)
+        
+        # Persiste o resultado limpo para as próximas cargas
+        if caminho_cache:
+            self._salvar_cache_disco(dados, caminho_cache)
+        
+        # Cache dos dados
+        return self.cache.guardar(chave_cache, dados)
+    
+    @rastrear('DataLoader.carregar_dados_streaming')
+    def carregar_dados_streaming(self, config: DataLoaderConfig, tamanho_bloco: int = 1000) -> pd.DataFrame:
+        """Carrega dados em blocos de registros, sem materializar o JSON inteiro
+
+        Cada bloco de `tamanho_bloco` registros é normalizado, explodido e limpo
+        isoladamente e anexado a um resultado colunar do Arrow. O pico de memória
+        intermediária fica proporcional ao bloco, não ao tamanho do arquivo.
+        """
         try:
             # Verifica cache
-            if config.url in self.cache:
-                return self.cache[config.url].copy()
+            chave_cache = config.model_dump_json()
+            dados = self.cache.obter(chave_cache)
+            if dados is not None:
+                return dados
             
-            # Carrega dados do JSON
-            dados_json = pd.read_json(config.url)
+            tabelas = []
+            self.falhas_monetarias[config.url] = 0
+            with self._abrir_texto(config.url) as arquivo:
+                for registros in iterar_blocos(arquivo, config.chave, tamanho_bloco):
+                    bloco = pd.json_normalize(registros)
+                    bloco = self._explodir_colunas_lista(bloco)
+                    bloco = self._limpar_valores_monetarios(bloco, config, acumular=True)
+                    tabelas.append(pa.Table.from_pandas(bloco, preserve_index=False))
             
-            if config.chave not in dados_json:
-                raise ValueError(f"Chave '{config.chave}' não encontrada no JSON")
+            if not tabelas:
+                raise ValueError(f"Chave '{config.chave}' não contém registros")
             
-            # Normaliza e processa dados
-            dados = pd.json_normalize(dados_json[config.chave])
-            dados = self._explodir_colunas_lista(dados)
-            dados = self._limpar_valores_monetarios(dados, config.coluna_valor, config.prefixos_remover)
+            # Une os blocos sem copiar e converte uma única vez para pandas
+            dados = pa.concat_tables(tabelas, promote_options='default').to_pandas()
+            del tabelas
+            dados = self._compactar_tipos(dados, config)
             
             # Cache dos dados
-            self.cache[config.url] = dados.copy()
-            
-            return dados
+            return self.cache.guardar(chave_cache, dados)
             
         except Exception as e:
             raise RuntimeError(f"Erro ao carregar dados: {str(e)}")
     
+    @contextlib.contextmanager
+    def _abrir_texto(self, url: str):
+        """Abre uma URL ou arquivo local como fluxo de texto, sem lê-lo por inteiro"""
+        if url.startswith(('http://', 'https://')):
+            with self.sessao.get(url, stream=True, timeout=self.timeout) as resposta:
+                resposta.raise_for_status()
+                resposta.raw.decode_content = True
+                yield io.TextIOWrapper(resposta.raw, encoding='utf-8')
+        else:
+            with open(url, 'r', encoding='utf-8') as arquivo:
+                yield arquivo
+    
+    def _ler_conteudo(self, url: str, anteriores: Optional[Validadores] = None) -> Optional[bytes]:
+        """Lê o conteúdo bruto de uma URL ou de um arquivo local e guarda seus validadores
+
+        Com `anteriores`, devolve None se a fonte não mudou desde aquela leitura.
+        """
+        if url.startswith(('http://', 'https://')):
+            cabecalhos = {}
+            if anteriores is not None and anteriores.etag:
+                cabecalhos['If-None-Match'] = anteriores.etag
+            if anteriores is not None and anteriores.ultima_modificacao:
+                cabecalhos['If-Modified-Since'] = anteriores.ultima_modificacao
+            resposta = self.sessao.get(url, headers=cabecalhos, timeout=self.timeout)
+            if resposta.status_code == 304 and anteriores is not None:
+                return None
+            resposta.raise_for_status()
+            conteudo = resposta.content
+            etag, ultima_modificacao = resposta.headers.get('ETag'), resposta.headers.get('Last-Modified')
+        else:
+            estado = os.stat(url)
+            etag, ultima_modificacao = f'{estado.st_mtime_ns}-{estado.st_size}', None
+            if anteriores is not None and anteriores.etag == etag:
+                return None
+            with open(url, 'rb') as arquivo:
+                conteudo = arquivo.read()
+        self.validadores[url] = Validadores(etag, ultima_modificacao, hashlib.sha256(conteudo).hexdigest())
+        return conteudo
+    
+    def _caminho_cache(self, config: DataLoaderConfig, conteudo: bytes) -> Optional[str]:
+        """Monta o caminho do arquivo de cache: '<hash da configuração>-<hash do conteúdo>.parquet'"""
+        if not self.diretorio_cache:
+            return None
+        chave_config = hashlib.sha256(config.model_dump_json().encode('utf-8')).hexdigest()[:16]
+        chave_conteudo = hashlib.sha256(conteudo).hexdigest()[:16]
+        return os.path.join(self.diretorio_cache, f"{chave_config}-{chave_conteudo}.parquet")
+    
+    @staticmethod
+    def _salvar_cache_disco(df: pd.DataFrame, caminho: str) -> None:
+        """Grava o DataFrame em Parquet de forma atômica e remove as versões que ele substitui
+        
+        Só a versão mais recente de cada configuração fica em disco (arquivos
+        no formato antigo, sem o hash da configuração no nome, também saem).
+        """
+        diretorio, nome = os.path.split(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+        except Exception:
+            # Falha no cache não deve impedir o carregamento dos dados
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        
+        prefixo = nome.split('-')[0] + '-'
+        for antigo in os.listdir(diretorio):
+            if antigo != nome and (antigo.startswith(prefixo) and antigo.endswith('.parquet') or
+                                   _CACHE_LEGADO.fullmatch(antigo)):
+                # Quem ainda tem o arquivo aberto ou mapeado continua lendo normalmente
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(diretorio, antigo))
+    
     def _explodir_colunas_lista(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Explode colunas que contêm listas"""
-        colunas_para_explodir = df.columns[1:].tolist()
-        if colunas_para_explodir:
-            return df.explode(colunas_para_explodir).reset_index(drop=True)
-        return df
+        """Explode colunas que contêm listas (ver achatamento.achatar_listas)"""
+        return achatar_listas(df, df.columns[1:].tolist())
     
-    def _limpar_valores_monetarios(self, df: pd.DataFrame, coluna: str, prefixos: List[str]) -> pd.DataFrame:
-        """Limpa e converte valores monetários"""
+    def _limpar_valores_monetarios(self, df: pd.DataFrame, config: DataLoaderConfig,
+                                   acumular: bool = False) -> pd.DataFrame:
+        """Limpa e converte valores monetários, registrando as falhas de conversão"""
+        coluna = config.coluna_valor
         if coluna not in df.columns:
             raise KeyError(f"Coluna '{coluna}' não encontrada")
         
-        # Remove prefixos
-        for prefixo in prefixos:
-            df[coluna] = df[coluna].str.replace(prefixo, '', regex=False)
+        with rastreador.etapa('DataLoader.limpeza_monetaria', len(df)) as etapa:
+            resultado = converter_valores_monetarios(df[coluna],
+                                                     prefixos=config.prefixos_remover or [],
+                                                     sufixos=config.sufixos_remover or [],
+                                                     separador_decimal=config.separador_decimal,
+                                                     separador_milhar=config.separador_milhar)
+            etapa.linhas_saida = len(df) - resultado.falhas
+        df[coluna] = resultado.valores
         
-        # Padroniza formato
-        df[coluna] = (df[coluna]
-                     .str.replace(',', '.', regex=False)
-                     .str.strip())
+        anteriores = self.falhas_monetarias.get(config.url, 0) if acumular else 0
+        self.falhas_monetarias[config.url] = anteriores + resultado.falhas
         
-        # Converte para float
-        df[coluna] = pd.to_numeric(df[coluna], errors='coerce')
+        return df
+    
+    def _compactar_tipos(self, df: pd.DataFrame, config: DataLoaderConfig) -> pd.DataFrame:
+        """Converte colunas-chave em categóricas e estreita os valores, se configurado"""
+        if not config.colunas_categoricas and not config.valor_float32:
+            return df
         
+        with rastreador.etapa('DataLoader.compactar_tipos', len(df)) as etapa:
+            antes = int(df.memory_usage(deep=True).sum())
+            df = df.infer_objects()
+            for coluna in config.colunas_categoricas or []:
+                if coluna in df.columns:
+                    df[coluna] = df[coluna].astype('category')
+            if config.valor_float32:
+                # float32 reduz a memória pela metade, mas arredonda os relatórios
+                df[config.coluna_valor] = df[config.coluna_valor].astype('float32')
+            etapa.linhas_saida = len(df)
+        
+        self.memoria_compactacao[config.url] = {
+            'antes': antes,
+            'depois': int(df.memory_usage(deep=True).sum())
+        }
         return df
     
     @staticmethod
-    def processar_datas(df: pd.DataFrame, colunas_data: List[str]) -> pd.DataFrame:
-        """Converte colunas para datetime"""
-        df_copy = df.copy()
+    def normalizar_texto(serie: pd.Series, normalizar: Callable[[pd.Series], pd.Series]) -> pd.Series:
+        """Aplica uma normalização de texto uma vez por categoria em vez de uma vez por linha
+
+        Em colunas comuns a função é aplicada diretamente. Em categóricas ela roda
+        só sobre as categorias; categorias que passam a coincidir são unificadas.
+        """
+        if not isinstance(serie.dtype, pd.CategoricalDtype):
+            return normalizar(serie)
+        
+        normalizadas = normalizar(serie.cat.categories.to_series())
+        codigos_novos, categorias = pd.factorize(normalizadas)
+        codigos = serie.cat.codes.to_numpy()
+        codigos = np.where(codigos >= 0, codigos_novos[codigos], -1)
+        return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias),
+                         index=serie.index, name=serie.name)
+    
+    def preparar_vendas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza nomes de clientes e converte a data de venda"""
+        df['Cliente'] = self.normalizar_texto(df['Cliente'], lambda s: s.str.lower().str.strip())
+        self.falhas_datas['vendas'] = {}
+        return self.processar_datas(df, ['Data de venda'], falhas=self.falhas_datas['vendas'])
+    
+    def preparar_locacao(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Remove o sufixo '(blocoAP)' dos apartamentos e converte as datas de pagamento"""
+        df['apartamento'] = self.normalizar_texto(
+            df['apartamento'], lambda s: s.str.replace('(blocoAP)', '', regex=False).str.strip())
+        self.falhas_datas['locacao'] = {}
+        return self.processar_datas(df, ['datas_combinadas_pagamento', 'datas_de_pagamento'],
+                                    falhas=self.falhas_datas['locacao'])
+    
+    @staticmethod
+    def processar_datas(df: pd.DataFrame, colunas_data: List[str],
+                        formatos: Optional[Dict[str, str]] = None,
+                        falhas: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+        """Converte colunas para datetime analisando apenas os valores distintos
+
+        Cada coluna é fatorizada, os valores únicos são convertidos com o formato
+        informado em `formatos` (ou detectado a partir do primeiro valor) e o
+        resultado é redistribuído pelos códigos. As colunas são substituídas em
+        uma cópia rasa, sem duplicar o restante do DataFrame. Se `falhas` for
+        informado, recebe por coluna quantos valores não viraram data.
+        """
+        formatos = formatos or {}
+        falhas = {} if falhas is None else falhas
+        df_resultado = df.copy(deep=False)
         for coluna in colunas_data:
-            if coluna in df_copy.columns:
-                df_copy[coluna] = pd.to_datetime(df_copy[coluna], errors='coerce')
-        return df_copy
+            if coluna not in df_resultado.columns:
+                continue
+            if pd.api.types.is_datetime64_any_dtype(df_resultado[coluna]):
+                falhas[coluna] = 0
+                continue
+            
+            with rastreador.etapa(f'DataLoader.processar_datas[{coluna}]', len(df_resultado)) as etapa:
+                codigos, unicos = pd.factorize(df_resultado[coluna])
+                datas = DataLoader._converter_datas_unicas(unicos, formatos.get(coluna))
+                
+                # Linhas que tinham valor mas não viraram data
+                falhas_unicas = np.flatnonzero(pd.isna(datas))
+                ocorrencias = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+                falhas[coluna] = int(ocorrencias[falhas_unicas].sum())
+                
+                df_resultado[coluna] = datas.take(codigos, allow_fill=True, fill_value=pd.NaT)
+                etapa.linhas_saida = len(df_resultado) - falhas[coluna]
+        return df_resultado
+    
+    @staticmethod
+    def _converter_datas_unicas(unicos, formato: Optional[str]) -> pd.DatetimeIndex:
+        """Converte valores distintos, detectando o formato quando não informado
+
+        Como em `pd.to_datetime(coluna, errors='coerce')`, o formato vem do
+        primeiro valor e o que não segue esse formato vira NaT (e conta como
+        falha), em vez de ser lido com outra ordem de dia e mês.
+        """
+        if len(unicos) == 0:
+            return pd.DatetimeIndex([])
+        if formato is None:
+            formato = guess_datetime_format(str(unicos[0]))
+        return pd.DatetimeIndex(pd.to_datetime(unicos, format=formato, errors='coerce'))
@@ -0,0 +1,396 @@
+# src/indice_filtros.py
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .models import RelatorioVendas, RelatorioAlugueis
+from .topk import maiores, menores
+from .analytics import faixas_pontualidade
+from .sketch_quantis import SketchQuantis, SketchesPorChave, codificar
+from .instrumentacao import rastreador
+
+_NAT = np.iinfo(np.int64).min
+_DIA_NS = 86_400 * 10**9
+
+
+class Filtro(NamedTuple):
+    """Combinação de filtros do dashboard (hashable, usada como chave de cache)
+
+    `fim` é inclusivo; `chaves` são clientes ou apartamentos.
+    """
+    inicio: Optional[pd.Timestamp] = None
+    fim: Optional[pd.Timestamp] = None
+    chaves: Optional[Tuple[str, ...]] = None
+    valor_min: Optional[float] = None
+    valor_max: Optional[float] = None
+
+    @property
+    def vazio(self) -> bool:
+        return all(valor is None for valor in self)
+
+
+class _IndiceOrdenado:
+    """Linhas ordenadas por data e posições por chave, para filtrar sem varrer os dados
+
+    Na montagem (uma vez) as colunas usadas são copiadas em arrays NumPy na
+    ordem das datas (datas ausentes no fim). Uma janela de datas vira um par
+    de offsets por busca binária; cada chave guarda as próprias posições, já
+    em ordem, e é recortada pela janela também por busca binária. Só o filtro
+    de valor olha as linhas selecionadas. Somas por chave de janelas que
+    cobrem mais da metade das linhas saem dos totais (montados junto com o
+    índice) menos o que ficou de fora. Os buckets dos sketches de quantis
+    também são calculados na montagem. Os relatórios das combinações de
+    filtro mais recentes ficam num LRU.
+    """
+
+    def __init__(self, dados: pd.DataFrame, coluna_data: str, coluna_chave: str,
+                 coluna_valor: str, capacidade_cache: int = 32):
+        with rastreador.etapa(f'{type(self).__name__}.montar', len(dados)):
+            datas = dados[coluna_data].to_numpy(dtype='datetime64[ns]')
+            self.ordem = np.argsort(datas, kind='stable')
+            self.datas = datas[self.ordem].view(np.int64)
+            self.linhas_com_data = int(np.count_nonzero(self.datas != _NAT))
+
+            codigos, chaves = pd.factorize(dados[coluna_chave])
+            self.chaves = pd.Index(np.asarray(chaves, dtype=object), dtype=object)
+            self.chaves.get_indexer(self.chaves[:1])  # monta a tabela hash agora, não no primeiro filtro
+            self.codigos = codigos.astype(np.int64, copy=False)[self.ordem]
+            self.valores = dados[coluna_valor].to_numpy(dtype=np.float64, na_value=np.nan)[self.ordem]
+
+            # Posições de cada chave, contíguas e crescentes: chave k em [offsets[k], offsets[k+1])
+            self._posicoes_chave = np.argsort(self.codigos, kind='stable')
+            sem_chave = int(np.count_nonzero(self.codigos < 0))
+            contagem = np.bincount(self.codigos[self.codigos >= 0], minlength=len(self.chaves))
+            self._offsets_chave = np.concatenate([[0], np.cumsum(contagem)]) + sem_chave
+            self._sem_chave = sem_chave > 0
+
+            # Coluna somada por chave nos relatórios (a de valor, se não houver outra)
+            agregada = self._coluna_agregada(dados)
+            self.agregado = self.valores if agregada is None else (
+                agregada.to_numpy(dtype=np.float64, na_value=np.nan)[self.ordem])
+            self._totais = self._contar(slice(0, len(self.datas)))
+            # Bucket do sketch de quantis de cada linha, a partir de 0; o último marca ausentes
+            finitos = np.isfinite(self.agregado)
+            buckets = codificar(self.agregado[finitos])
+            self._base_bucket = int(buckets.min()) if len(buckets) else 0
+            self._sem_bucket = int(buckets.max()) - self._base_bucket + 1 if len(buckets) else 0
+            self._buckets = np.full(len(self.agregado), self._sem_bucket, dtype=np.int64)
+            self._buckets[finitos] = buckets - self._base_bucket
+            self._totais_buckets = self._contar_buckets(slice(0, len(self.datas)))
+            self._extremos = self._extremos_agregado(slice(0, len(self.datas)))
+            validos = self.valores[~np.isnan(self.valores)]
+            self.faixa_valores = (float(validos.min()), float(validos.max())) if len(validos) else None
+
+        self.capacidade_cache = capacidade_cache
+        self.acertos = 0
+        self.faltas = 0
+        self._cache: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        self._trava = threading.Lock()
+        self._chaves_ordenadas: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(self.datas)
+
+    @property
+    def chaves_ordenadas(self) -> list:
+        """Chaves em ordem alfabética, para widgets de seleção (ordenadas uma única vez)"""
+        if self._chaves_ordenadas is None:
+            self._chaves_ordenadas = sorted(self.chaves)
+        return self._chaves_ordenadas
+
+    @property
+    def data_minima(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.datas[0]) if self.linhas_com_data else None
+
+    @property
+    def data_maxima(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.datas[self.linhas_com_data - 1]) if self.linhas_com_data else None
+
+    def _janela(self, filtro: Filtro) -> Tuple[int, int]:
+        """Offsets [i, j) das linhas com data em [inicio, fim]"""
+        if filtro.inicio is None and filtro.fim is None:
+            return 0, len(self.datas)
+        com_data = self.datas[:self.linhas_com_data]
+        i = 0 if filtro.inicio is None else int(np.searchsorted(
+            com_data, pd.Timestamp(filtro.inicio).value, side='left'))
+        j = self.linhas_com_data if filtro.fim is None else int(np.searchsorted(
+            com_data, pd.Timestamp(filtro.fim).value, side='right'))
+        return i, max(i, j)
+
+    def posicoes(self, filtro: Filtro) -> Union[slice, np.ndarray]:
+        """Posições (na ordem do índice) que passam pelo filtro; só janela de datas vira slice"""
+        i, j = self._janela(filtro)
+        selecao: Union[slice, np.ndarray] = slice(i, j)
+        if filtro.chaves is not None:
+            codigos = self.chaves.get_indexer(list(filtro.chaves))
+            partes = []
+            for codigo in codigos[codigos >= 0]:
+                posicoes = self._posicoes_chave[self._offsets_chave[codigo]:self._offsets_chave[codigo + 1]]
+                inicio, fim = np.searchsorted(posicoes, (i, j))
+                partes.append(posicoes[inicio:fim])
+            selecao = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64)
+        if filtro.valor_min is not None or filtro.valor_max is not None:
+            valores = self.valores[selecao]
+            mascara = np.ones(len(valores), dtype=bool)
+            if filtro.valor_min is not None:
+                mascara &= valores >= filtro.valor_min
+            if filtro.valor_max is not None:
+                mascara &= valores <= filtro.valor_max
+            base = np.arange(i, j) if isinstance(selecao, slice) else selecao
+            selecao = base[mascara]
+        return selecao
+
+    def _memorizar(self, nome: str, filtro: Filtro, calcular: Callable[[], Any]) -> Any:
+        chave = (nome, filtro)
+        with self._trava:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                self.acertos += 1
+                return self._cache[chave]
+            self.faltas += 1
+        with rastreador.etapa(f'{type(self).__name__}.{nome}', len(self)):
+            resultado = calcular()
+        with self._trava:
+            self._cache[chave] = resultado
+            while len(self._cache) > self.capacidade_cache:
+                self._cache.popitem(last=False)
+        return resultado
+
+    def _periodo(self, selecao: Union[slice, np.ndarray]) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Menor e maior data da seleção (as datas já estão ordenadas)"""
+        if isinstance(selecao, slice):
+            com_data = self.datas[selecao.start:min(selecao.stop, self.linhas_com_data)]
+        else:
+            com_data = self.datas[selecao[selecao < self.linhas_com_data]]
+        if not len(com_data):
+            return pd.NaT, pd.NaT
+        return pd.Timestamp(com_data[0]), pd.Timestamp(com_data[-1])
+
+    def _coluna_agregada(self, dados: pd.DataFrame) -> Optional[pd.Series]:
+        return None
+
+    def _contar(self, selecao) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Soma e contagem dos valores agregados não ausentes e linhas de cada chave"""
+        codigos = self.codigos[selecao]
+        valores = self.agregado[selecao]
+        n = len(self.chaves)
+        if self._sem_chave:
+            com_chave = codigos >= 0
+            codigos, valores = codigos[com_chave], valores[com_chave]
+        linhas = np.bincount(codigos, minlength=n)
+        ausentes = np.isnan(valores)
+        if not ausentes.any():
+            # Caso comum: nenhuma máscara a aplicar, só duas passadas pela seleção
+            return np.bincount(codigos, weights=valores, minlength=n), linhas, linhas
+        validos = ~ausentes
+        soma = np.bincount(codigos[validos], weights=valores[validos], minlength=n)
+        return soma, np.bincount(codigos[validos], minlength=n), linhas
+
+    def _contar_buckets(self, selecao, valores: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+        """Linhas em cada bucket do sketch e soma dos valores agregados não ausentes"""
+        valores = self.agregado[selecao] if valores is None else valores
+        soma = valores.sum()
+        if np.isnan(soma):
+            # Só paga a passada mais lenta do nansum quando há ausentes
+            soma = np.nansum(valores)
+        return np.bincount(self._buckets[selecao], minlength=self._sem_bucket + 1), float(soma)
+
+    def _sketch(self, selecao) -> SketchQuantis:
+        """Sketch de quantis dos valores agregados da seleção, sem recalcular buckets"""
+        valores = self.agregado[selecao]
+        if isinstance(selecao, slice) and 2 * len(valores) > len(self.datas):
+            fora = [self._contar_buckets(slice(0, selecao.start)), self._contar_buckets(slice(selecao.stop, None))]
+            contagens, soma = (total - antes - depois for total, antes, depois
+                               in zip(self._totais_buckets, *fora))
+        else:
+            contagens, soma = self._contar_buckets(selecao, valores)
+        contagens = contagens[:self._sem_bucket]
+        if not contagens.any():
+            return SketchQuantis()
+        completa = isinstance(selecao, slice) and len(valores) == len(self.datas)
+        minimo, maximo = self._extremos if completa else self._extremos_agregado(selecao, valores)
+        return SketchQuantis.de_contagens(np.arange(self._sem_bucket) + self._base_bucket, contagens, soma,
+                                          minimo, maximo)
+
+    def _extremos_agregado(self, selecao, valores: Optional[np.ndarray] = None) -> Tuple[float, float]:
+        valores = self.agregado[selecao] if valores is None else valores
+        if not len(valores):
+            return np.nan, np.nan
+        # fmin/fmax ignoram ausentes sem a cópia do nanmin
+        return float(np.fmin.reduce(valores)), float(np.fmax.reduce(valores))
+
+    def _percentis_por_chave(self, selecao, chaves) -> Dict[str, Dict[str, float]]:
+        """Percentis aproximados das chaves pedidas (poucas), restritos à seleção"""
+        codigos = self.chaves.get_indexer(list(chaves))
+        partes = []
+        for codigo in codigos[codigos >= 0]:
+            posicoes = self._posicoes_chave[self._offsets_chave[codigo]:self._offsets_chave[codigo + 1]]
+            if isinstance(selecao, slice):
+                inicio, fim = np.searchsorted(posicoes, (selecao.start, selecao.stop))
+                posicoes = posicoes[inicio:fim]
+            partes.append(posicoes)
+        posicoes = np.concatenate(partes) if partes else np.empty(0, dtype=np.int64)
+        if not isinstance(selecao, slice) and len(selecao):
+            # A seleção já está ordenada: pertencer a ela é uma busca binária
+            encontradas = np.minimum(np.searchsorted(selecao, posicoes), len(selecao) - 1)
+            posicoes = posicoes[selecao[encontradas] == posicoes]
+        elif not isinstance(selecao, slice):
+            posicoes = selecao
+        buckets = self._buckets[posicoes]
+        com_valor = buckets < self._sem_bucket
+        sketches = SketchesPorChave.de_codigos(self.chaves, self.codigos[posicoes[com_valor]],
+                                               buckets[com_valor] + self._base_bucket)
+        return sketches.percentis(chaves)
+
+    def _somas_por_chave(self, selecao) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Soma e contagem dos valores agregados não ausentes e presença de cada chave na seleção"""
+        if isinstance(selecao, slice) and 2 * (selecao.stop - selecao.start) > len(self.datas):
+            fora = [self._contar(slice(0, selecao.start)), self._contar(slice(selecao.stop, None))]
+            soma, contagem, linhas = (total - antes - depois for total, antes, depois
+                                      in zip(self._totais, *fora))
+        else:
+            soma, contagem, linhas = self._contar(selecao)
+        return soma, contagem, linhas > 0
+
+
+class IndiceVendas(_IndiceOrdenado):
+    """Índice de filtros das vendas: data de venda, cliente e valor da compra
+
+    Os relatórios coincidem com os de AnalisadorVendas sobre as mesmas linhas
+    (somas podem diferir no último dígito e empates podem sair em outra ordem).
+    """
+
+    def __init__(self, dados: pd.DataFrame, capacidade_cache: int = 32):
+        super().__init__(dados, 'Data de venda', 'Cliente', 'Valor da compra', capacidade_cache)
+
+    def total_por_cliente(self, filtro: Filtro) -> pd.Series:
+        return self._memorizar('total_por_cliente', filtro,
+                               lambda: self._total_por_cliente(self.posicoes(filtro)))
+
+    def _total_por_cliente(self, selecao) -> pd.Series:
+        soma, _, presentes = self._somas_por_chave(selecao)
+        return pd.Series(soma[presentes], index=self.chaves[presentes], name='Valor da compra')
+
+    def relatorio(self, filtro: Filtro) -> Optional[RelatorioVendas]:
+        """RelatorioVendas das linhas filtradas (None se nenhuma venda passar)"""
+        return self._memorizar('relatorio', filtro, lambda: self._relatorio(filtro))
+
+    def _relatorio(self, filtro: Filtro) -> Optional[RelatorioVendas]:
+        selecao = self.posicoes(filtro)
+        total_compras = self._total_por_cliente(selecao)
+        data_inicio, data_fim = self._periodo(selecao)
+        if total_compras.empty or pd.isna(data_inicio):
+            return None
+        top_5 = maiores(total_compras, 5)
+        sketch = self._sketch(selecao)
+        return RelatorioVendas(
+            cliente_vencedor=top_5.index[0],
+            valor_vencedor=top_5.iloc[0],
+            total_clientes=len(total_compras),
+            valor_total_evento=total_compras.sum(),
+            valor_medio_por_cliente=total_compras.mean(),
+            duracao_evento_dias=(data_fim - data_inicio).days + 1,
+            top_5_clientes=top_5.to_dict(),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            percentis_valor_compra=sketch.percentis(),
+            histograma_valor_compra=sketch.histograma(),
+            percentis_top_clientes=self._percentis_por_chave(selecao, top_5.index),
+            alfa_percentis=sketch.alfa
+        )
+
+    def vendas_por_dia(self, filtro: Filtro) -> pd.DataFrame:
+        """Total vendido por dia na seleção, no formato esperado por plot_vendas_por_dia"""
+        return self._memorizar('vendas_por_dia', filtro, lambda: self._vendas_por_dia(filtro))
+
+    def _vendas_por_dia(self, filtro: Filtro) -> pd.DataFrame:
+        selecao = self.posicoes(filtro)
+        datas, valores = self.datas[selecao], self.valores[selecao]
+        com_data = datas != _NAT
+        dias = datas[com_data] // _DIA_NS
+        if not len(dias):
+            return pd.DataFrame({'Data de venda': pd.to_datetime([]), 'Valor da compra': []})
+        primeiro = dias.min()
+        deslocados = dias - primeiro
+        soma = np.bincount(deslocados, weights=np.nan_to_num(valores[com_data]))
+        existentes = np.flatnonzero(np.bincount(deslocados))
+        return pd.DataFrame({
+            'Data de venda': pd.to_datetime((existentes + primeiro) * _DIA_NS),
+            'Valor da compra': soma[existentes],
+        })
+
+
+class IndiceAlugueis(_IndiceOrdenado):
+    """Índice de filtros dos aluguéis: data combinada, apartamento e valor do aluguel"""
+
+    def __init__(self, dados: pd.DataFrame, capacidade_cache: int = 32):
+        super().__init__(dados, 'datas_combinadas_pagamento', 'apartamento', 'valor_aluguel',
+                         capacidade_cache)
+        self.atrasos = self.agregado
+
+    def _coluna_agregada(self, dados: pd.DataFrame) -> pd.Series:
+        return (dados['datas_de_pagamento'] - dados['datas_combinadas_pagamento']).dt.days
+
+    def media_por_apartamento(self, filtro: Filtro) -> pd.Series:
+        return self._memorizar('media_por_apartamento', filtro,
+                               lambda: self._media_por_apartamento(self.posicoes(filtro))[0])
+
+    def _media_por_apartamento(self, selecao) -> Tuple[pd.Series, float]:
+        """Atraso médio de cada apartamento e atraso médio geral da seleção"""
+        soma, contagem, presentes = self._somas_por_chave(selecao)
+        media = np.divide(soma, contagem, out=np.full(len(soma), np.nan), where=contagem > 0)
+        if self._sem_chave:
+            # Pagamentos sem apartamento também entram na média geral
+            atrasos = self.atrasos[selecao]
+            atrasos = atrasos[~np.isnan(atrasos)]
+            media_geral = atrasos.mean() if len(atrasos) else np.nan
+        else:
+            media_geral = soma.sum() / contagem.sum() if contagem.any() else np.nan
+        return pd.Series(media[presentes], index=self.chaves[presentes], name='atraso'), media_geral
+
+    def relatorio(self, filtro: Filtro) -> Optional[RelatorioAlugueis]:
+        """RelatorioAlugueis das linhas filtradas (None se nenhum atraso puder ser calculado)"""
+        return self._memorizar('relatorio', filtro, lambda: self._relatorio(filtro))
+
+    def _relatorio(self, filtro: Filtro) -> Optional[RelatorioAlugueis]:
+        selecao = self.posicoes(filtro)
+        media_atraso, media_geral = self._media_por_apartamento(selecao)
+        ranking = maiores(media_atraso, 10)
+        mais_pontual = menores(media_atraso, 1)
+        if ranking.empty:
+            return None
+        sketch = self._sketch(selecao)
+        return RelatorioAlugueis(
+            apartamento_mais_atrasado=ranking.index[0],
+            atraso_maximo_medio=ranking.iloc[0],
+            apartamento_mais_pontual=mais_pontual.index[0],
+            atraso_minimo_medio=mais_pontual.iloc[0],
+            total_apartamentos=len(media_atraso),
+            atraso_medio_geral=media_geral,
+            distribuicao_pontualidade={faixa: int(mascara.sum()) for faixa, mascara
+                                       in faixas_pontualidade(media_atraso).items()},
+            ranking_atrasos=ranking.to_dict(),
+            percentis_atraso=sketch.percentis(),
+            histograma_atraso=sketch.histograma(),
+            percentis_ranking=self._percentis_por_chave(selecao, ranking.index),
+            alfa_percentis=sketch.alfa
+        )
+
+    def frequencias_atraso(self, filtro: Filtro) -> pd.Series:
+        """Quantidade de pagamentos por atraso (dias) na seleção"""
+        return self._memorizar('frequencias_atraso', filtro, lambda: self._frequencias_atraso(filtro))
+
+    def _frequencias_atraso(self, filtro: Filtro) -> pd.Series:
+        atrasos = self.atrasos[self.posicoes(filtro)]
+        atrasos = atrasos[~np.isnan(atrasos)].astype(np.int64)
+        if not len(atrasos):
+            return pd.Series([], dtype=np.int64, name='contagem')
+        menor = atrasos.min()
+        contagem = np.bincount(atrasos - menor)
+        existentes = np.flatnonzero(contagem)
+        return pd.Series(contagem[existentes], index=pd.Index(existentes + menor, name='atraso'),
+                         name='contagem')
@@ -0,0 +1,233 @@
+# src/instrumentacao.py
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Etapa:
+    """Intervalo medido: tempo de parede, tempo de CPU, linhas e pico de memória"""
+
+    def __init__(self, rastreador: 'Rastreador', coleta: '_Coleta', nome: str, linhas_entrada: Optional[int]):
+        self._rastreador = rastreador
+        self._coleta = coleta
+        self.nome = nome
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida: Optional[int] = None
+        self.thread = threading.get_ident()
+        self.profundidade = 0
+        self.inicio = 0.0
+        self.duracao = 0.0
+        self.cpu = 0.0
+        self.pico_memoria: Optional[int] = None
+
+    def __enter__(self) -> 'Etapa':
+        pilha = self._rastreador._pilha()
+        self.profundidade = len(pilha)
+        pilha.append(self)
+        if self._coleta.memoria and tracemalloc.is_tracing():
+            if len(pilha) > 1 and pilha[-2].pico_memoria is not None:
+                # Guarda o pico do pai antes de reiniciá-lo para esta etapa
+                pai = pilha[-2]
+                pai.pico_memoria = max(pai.pico_memoria,
+                                       tracemalloc.get_traced_memory()[1] - pai._memoria_inicial)
+            tracemalloc.reset_peak()
+            self.pico_memoria = 0
+            self._memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self._cpu_inicial = time.thread_time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.duracao = time.perf_counter() - self.inicio
+        self.cpu = time.thread_time() - self._cpu_inicial
+        pilha = self._rastreador._pilha()
+        pilha.pop()
+        if self.pico_memoria is not None:
+            # O pico é reiniciado por cada etapa interna; elas repassam o seu ao pai
+            pico = tracemalloc.get_traced_memory()[1] - self._memoria_inicial
+            self.pico_memoria = max(self.pico_memoria, pico)
+            if pilha and pilha[-1].pico_memoria is not None:
+                pai = pilha[-1]
+                pai.pico_memoria = max(pai.pico_memoria, self.pico_memoria +
+                                       self._memoria_inicial - pai._memoria_inicial)
+        self._coleta.registrar(self)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            'nome': self.nome,
+            'inicio_s': self.inicio - self._coleta.origem,
+            'duracao_s': self.duracao,
+            'cpu_s': self.cpu,
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'pico_memoria_mb': None if self.pico_memoria is None else self.pico_memoria / 2**20,
+            'thread': self.thread,
+            'profundidade': self.profundidade,
+        }
+
+
+class _EtapaNula:
+    """Etapa usada com a instrumentação desligada: não mede nem guarda nada"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_EtapaNula':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        pass
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Coleta:
+    """Etapas de uma sessão instrumentada (uma execução do app, por exemplo)"""
+
+    def __init__(self, memoria: bool):
+        self.memoria = memoria
+        self.origem = time.perf_counter()
+        self.etapas: List[Etapa] = []
+        self._trava = threading.Lock()
+
+    def registrar(self, etapa: Etapa) -> None:
+        with self._trava:
+            self.etapas.append(etapa)
+
+    def concluidas(self) -> List[Etapa]:
+        with self._trava:
+            return list(self.etapas)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self.etapas = []
+            self.origem = time.perf_counter()
+
+
+class Rastreador:
+    """Coleta etapas do pipeline (carga, análise, gráficos) para diagnóstico
+
+    Desligado por padrão: `etapa()` devolve um objeto nulo compartilhado e o
+    custo se resume a uma consulta de ContextVar. `ativar()` liga a coleta só
+    no contexto atual (a thread de uma sessão do Streamlit, por exemplo):
+    sessões simultâneas têm cada uma as suas etapas e não ligam, desligam nem
+    limpam as das outras. Threads de trabalho herdam a coleta quando a tarefa
+    é submetida com `contextvars.copy_context().run`. Com
+    `ativar(memoria=True)` o pico de memória de cada etapa é medido com
+    tracemalloc, que deixa o código bem mais lento (e, sendo global, mede
+    também o que as outras sessões alocam); use só para investigar consumo
+    de memória.
+    """
+
+    def __init__(self):
+        self._coleta: contextvars.ContextVar[Optional[_Coleta]] = contextvars.ContextVar(
+            'coleta_etapas', default=None)
+        self._sessoes_memoria = 0
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def ativo(self) -> bool:
+        return self._coleta.get() is not None
+
+    def ativar(self, memoria: bool = False) -> None:
+        """Começa uma coleta nova no contexto atual"""
+        self.desativar()
+        if memoria:
+            with self._trava:
+                self._sessoes_memoria += 1
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+        self._coleta.set(_Coleta(memoria))
+
+    def desativar(self) -> None:
+        """Para a coleta do contexto atual"""
+        coleta = self._coleta.get()
+        if coleta is None:
+            return
+        self._coleta.set(None)
+        if coleta.memoria:
+            with self._trava:
+                self._sessoes_memoria -= 1
+                # tracemalloc é do processo: só para quando nenhuma sessão o usa
+                if not self._sessoes_memoria and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+
+    def limpar(self) -> None:
+        """Descarta as etapas coletadas no contexto atual e reinicia a origem do tempo"""
+        coleta = self._coleta.get()
+        if coleta is not None:
+            coleta.limpar()
+
+    def etapa(self, nome: str, linhas_entrada: Optional[int] = None):
+        """Context manager que mede o bloco; atribua `linhas_saida` dentro dele"""
+        coleta = self._coleta.get()
+        if coleta is None:
+            return _ETAPA_NULA
+        return Etapa(self, coleta, nome, linhas_entrada)
+
+    def _pilha(self) -> List[Etapa]:
+        if not hasattr(self._local, 'pilha'):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @property
+    def etapas(self) -> List[Dict[str, Any]]:
+        """Etapas concluídas no contexto atual, em ordem de início"""
+        coleta = self._coleta.get()
+        if coleta is None:
+            return []
+        return [e.como_dict() for e in sorted(coleta.concluidas(), key=lambda e: e.inicio)]
+
+    def exportar_json(self, caminho: str) -> None:
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.etapas, arquivo, indent=2, ensure_ascii=False)
+
+    def exportar_chrome_trace(self, caminho: Optional[str] = None) -> Dict[str, Any]:
+        """Formato de eventos do Chrome (chrome://tracing, Perfetto); grava se `caminho` for dado"""
+        eventos = []
+        for etapa in self.etapas:
+            argumentos = {k: etapa[k] for k in ('cpu_s', 'linhas_entrada', 'linhas_saida', 'pico_memoria_mb')
+                          if etapa[k] is not None}
+            eventos.append({
+                'name': etapa['nome'],
+                'ph': 'X',
+                'ts': etapa['inicio_s'] * 1e6,
+                'dur': etapa['duracao_s'] * 1e6,
+                'pid': os.getpid(),
+                'tid': etapa['thread'],
+                'args': argumentos,
+            })
+        trace = {'traceEvents': eventos, 'displayTimeUnit': 'ms'}
+        if caminho:
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump(trace, arquivo)
+        return trace
+
+
+# Instância compartilhada por todo o pacote
+rastreador = Rastreador()
+
+
+def rastrear(nome: Optional[str] = None) -> Callable:
+    """Decorador que mede cada chamada da função como uma etapa"""
+    def decorador(funcao: Callable) -> Callable:
+        rotulo = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def embrulho(*args, **kwargs):
+            if not rastreador.ativo:
+                return funcao(*args, **kwargs)
+            with rastreador.etapa(rotulo):
+                return funcao(*args, **kwargs)
+        return embrulho
+    return decorador
@@ -0,0 +1,107 @@
+# src/json_stream.py
+
+import json
+from typing import IO, Any, Iterator, List
+
+
+class LeitorJSONIncremental:
+    """Percorre um documento JSON lendo o arquivo em pedaços.
+
+    Só o registro em decodificação e o pedaço corrente ficam em memória,
+    o que permite iterar arrays de vários GB com consumo limitado.
+    """
+
+    ESPACOS = ' \t\n\r'
+    # Caracteres que ainda podem continuar um número ('1.' ou '2e' seguidos de dígitos)
+    CONTINUACAO_NUMERO = frozenset('0123456789.eE+-')
+
+    def __init__(self, arquivo: IO[str], tamanho_leitura: int = 1 << 20):
+        self.arquivo = arquivo
+        self.tamanho_leitura = tamanho_leitura
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.fim = False
+
+    def _ler_mais(self) -> bool:
+        """Descarta o trecho já consumido e lê o próximo pedaço do arquivo"""
+        pedaco = self.arquivo.read(self.tamanho_leitura)
+        if not pedaco:
+            self.fim = True
+            return False
+        self.buffer = self.buffer[self.pos:] + pedaco
+        self.pos = 0
+        return True
+
+    def _espiar(self) -> str:
+        """Retorna o próximo caractere significativo sem consumi-lo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._ler_mais():
+                raise ValueError("Fim inesperado do documento JSON")
+
+    def _consumir(self, esperado: str) -> None:
+        caractere = self._espiar()
+        if caractere != esperado:
+            raise ValueError(f"JSON inválido: esperado '{esperado}', encontrado '{caractere}'")
+        self.pos += 1
+
+    def _decodificar_valor(self) -> Any:
+        """Decodifica o próximo valor completo, lendo mais dados se necessário"""
+        self._espiar()
+        while True:
+            try:
+                valor, fim_valor = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fim or not self._ler_mais():
+                    raise
+                continue
+            # Um número no fim do buffer pode estar truncado, inclusive antes
+            # de um '.' ou 'e' cujos dígitos ainda não foram lidos
+            if not self.fim and self._pode_continuar(valor, fim_valor) and self._ler_mais():
+                continue
+            self.pos = fim_valor
+            return valor
+
+    def _pode_continuar(self, valor: Any, fim_valor: int) -> bool:
+        if fim_valor == len(self.buffer):
+            return True
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            return False
+        # Só relê o resto do buffer quando o número é seguido de um '.', 'e' ou sinal
+        return (self.buffer[fim_valor] in self.CONTINUACAO_NUMERO and
+                self.CONTINUACAO_NUMERO.issuperset(self.buffer[fim_valor:]))
+
+    def iterar_array(self, chave: str) -> Iterator[Any]:
+        """Itera os elementos do array associado a `chave` no objeto raiz"""
+        self._consumir('{')
+        while self._espiar() != '}':
+            nome = self._decodificar_valor()
+            self._consumir(':')
+            if nome == chave:
+                self._consumir('[')
+                while self._espiar() != ']':
+                    yield self._decodificar_valor()
+                    if self._espiar() == ',':
+                        self.pos += 1
+                return
+            # Ignora os demais campos do objeto raiz
+            self._decodificar_valor()
+            if self._espiar() == ',':
+                self.pos += 1
+        raise ValueError(f"Chave '{chave}' não encontrada no JSON")
+
+
+def iterar_blocos(arquivo: IO[str], chave: str, tamanho_bloco: int) -> Iterator[List[Any]]:
+    """Agrupa os elementos do array `chave` em listas de até `tamanho_bloco` itens"""
+    bloco = []
+    for registro in LeitorJSONIncremental(arquivo).iterar_array(chave):
+        bloco.append(registro)
+        if len(bloco) >= tamanho_bloco:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
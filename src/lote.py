@@ -0,0 +1,218 @@
+# src/lote.py
+"""Geração de relatórios e gráficos em lote, sem interface (não importa streamlit).
+
+Lê um manifesto JSON com os conjuntos de dados e processa cada um num
+processo separado, gravando em `<saida>/<nome>/` o relatório em JSON e os
+gráficos em PNG. A execução é retomável: um conjunto cuja configuração e
+conteúdo não mudaram desde a última geração bem-sucedida é pulado.
+
+Formato do manifesto:
+    {"itens": [{"nome": "vendas", "tipo": "vendas", "config": {...DataLoaderConfig...}}]}
+
+Uso:
+    python -m src.lote manifesto.json [--saida relatorios] [--processos 2]
+                       [--memoria-mb 2048] [--forcar]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: sem limite de memória por processo
+    resource = None
+
+from .models import ItemLote, ManifestoLote
+
+ARQUIVO_ESTADO = '_estado.json'
+ARQUIVO_RESUMO = '_resumo.json'
+# Incrementar quando o formato da saída mudar, para invalidar gerações antigas
+VERSAO_SAIDA = 2
+
+GRAFICOS = {
+    'vendas': ('plot_top_clientes', 'plot_vendas_por_dia', 'plot_estatisticas_resumo'),
+    'locacao': ('plot_distribuicao_atrasos', 'plot_ranking_apartamentos', 'plot_dashboard_alugueis'),
+}
+
+
+def carregar_manifesto(caminho: str) -> ManifestoLote:
+    """Lê e valida o manifesto; caminhos locais relativos partem da pasta do manifesto"""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        manifesto = ManifestoLote.model_validate(json.load(arquivo))
+    base = os.path.dirname(os.path.abspath(caminho))
+    for item in manifesto.itens:
+        url = item.config.url
+        if not url.startswith(('http://', 'https://')) and not os.path.isabs(url):
+            item.config.url = os.path.join(base, url)
+    return manifesto
+
+
+def impressao_digital(item: ItemLote, conteudo: bytes) -> str:
+    """Hash de tudo que determina a saída: tipo, configuração e conteúdo da fonte"""
+    chave = hashlib.sha256()
+    chave.update(f'{VERSAO_SAIDA}:{item.tipo}:'.encode('utf-8'))
+    chave.update(item.config.model_dump_json().encode('utf-8'))
+    chave.update(hashlib.sha256(conteudo).digest())
+    return chave.hexdigest()
+
+
+def _ler_estado(diretorio: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_ESTADO), 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_json(caminho: str, dados: Any) -> None:
+    """Grava de forma atômica, para que uma interrupção não deixe arquivos pela metade"""
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def _limitar_memoria(memoria_mb: Optional[int]) -> None:
+    """Inicializador dos processos: limita o espaço de endereçamento de cada um"""
+    if memoria_mb and resource is not None:
+        limite = memoria_mb * 2**20
+        _, maximo = resource.getrlimit(resource.RLIMIT_AS)
+        if maximo != resource.RLIM_INFINITY:
+            limite = min(limite, maximo)
+        resource.setrlimit(resource.RLIMIT_AS, (limite, maximo))
+
+
+def _gerar_saidas(item: ItemLote, loader, conteudo: bytes, diretorio: str) -> List[str]:
+    """Carrega, analisa e grava relatório e gráficos de um conjunto"""
+    # Importados aqui: o processo pai só lê manifestos e distribui o trabalho
+    import matplotlib
+    matplotlib.use('Agg')
+    from .analytics import AnalisadorVendas, AnalisadorAluguel
+    from .visualizations import VisualizadorVendas, VisualizadorAlugueis
+
+    dados = loader.carregar_dados(item.config, conteudo=conteudo)
+    if item.tipo == 'vendas':
+        dados = loader.preparar_vendas(dados)
+        relatorio = AnalisadorVendas(dados).gerar_relatorio()
+        visualizador = VisualizadorVendas(relatorio, dados)
+    else:
+        dados = loader.preparar_locacao(dados)
+        analisador = AnalisadorAluguel(dados)
+        relatorio = analisador.gerar_relatorio()
+        visualizador = VisualizadorAlugueis(relatorio, dados, cubo=analisador.obter_cubo(),
+                                            media_por_apartamento=analisador.calcular_media_atraso_por_apartamento())
+
+    arquivos = ['relatorio.json']
+    temporario = os.path.join(diretorio, f'relatorio.json.{os.getpid()}.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(relatorio.model_dump_json(indent=2))
+    os.replace(temporario, os.path.join(diretorio, 'relatorio.json'))
+
+    for nome in GRAFICOS[item.tipo]:
+        figura = getattr(visualizador, nome)()
+        arquivo = f"{nome.removeprefix('plot_')}.png"
+        figura.savefig(os.path.join(diretorio, arquivo), format='png', dpi=100)
+        figura.clear()
+        arquivos.append(arquivo)
+    return arquivos
+
+
+def processar_item(item: ItemLote, saida: str, forcar: bool = False) -> Dict[str, Any]:
+    """Gera as saídas de um conjunto, ou o pula se as entradas não mudaram
+
+    Executado nos processos de trabalho; erros viram um resultado 'falhou' para
+    que um conjunto ruim não interrompa o lote.
+    """
+    from .cache_dados import CacheDados
+    from .data_loader import DataLoader
+
+    inicio = time.perf_counter()
+    diretorio = os.path.join(saida, item.nome)
+    resultado = {'nome': item.nome, 'tipo': item.tipo}
+    try:
+        # Sem o cache compartilhado: o processo é reaproveitado entre conjuntos e
+        # não deve manter os anteriores vivos sob o limite de `--memoria-mb`
+        loader = DataLoader(cache=CacheDados(0))
+        conteudo = loader.ler_conteudo(item.config.url)
+        impressao = impressao_digital(item, conteudo)
+        estado = _ler_estado(diretorio)
+        if not forcar and estado is not None and estado.get('impressao') == impressao:
+            resultado['situacao'] = 'inalterado'
+        else:
+            os.makedirs(diretorio, exist_ok=True)
+            # O estado antigo sai antes de sobrescrever: uma falha no meio força nova geração
+            if estado is not None:
+                os.remove(os.path.join(diretorio, ARQUIVO_ESTADO))
+            arquivos = _gerar_saidas(item, loader, conteudo, diretorio)
+            _gravar_json(os.path.join(diretorio, ARQUIVO_ESTADO),
+                         {'impressao': impressao, 'arquivos': arquivos,
+                          'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S')})
+            resultado['situacao'] = 'gerado'
+    except MemoryError:
+        resultado.update(situacao='falhou', erro='Limite de memória excedido')
+    except Exception as e:
+        resultado.update(situacao='falhou', erro=f'{type(e).__name__}: {e}')
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def executar_lote(manifesto: ManifestoLote, saida: str, processos: Optional[int] = None,
+                  memoria_mb: Optional[int] = None, forcar: bool = False) -> List[Dict[str, Any]]:
+    """Processa os itens do manifesto em paralelo e grava o resumo em `<saida>/_resumo.json`
+
+    `processos` limita quantos conjuntos ficam carregados ao mesmo tempo e
+    `memoria_mb` limita a memória de cada processo (em sistemas com `resource`).
+    """
+    os.makedirs(saida, exist_ok=True)
+    itens = manifesto.itens
+    processos = max(1, min(processos or os.cpu_count() or 1, len(itens) or 1))
+    resultados = []
+    with ProcessPoolExecutor(max_workers=processos, initializer=_limitar_memoria,
+                             initargs=(memoria_mb,)) as executor:
+        futuros = {executor.submit(processar_item, item, saida, forcar): item for item in itens}
+        for futuro in as_completed(futuros):
+            item = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # Processo encerrado à força (ex.: morto pelo sistema por falta de memória)
+                resultado = {'nome': item.nome, 'tipo': item.tipo, 'situacao': 'falhou',
+                             'erro': f'{type(e).__name__}: {e}'}
+            resultados.append(resultado)
+            detalhe = f" ({resultado['erro']})" if 'erro' in resultado else ''
+            print(f"{resultado['nome']:<30} {resultado['situacao']}{detalhe}", file=sys.stderr)
+
+    ordem = {item.nome: i for i, item in enumerate(itens)}
+    resultados.sort(key=lambda r: ordem[r['nome']])
+    _gravar_json(os.path.join(saida, ARQUIVO_RESUMO), resultados)
+    return resultados
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifesto')
+    parser.add_argument('--saida', default='relatorios')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='conjuntos processados ao mesmo tempo (padrão: núcleos da máquina)')
+    parser.add_argument('--memoria-mb', type=int, default=None,
+                        help='limite de memória de cada processo, em MB')
+    parser.add_argument('--forcar', action='store_true', help='gera tudo de novo, mesmo sem mudanças')
+    argumentos = parser.parse_args(argv)
+
+    manifesto = carregar_manifesto(argumentos.manifesto)
+    resultados = executar_lote(manifesto, argumentos.saida, argumentos.processos,
+                               argumentos.memoria_mb, argumentos.forcar)
+    falhas = sum(r['situacao'] == 'falhou' for r in resultados)
+    print(f'{len(resultados) - falhas} concluído(s), {falhas} falha(s); resumo em '
+          f'{os.path.join(argumentos.saida, ARQUIVO_RESUMO)}')
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # src/models.py
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 
 class DataLoaderConfig(BaseModel):
@@ -10,6 +10,32 @@ class DataLoaderConfig(BaseModel):
     chave: str
     coluna_valor: str
     prefixos_remover: Optional[List[str]] = []
+    sufixos_remover: Optional[List[str]] = []
+    separador_decimal: str = ','
+    separador_milhar: Optional[str] = None
+    # Representação compacta (opcional): colunas-chave como categóricas
+    colunas_categoricas: Optional[List[str]] = []
+    valor_float32: bool = False
+
+class ItemLote(BaseModel):
+    """Conjunto de dados de um manifesto de geração em lote."""
+    nome: str = Field(..., min_length=1)
+    tipo: Literal['vendas', 'locacao']
+    config: DataLoaderConfig
+
+class ManifestoLote(BaseModel):
+    """Manifesto com os conjuntos de dados a processar em lote."""
+    itens: List[ItemLote]
+
+    @field_validator('itens')
+    @classmethod
+    def nomes_unicos(cls, v: List[ItemLote]) -> List[ItemLote]:
+        """Cada conjunto grava numa pasta própria, nomeada pelo item."""
+        nomes = [item.nome for item in v]
+        repetidos = sorted({nome for nome in nomes if nomes.count(nome) > 1})
+        if repetidos:
+            raise ValueError(f"Nomes repetidos no manifesto: {', '.join(repetidos)}")
+        return v
 
 class VendaModel(BaseModel):
     """Modelo para dados de venda."""
@@ -41,6 +67,11 @@ class LocacaoModel(BaseModel):
         """Calcula atraso em dias."""
         return (self.data_pagamento - self.data_combinada_pagamento).days
 
+class Histograma(BaseModel):
+    """Histograma aproximado: `contagens[i]` valores em [limites[i], limites[i+1])."""
+    limites: List[float]
+    contagens: List[int]
+
 class RelatorioVendas(BaseModel):
     """Modelo para relatório de vendas."""
     cliente_vencedor: str
@@ -52,6 +83,11 @@ class RelatorioVendas(BaseModel):
     top_5_clientes: Dict[str, float]
     data_inicio: datetime
     data_fim: datetime
+    # Percentis aproximados (sketch_quantis): erro relativo ≤ alfa_percentis
+    percentis_valor_compra: Dict[str, float] = {}
+    histograma_valor_compra: Optional[Histograma] = None
+    percentis_top_clientes: Dict[str, Dict[str, float]] = {}
+    alfa_percentis: Optional[float] = None
 
 class RelatorioAlugueis(BaseModel):
     """Modelo para relatório de aluguéis."""
@@ -63,3 +99,8 @@ class RelatorioAlugueis(BaseModel):
     atraso_medio_geral: float
     distribuicao_pontualidade: Dict[str, int]
     ranking_atrasos: Dict[str, float]
+    # Percentis aproximados (sketch_quantis): erro relativo ≤ alfa_percentis
+    percentis_atraso: Dict[str, float] = {}
+    histograma_atraso: Optional[Histograma] = None
+    percentis_ranking: Dict[str, Dict[str, float]] = {}
+    alfa_percentis: Optional[float] = None
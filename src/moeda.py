@@ -0,0 +1,64 @@
+# src/moeda.py
+
+import re
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class ResultadoConversao(NamedTuple):
+    """Valores convertidos e quantidade de entradas que não puderam ser lidas."""
+    valores: np.ndarray
+    falhas: int
+
+
+# Número decimal já normalizado (ponto como separador decimal); 'nan' e 'inf'
+# também valem, como no cast do Arrow e no pd.to_numeric
+PADRAO_NUMERO = r'^[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|(?i:nan|inf|infinity))$'
+
+
+def converter_valores_monetarios(valores: pd.Series,
+                                 prefixos: Iterable[str] = (),
+                                 sufixos: Iterable[str] = (),
+                                 separador_decimal: str = ',',
+                                 separador_milhar: Optional[str] = None) -> ResultadoConversao:
+    """Converte textos monetários (ex.: 'R$ 1.234,56') para float64
+
+    Os textos são levados para um buffer de strings do Arrow e todos os
+    prefixos, sufixos, separadores de milhar e espaços saem em uma única
+    substituição por expressão regular, sem criar objetos Python por linha.
+    Valores presentes que não formam um número são contados em `falhas`
+    e viram NaN; valores ausentes na entrada não contam como falha.
+    """
+    if pd.api.types.is_numeric_dtype(valores.dtype):
+        return ResultadoConversao(valores.to_numpy(dtype='float64', na_value=np.nan), 0)
+
+    try:
+        textos = pa.array(valores, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Colunas mistas: números já estão prontos e só os textos passam pela limpeza
+        eh_texto = valores.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        numeros = pd.to_numeric(valores.where(~eh_texto), errors='coerce').to_numpy(dtype='float64')
+        resultado = converter_valores_monetarios(valores.where(eh_texto), prefixos, sufixos,
+                                                 separador_decimal, separador_milhar)
+        return ResultadoConversao(np.where(eh_texto, resultado.valores, numeros), resultado.falhas)
+
+    remover = [t for t in [*prefixos, *sufixos, separador_milhar] if t]
+    padrao = '|'.join([re.escape(t) for t in remover] + [r'\s+'])
+    limpos = pc.replace_substring_regex(textos, pattern=padrao, replacement='')
+    if separador_decimal != '.':
+        limpos = pc.replace_substring(limpos, pattern=separador_decimal, replacement='.')
+
+    try:
+        numeros = pc.cast(limpos, pa.float64())
+        falhas = 0
+    except pa.ArrowInvalid:
+        # Só quando há entradas inválidas pagamos a validação explícita
+        validos = pc.match_substring_regex(limpos, pattern=PADRAO_NUMERO)
+        falhas = pc.sum(pc.invert(validos)).as_py() or 0
+        numeros = pc.cast(pc.if_else(validos, limpos, pa.scalar(None, pa.string())), pa.float64())
+
+    return ResultadoConversao(numeros.to_numpy(zero_copy_only=False), falhas)
@@ -0,0 +1,170 @@
+# src/paralelo.py
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .sketch_quantis import SketchQuantis, SketchesPorChave, codificar
+
+# Limites das faixas de pontualidade (mesmos de classificar_apartamentos)
+LIMITES_FAIXAS = (0, 5, 15)
+FAIXAS = ('pontuais', 'atraso_leve', 'atraso_moderado', 'atraso_severo')
+# Abaixo disto o pool de processos custa mais do que economiza
+LINHAS_MINIMAS_PARALELO = 500_000
+
+
+class AgregadosAtraso(NamedTuple):
+    """Agregados de atraso por apartamento, combináveis entre shards
+
+    Os vetores são indexados pelo código do apartamento em `apartamentos`.
+    `faixas` conta, por apartamento, os pagamentos em cada faixa de FAIXAS.
+    Os totais gerais e o sketch de quantis dos atrasos incluem pagamentos
+    sem apartamento informado; `sketches` tem os sketches por apartamento.
+    """
+    apartamentos: pd.Index
+    soma: np.ndarray
+    contagem: np.ndarray
+    minimo: np.ndarray
+    maximo: np.ndarray
+    faixas: np.ndarray
+    soma_geral: float
+    contagem_geral: int
+    sketch: Optional[SketchQuantis] = None
+    sketches: Optional[SketchesPorChave] = None
+
+    def media_por_apartamento(self) -> pd.Series:
+        media = np.divide(self.soma, self.contagem, out=np.full(len(self.soma), np.nan),
+                          where=self.contagem > 0)
+        return pd.Series(media, index=self.apartamentos, name='atraso')
+
+    def media_geral(self) -> float:
+        return self.soma_geral / self.contagem_geral if self.contagem_geral else float('nan')
+
+
+def agregar_atrasos_paralelo(dados: pd.DataFrame, processos: int) -> AgregadosAtraso:
+    """Calcula os agregados de atraso particionando os apartamentos entre processos
+
+    O processo pai ordena as linhas por shard (código % processos) uma única
+    vez e grava as colunas necessárias, nessa ordem, como arrays NumPy
+    mapeados em memória; cada processo lê só a faixa contígua do seu shard
+    e devolve os agregados parciais, que o pai apenas redistribui. Abaixo de
+    LINHAS_MINIMAS_PARALELO linhas (ou com um processo) o custo de criar o
+    pool supera o ganho e tudo é calculado no próprio processo; também
+    nunca são usados mais processos que CPUs.
+    """
+    processos = min(processos, os.cpu_count() or 1)
+    codigos, apartamentos = pd.factorize(dados['apartamento'])
+    pagamento = dados['datas_de_pagamento'].to_numpy()
+    combinada = dados['datas_combinadas_pagamento'].to_numpy()
+    total = len(apartamentos)
+    apartamentos = pd.Index(apartamentos, name='apartamento')
+
+    if processos <= 1 or len(dados) < LINHAS_MINIMAS_PARALELO:
+        parciais = [_agregar_linhas(codigos, pagamento, combinada, 0, 1, total)]
+        return _combinar(apartamentos, parciais)
+
+    # Pagamentos sem apartamento (código -1) só entram nos totais gerais, pelo shard 0
+    shards = np.where(codigos >= 0, codigos % processos, 0).astype(np.min_scalar_type(processos))
+    # Ordenação estável de inteiros pequenos: radix sort, O(n)
+    ordem = np.argsort(shards, kind='stable')
+    limites = np.searchsorted(shards[ordem], np.arange(processos + 1))
+    colunas = {'codigos': codigos[ordem], 'pagamento': pagamento[ordem], 'combinada': combinada[ordem]}
+    del ordem, shards
+
+    with tempfile.TemporaryDirectory(prefix='atrasos-') as diretorio:
+        caminhos = {}
+        for nome, valores in colunas.items():
+            caminhos[nome] = os.path.join(diretorio, f'{nome}.npy')
+            np.save(caminhos[nome], valores)
+        del colunas
+
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            parciais = list(executor.map(_agregar_shard, [caminhos] * processos,
+                                         limites[:-1], limites[1:], range(processos),
+                                         [processos] * processos, [total] * processos))
+    return _combinar(apartamentos, parciais)
+
+
+def _combinar(apartamentos: pd.Index, parciais) -> AgregadosAtraso:
+    # Shards têm apartamentos disjuntos: a combinação é uma simples redistribuição
+    total = len(apartamentos)
+    soma = np.zeros(total)
+    contagem = np.zeros(total, dtype=np.int64)
+    minimo = np.full(total, np.nan)
+    maximo = np.full(total, np.nan)
+    faixas = np.zeros((total, len(FAIXAS)), dtype=np.int64)
+    for parcial in parciais:
+        chaves = parcial['chaves']
+        soma[chaves] = parcial['soma']
+        contagem[chaves] = parcial['contagem']
+        minimo[chaves] = parcial['minimo']
+        maximo[chaves] = parcial['maximo']
+        faixas[chaves] = parcial['faixas']
+    sketches = [p['sketches'] for p in parciais]
+    return AgregadosAtraso(apartamentos, soma, contagem, minimo, maximo, faixas,
+                           soma_geral=sum(p['soma_geral'] for p in parciais),
+                           contagem_geral=sum(p['contagem_geral'] for p in parciais),
+                           sketch=SketchQuantis.combinar_todos(p['sketch'] for p in parciais),
+                           sketches=SketchesPorChave.de_contagens(
+                               pd.Index(np.asarray(apartamentos, dtype=object), dtype=object), np.concatenate([s[0] for s in sketches]),
+                               np.concatenate([s[1] for s in sketches]),
+                               np.concatenate([s[2] for s in sketches])))
+
+
+def _agregar_shard(caminhos: Dict[str, str], inicio: int, fim: int, shard: int, total_shards: int,
+                   total_apartamentos: int) -> Dict[str, np.ndarray]:
+    """Agregados parciais de um shard, lendo só as linhas [inicio, fim) dos arrays mapeados"""
+    return _agregar_linhas(*(np.load(caminhos[nome], mmap_mode='r')[inicio:fim]
+                             for nome in ('codigos', 'pagamento', 'combinada')),
+                           shard, total_shards, total_apartamentos)
+
+
+def _agregar_linhas(codigos: np.ndarray, pagamento: np.ndarray, combinada: np.ndarray, shard: int,
+                    total_shards: int, total_apartamentos: int) -> Dict[str, np.ndarray]:
+    """Soma, contagem, min, max, faixas e sketches das linhas de um shard"""
+    validos = ~(np.isnat(pagamento) | np.isnat(combinada))
+    atraso = ((pagamento[validos] - combinada[validos]) // np.timedelta64(1, 'D')).astype(np.float64)
+    buckets = codificar(atraso)
+    soma_geral, contagem_geral = float(atraso.sum()), len(atraso)
+    sketch = SketchQuantis.de_codigos(buckets, atraso)
+
+    codigos_validos = np.asarray(codigos)[validos]
+    com_chave = codigos_validos >= 0
+    if not com_chave.all():
+        atraso, buckets, codigos_validos = atraso[com_chave], buckets[com_chave], codigos_validos[com_chave]
+    chaves = np.arange(shard, total_apartamentos, total_shards)
+    local = codigos_validos // total_shards if total_shards > 1 else codigos_validos
+    tamanho = len(chaves)
+
+    minimo = np.full(tamanho, np.inf)
+    maximo = np.full(tamanho, -np.inf)
+    np.minimum.at(minimo, local, atraso)
+    np.maximum.at(maximo, local, atraso)
+    contagem = np.bincount(local, minlength=tamanho)
+    vazios = contagem == 0
+    minimo[vazios] = np.nan
+    maximo[vazios] = np.nan
+
+    # Quantos limites ficam abaixo do atraso (o mesmo que searchsorted com side='left', sem busca)
+    faixa = sum((atraso > limite).view(np.int8) for limite in LIMITES_FAIXAS).astype(np.int64)
+    faixas = np.bincount(local * len(FAIXAS) + faixa,
+                         minlength=tamanho * len(FAIXAS)).reshape(tamanho, len(FAIXAS))
+    # Sketches por apartamento, com os códigos globais (as chaves dos shards não se repetem)
+    sketches = SketchesPorChave.de_codigos(pd.RangeIndex(tamanho), local, buckets)
+
+    return {
+        'chaves': chaves,
+        'soma': np.bincount(local, weights=atraso, minlength=tamanho),
+        'contagem': contagem,
+        'minimo': minimo,
+        'maximo': maximo,
+        'faixas': faixas,
+        'soma_geral': soma_geral,
+        'contagem_geral': contagem_geral,
+        'sketch': sketch,
+        'sketches': (chaves[sketches.codigo_chave], sketches.codigos, sketches.contagens),
+    }
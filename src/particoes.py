@@ -0,0 +1,137 @@
+# src/particoes.py
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+class ArmazemParticionado:
+    """Dados persistidos em partições mensais de Parquet, com estatísticas por partição
+
+    Cada mês de `coluna_data` vira um arquivo próprio e um índice JSON guarda o
+    número de linhas e as datas mínima e máxima de cada partição. Consultas por
+    intervalo de datas leem apenas as partições que se sobrepõem ao intervalo.
+    """
+
+    ARQUIVO_ESTATISTICAS = '_estatisticas.json'
+    SEM_DATA = 'sem_data'
+
+    def __init__(self, diretorio: str, coluna_data: str):
+        self.diretorio = diretorio
+        self.coluna_data = coluna_data
+        self._estatisticas: Optional[Dict[str, dict]] = None
+
+    @property
+    def estatisticas(self) -> Dict[str, dict]:
+        """Linhas e datas mínima/máxima de cada partição, indexadas pelo mês"""
+        if self._estatisticas is None:
+            caminho = os.path.join(self.diretorio, self.ARQUIVO_ESTATISTICAS)
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(f"Nenhuma partição gravada em '{self.diretorio}'")
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                self._estatisticas = json.load(arquivo)
+        return self._estatisticas
+
+    def gravar(self, df: pd.DataFrame) -> None:
+        """Substitui o conteúdo do armazém pelas partições mensais de `df`
+
+        As partições são gravadas num diretório temporário ao lado do destino,
+        que só toma o lugar do armazém anterior depois de completo: uma falha
+        no meio deixa o armazém antigo intacto. Um diretório existente que
+        não seja um armazém (sem o arquivo de estatísticas) não é apagado.
+        """
+        if self.coluna_data not in df.columns:
+            raise KeyError(f"Coluna '{self.coluna_data}' não encontrada")
+        diretorio = os.path.abspath(self.diretorio)
+        if (os.path.exists(diretorio) and not
+                os.path.exists(os.path.join(diretorio, self.ARQUIVO_ESTATISTICAS)) and
+                (not os.path.isdir(diretorio) or os.listdir(diretorio))):
+            raise FileExistsError(f"'{self.diretorio}' existe e não é um armazém de partições")
+
+        pai, nome = os.path.split(diretorio)
+        os.makedirs(pai, exist_ok=True)
+        temporario = tempfile.mkdtemp(prefix=f'.{nome}.', suffix='.tmp', dir=pai)
+        try:
+            estatisticas = self._gravar_particoes(df, temporario)
+            if os.path.exists(diretorio):
+                # Dois renomeios: o diretório antigo sai de lado e o novo entra no lugar
+                antigo = tempfile.mkdtemp(prefix=f'.{nome}.', suffix='.antigo', dir=pai)
+                os.replace(diretorio, antigo)
+                os.replace(temporario, diretorio)
+                shutil.rmtree(antigo, ignore_errors=True)
+            else:
+                os.replace(temporario, diretorio)
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+        self._estatisticas = estatisticas
+
+    def _gravar_particoes(self, df: pd.DataFrame, diretorio: str) -> Dict[str, dict]:
+        datas = df[self.coluna_data]
+        meses = datas.dt.strftime('%Y-%m').fillna(self.SEM_DATA)
+        estatisticas = {}
+        for mes, grupo in df.groupby(meses, sort=True):
+            arquivo = f'mes={mes}.parquet'
+            grupo.to_parquet(os.path.join(diretorio, arquivo), index=False)
+            datas_grupo = grupo[self.coluna_data]
+            estatisticas[mes] = {
+                'arquivo': arquivo,
+                'linhas': len(grupo),
+                'data_min': None if mes == self.SEM_DATA else datas_grupo.min().isoformat(),
+                'data_max': None if mes == self.SEM_DATA else datas_grupo.max().isoformat()
+            }
+        with open(os.path.join(diretorio, self.ARQUIVO_ESTATISTICAS), 'w', encoding='utf-8') as arquivo:
+            json.dump(estatisticas, arquivo, indent=2)
+        return estatisticas
+
+    def particoes(self, inicio: Optional[pd.Timestamp] = None,
+                  fim: Optional[pd.Timestamp] = None) -> List[str]:
+        """Meses cujas datas se sobrepõem a [inicio, fim]
+
+        Sem limites, todas as partições (inclusive a de datas ausentes) entram.
+        """
+        if inicio is None and fim is None:
+            return list(self.estatisticas)
+
+        selecionadas = []
+        for mes, estatistica in self.estatisticas.items():
+            if estatistica['data_min'] is None:
+                continue
+            if inicio is not None and pd.Timestamp(estatistica['data_max']) < inicio:
+                continue
+            if fim is not None and pd.Timestamp(estatistica['data_min']) > fim:
+                continue
+            selecionadas.append(mes)
+        return selecionadas
+
+    def data_maxima(self) -> Optional[pd.Timestamp]:
+        """Data mais recente armazenada, obtida só das estatísticas"""
+        maximas = [e['data_max'] for e in self.estatisticas.values() if e['data_max'] is not None]
+        return pd.Timestamp(max(maximas)) if maximas else None
+
+    def ler(self, inicio: Optional[pd.Timestamp] = None, fim: Optional[pd.Timestamp] = None,
+            colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lê as linhas com `coluna_data` em [inicio, fim], abrindo só as partições necessárias"""
+        inicio = pd.Timestamp(inicio) if inicio is not None else None
+        fim = pd.Timestamp(fim) if fim is not None else None
+
+        if colunas is not None and self.coluna_data not in colunas:
+            colunas = [*colunas, self.coluna_data]
+        partes = [pd.read_parquet(os.path.join(self.diretorio, self.estatisticas[mes]['arquivo']),
+                                  columns=colunas)
+                  for mes in self.particoes(inicio, fim)]
+        if not partes:
+            raise ValueError("Nenhum dado no período solicitado")
+        df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+        # Partições das pontas podem conter linhas fora do intervalo
+        mascara = pd.Series(True, index=df.index)
+        if inicio is not None:
+            mascara &= df[self.coluna_data] >= inicio
+        if fim is not None:
+            mascara &= df[self.coluna_data] <= fim
+        return df if mascara.all() else df[mascara].reset_index(drop=True)
@@ -0,0 +1,308 @@
+# src/servidor_relatorios.py
+"""Serviço HTTP local que carrega os dados uma vez e serve relatórios e gráficos.
+
+Várias réplicas do dashboard podem consumir o mesmo serviço em vez de cada
+uma baixar, limpar e analisar os dados. Os conjuntos vêm de um manifesto no
+mesmo formato do `src.lote`. Os resultados ficam em cache com prazo de
+validade (TTL), e pedidos simultâneos do mesmo recurso esperam uma única
+computação.
+
+Rotas (só GET):
+    /saude                          situação do serviço
+    /conjuntos                      nomes, tipos e gráficos disponíveis
+    /relatorios/<nome>              RelatorioVendas/RelatorioAlugueis em JSON
+    /graficos/<nome>/<grafico>.png  gráfico renderizado (nomes como no lote)
+    /estatisticas                   contadores do cache
+
+Uso:
+    python -m src.servidor_relatorios manifesto.json [--host 127.0.0.1]
+                       [--porta 8765] [--ttl 300]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .models import ItemLote
+from .lote import GRAFICOS, carregar_manifesto
+from .cache_dados import CacheDados
+from .cache_figuras import cache_figuras
+
+TTL_PADRAO = 300.0
+
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+class CacheTTL:
+    """Resultados assíncronos com prazo de validade e pedidos coalescidos
+
+    Uma chave ausente ou vencida dispara uma única computação; quem pedir a
+    mesma chave enquanto ela roda aguarda o mesmo resultado. Falhas não são
+    guardadas: o próximo pedido tenta de novo. Deve ser usado de dentro de um
+    único event loop (não há travas).
+    """
+
+    def __init__(self, ttl: float = TTL_PADRAO, capacidade: int = 256,
+                 relogio: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.faltas = 0
+        self.coalescidos = 0
+        self.falhas = 0
+        self._relogio = relogio
+        self._itens: 'OrderedDict[Any, Tuple[Any, float]]' = OrderedDict()
+        self._em_andamento: Dict[Any, asyncio.Task] = {}
+
+    def restante(self, chave: Any) -> float:
+        """Segundos até a entrada vencer (0 se ausente)"""
+        item = self._itens.get(chave)
+        return max(0.0, item[1] - self._relogio()) if item else 0.0
+
+    async def obter(self, chave: Any, calcular: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Valor da chave e sua origem: 'acerto', 'falta' ou 'coalescido'"""
+        item = self._itens.get(chave)
+        if item is not None and item[1] > self._relogio():
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0], 'acerto'
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is not None:
+            self.coalescidos += 1
+            origem = 'coalescido'
+        else:
+            self.faltas += 1
+            origem = 'falta'
+            tarefa = asyncio.ensure_future(calcular())
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda t: self._concluir(chave, t))
+        # shield: um cliente que desconecta não cancela a computação dos demais
+        return await asyncio.shield(tarefa), origem
+
+    def _concluir(self, chave: Any, tarefa: asyncio.Task) -> None:
+        self._em_andamento.pop(chave, None)
+        if tarefa.cancelled() or tarefa.exception() is not None:
+            self.falhas += 1
+            return
+        self._itens[chave] = (tarefa.result(), self._relogio() + self.ttl)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {'itens': len(self._itens), 'em_andamento': len(self._em_andamento),
+                'acertos': self.acertos, 'faltas': self.faltas,
+                'coalescidos': self.coalescidos, 'falhas': self.falhas, 'ttl_s': self.ttl}
+
+
+class Conjunto(NamedTuple):
+    """Dados de um item do manifesto já analisados, prontos para servir"""
+    item: ItemLote
+    relatorio: Any
+    visualizador: Any
+    versao: float
+
+
+class Resposta(NamedTuple):
+    status: int
+    tipo: str
+    corpo: bytes
+    cabecalhos: Dict[str, str] = {}
+
+
+def _json(status: int, dados: Any) -> Resposta:
+    return Resposta(status, 'application/json', json.dumps(dados, ensure_ascii=False).encode('utf-8'))
+
+
+class ServicoRelatorios:
+    """Dono do DataLoader e dos analisadores; atende as rotas HTTP do serviço
+
+    Carga e análise de um conjunto rodam numa thread (uma vez por TTL) e os
+    gráficos são renderizados pelo pool do `cache_figuras`, de modo que o
+    event loop só roteia pedidos e devolve bytes já prontos. Os gráficos são
+    ligados à versão do conjunto: quando os dados vencem, os gráficos também.
+    """
+
+    def __init__(self, itens: List[ItemLote], ttl: float = TTL_PADRAO, loader=None):
+        from .data_loader import DataLoader
+
+        self.itens = {item.nome: item for item in itens}
+        # Sem cache de DataFrames no loader: quem decide quando recarregar é o TTL
+        self.loader = loader or DataLoader(cache=CacheDados(0))
+        self.cache = CacheTTL(ttl)
+        self.cargas = 0
+        self.renderizacoes = 0
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    def _carregar(self, item: ItemLote) -> Conjunto:
+        from .analytics import AnalisadorVendas, AnalisadorAluguel
+        from .visualizations import VisualizadorVendas, VisualizadorAlugueis
+
+        self.cargas += 1
+        dados = self.loader.carregar_dados(item.config)
+        if item.tipo == 'vendas':
+            dados = self.loader.preparar_vendas(dados)
+            relatorio = AnalisadorVendas(dados).gerar_relatorio()
+            visualizador = VisualizadorVendas(relatorio, dados)
+        else:
+            dados = self.loader.preparar_locacao(dados)
+            analisador = AnalisadorAluguel(dados)
+            relatorio = analisador.gerar_relatorio()
+            visualizador = VisualizadorAlugueis(
+                relatorio, dados, cubo=analisador.obter_cubo(),
+                media_por_apartamento=analisador.calcular_media_atraso_por_apartamento())
+        return Conjunto(item, relatorio, visualizador, time.time())
+
+    async def conjunto(self, nome: str) -> Tuple[Conjunto, str]:
+        item = self.itens[nome]
+        return await self.cache.obter(('conjunto', nome), lambda: asyncio.to_thread(self._carregar, item))
+
+    @staticmethod
+    def _chave(conjunto: Conjunto, *recurso: str) -> Tuple:
+        """Chave de um recurso derivado, ligada à versão dos dados"""
+        return (*recurso, conjunto.item.nome, conjunto.versao)
+
+    async def relatorio(self, conjunto: Conjunto) -> Tuple[bytes, str]:
+        async def serializar() -> bytes:
+            return conjunto.relatorio.model_dump_json().encode('utf-8')
+        return await self.cache.obter(self._chave(conjunto, 'relatorio'), serializar)
+
+    async def grafico(self, conjunto: Conjunto, grafico: str) -> Tuple[bytes, str]:
+        nome = conjunto.item.nome
+
+        async def renderizar() -> bytes:
+            self.renderizacoes += 1
+            futuro = cache_figuras.obter(
+                cache_figuras.chave(grafico, nome, conjunto.versao, conjunto.relatorio),
+                lambda: getattr(conjunto.visualizador, grafico)())
+            return await asyncio.wrap_future(futuro)
+        return await self.cache.obter(self._chave(conjunto, 'grafico', grafico), renderizar)
+
+    def _graficos(self, nome: str) -> Dict[str, str]:
+        """Nome do arquivo (como no lote) -> método do visualizador"""
+        return {f"{grafico.removeprefix('plot_')}.png": grafico for grafico in GRAFICOS[self.itens[nome].tipo]}
+
+    async def responder(self, metodo: str, alvo: str) -> Resposta:
+        """Roteia um pedido; erros de carga viram 500 com a mensagem em JSON"""
+        if metodo != 'GET':
+            return _json(405, {'erro': f'Método não suportado: {metodo}'})
+        partes = [unquote(parte) for parte in urlsplit(alvo).path.strip('/').split('/') if parte]
+        try:
+            if partes == ['saude']:
+                return _json(200, {'situacao': 'ok', 'conjuntos': len(self.itens)})
+            if partes == ['estatisticas']:
+                return _json(200, {**self.cache.estatisticas(), 'cargas': self.cargas,
+                                   'renderizacoes': self.renderizacoes})
+            if partes == ['conjuntos']:
+                return _json(200, [{'nome': nome, 'tipo': item.tipo, 'graficos': list(self._graficos(nome))}
+                                   for nome, item in self.itens.items()])
+            if len(partes) == 2 and partes[0] == 'relatorios' and partes[1] in self.itens:
+                conjunto, _ = await self.conjunto(partes[1])
+                corpo, origem = await self.relatorio(conjunto)
+                return Resposta(200, 'application/json', corpo,
+                                self._cabecalhos_cache(partes[1], origem))
+            if len(partes) == 3 and partes[0] == 'graficos' and partes[1] in self.itens:
+                grafico = self._graficos(partes[1]).get(partes[2])
+                if grafico is not None:
+                    conjunto, _ = await self.conjunto(partes[1])
+                    corpo, origem = await self.grafico(conjunto, grafico)
+                    return Resposta(200, 'image/png', corpo,
+                                    self._cabecalhos_cache(partes[1], origem))
+        except Exception as e:
+            return _json(500, {'erro': f'{type(e).__name__}: {e}'})
+        return _json(404, {'erro': f'Recurso não encontrado: {alvo}'})
+
+    def _cabecalhos_cache(self, nome: str, origem: str) -> Dict[str, str]:
+        # Recursos derivados valem enquanto os dados de que saíram não vencerem
+        restante = int(self.cache.restante(('conjunto', nome)))
+        return {'Cache-Control': f'max-age={restante}', 'X-Cache': origem}
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Conexão HTTP/1.1 com keep-alive; um pedido por vez, sem corpo"""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                cabecalhos = {}
+                while (cabecalho := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                try:
+                    metodo, alvo, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    resposta, versao = _json(400, {'erro': 'Linha de pedido inválida'}), 'HTTP/1.0'
+                else:
+                    resposta = await self.responder(metodo, alvo)
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                extras = {**resposta.cabecalhos, 'Connection': 'keep-alive' if manter else 'close'}
+                escritor.write(
+                    f"HTTP/1.1 {resposta.status} {_MOTIVOS[resposta.status]}\r\n"
+                    f"Content-Type: {resposta.tipo}\r\nContent-Length: {len(resposta.corpo)}\r\n"
+                    .encode('latin-1')
+                    + ''.join(f'{nome}: {valor}\r\n' for nome, valor in extras.items()).encode('latin-1')
+                    + b'\r\n' + resposta.corpo)
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host: str = '127.0.0.1', porta: int = 8765, fila: int = 1024) -> int:
+        """Começa a aceitar conexões e devolve a porta (útil com porta 0)
+
+        `fila` é o backlog do socket: com o padrão (100), rajadas de conexões
+        novas esperam a retransmissão do SYN, cerca de 1 s.
+        """
+        self._servidor = await asyncio.start_server(self._atender, host, porta, backlog=fila)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def encerrar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+
+async def servir(itens: List[ItemLote], host: str, porta: int, ttl: float) -> None:
+    servico = ServicoRelatorios(itens, ttl)
+    porta = await servico.iniciar(host, porta)
+    print(f'Servindo {len(itens)} conjunto(s) em http://{host}:{porta} (TTL {ttl:g}s)', file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servico.encerrar()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifesto')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--ttl', type=float, default=TTL_PADRAO,
+                        help='segundos até recarregar os dados e refazer relatórios e gráficos')
+    argumentos = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    try:
+        asyncio.run(servir(carregar_manifesto(argumentos.manifesto).itens,
+                           argumentos.host, argumentos.porta, argumentos.ttl))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
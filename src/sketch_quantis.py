@@ -0,0 +1,314 @@
+# src/sketch_quantis.py
+
+import math
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .models import Histograma
+
+ALFA_PADRAO = 0.01
+PERCENTIS = (0.5, 0.9, 0.99)
+# Valores com módulo abaixo disto caem no bucket do zero (erro absoluto ≤ MINIMO_INDEXAVEL)
+MINIMO_INDEXAVEL = 1e-9
+
+
+def _nome_percentil(q: float) -> str:
+    return f'p{q * 100:g}'
+
+
+class _Codificador:
+    """Buckets logarítmicos com erro relativo α, numerados com sinal e em ordem
+
+    O bucket i cobre (γ^(i-1), γ^i] com γ = (1+α)/(1-α) e é representado por
+    2γ^i/(γ+1), que fica a no máximo α·|x| de qualquer x do bucket. O código
+    de x é i deslocado para começar em 1, com o sinal de x; 0 é o bucket do
+    zero. A ordem dos códigos é a ordem dos valores.
+    """
+
+    def __init__(self, alfa: float):
+        if not 0 < alfa < 1:
+            raise ValueError(f'alfa deve estar em (0, 1), recebido {alfa}')
+        self.alfa = alfa
+        self.gamma = (1 + alfa) / (1 - alfa)
+        self.log_gamma = math.log(self.gamma)
+        self.deslocamento = math.floor(math.log(MINIMO_INDEXAVEL) / self.log_gamma)
+
+    def codificar(self, valores: np.ndarray) -> np.ndarray:
+        modulo = np.abs(valores)
+        indexaveis = modulo >= MINIMO_INDEXAVEL
+        codigos = np.zeros(len(valores), dtype=np.int64)
+        codigos[indexaveis] = (np.ceil(np.log(modulo[indexaveis]) / self.log_gamma).astype(np.int64)
+                               - self.deslocamento + 1)
+        return np.where(valores < 0, -codigos, codigos)
+
+    def representante(self, codigos: np.ndarray) -> np.ndarray:
+        indices = np.abs(codigos) + self.deslocamento - 1
+        valores = 2 * np.exp(indices * self.log_gamma) / (self.gamma + 1)
+        return np.where(codigos == 0, 0.0, np.sign(codigos) * valores)
+
+
+_codificadores: Dict[float, _Codificador] = {}
+
+
+def _codificador(alfa: float) -> _Codificador:
+    if alfa not in _codificadores:
+        _codificadores[alfa] = _Codificador(alfa)
+    return _codificadores[alfa]
+
+
+def codificar(valores: np.ndarray, alfa: float = ALFA_PADRAO) -> np.ndarray:
+    """Código do bucket de cada valor (finito), para montar sketches depois com `de_codigos`"""
+    return _codificador(alfa).codificar(np.asarray(valores, dtype=np.float64))
+
+
+def _finitos(valores) -> np.ndarray:
+    valores = np.asarray(pd.Series(valores).to_numpy(dtype=np.float64, na_value=np.nan))
+    return valores[np.isfinite(valores)]
+
+
+def _contar_codigos(codigos: np.ndarray, contagens: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Códigos distintos (em ordem) e quantas ocorrências de cada, sem ordenar os valores"""
+    if not len(codigos):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    menor = codigos.min()
+    # A faixa de códigos é pequena (alguns milhares): contagem direta em O(n)
+    totais = np.bincount(codigos - menor, weights=contagens, minlength=0)
+    presentes = np.flatnonzero(totais)
+    return presentes + menor, totais[presentes].astype(np.int64)
+
+
+class SketchQuantis:
+    """Sketch de quantis combinável, com erro relativo garantido (estilo DDSketch)
+
+    Guarda só quantos valores caíram em cada bucket logarítmico, além de
+    contagem, soma, mínimo e máximo exatos; o tamanho depende da faixa dos
+    valores (centenas de buckets com α = 1%), não da quantidade. Pode ser
+    montado bloco a bloco (`adicionar`) e combinado entre shards
+    (`combinar`): o resultado é idêntico ao de montar sobre todos os valores.
+
+    Garantia: para q em [0, 1], `quantil(q)` difere do valor de posto
+    ⌊q·(n-1)⌋ dos valores ordenados (np.quantile com method='lower') em no
+    máximo α vezes o módulo desse valor (mais MINIMO_INDEXAVEL perto de zero).
+    """
+
+    def __init__(self, alfa: float = ALFA_PADRAO):
+        self.alfa = alfa
+        self._codificador = _codificador(alfa)
+        self.codigos = np.empty(0, dtype=np.int64)
+        self.contagens = np.empty(0, dtype=np.int64)
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    @classmethod
+    def de_valores(cls, valores, alfa: float = ALFA_PADRAO) -> 'SketchQuantis':
+        """Sketch dos valores (ausentes e infinitos são ignorados)"""
+        sketch = cls(alfa)
+        sketch.adicionar(valores)
+        return sketch
+
+    @classmethod
+    def de_codigos(cls, codigos: np.ndarray, valores: np.ndarray, alfa: float = ALFA_PADRAO) -> 'SketchQuantis':
+        """Sketch de valores finitos cujos códigos (`codificar`) já foram calculados"""
+        if not len(valores):
+            return cls(alfa)
+        return cls.de_contagens(*_contar_codigos(codigos), float(valores.sum()),
+                                float(valores.min()), float(valores.max()), alfa)
+
+    @classmethod
+    def de_contagens(cls, codigos: np.ndarray, contagens: np.ndarray, soma: float, minimo: float,
+                     maximo: float, alfa: float = ALFA_PADRAO) -> 'SketchQuantis':
+        """Sketch a partir das contagens por código, já agregadas (de um índice, por exemplo)"""
+        sketch = cls(alfa)
+        ocupados = contagens > 0
+        if ocupados.any():
+            sketch._incorporar(codigos[ocupados], contagens[ocupados], soma, minimo, maximo)
+        return sketch
+
+    @classmethod
+    def combinar_todos(cls, sketches: Iterable['SketchQuantis'], alfa: float = ALFA_PADRAO) -> 'SketchQuantis':
+        resultado = cls(alfa)
+        for sketch in sketches:
+            resultado.combinar(sketch)
+        return resultado
+
+    def __len__(self) -> int:
+        return int(self.contagens.sum())
+
+    def adicionar(self, valores) -> None:
+        """Incorpora mais valores (um bloco de um fluxo, por exemplo)"""
+        valores = _finitos(valores)
+        if not len(valores):
+            return
+        self.combinar(SketchQuantis.de_codigos(self._codificador.codificar(valores), valores, self.alfa))
+
+    def combinar(self, outro: 'SketchQuantis') -> None:
+        """Soma as contagens de outro sketch (de outro bloco ou shard) a este"""
+        if outro.alfa != self.alfa:
+            raise ValueError(f'Sketches com alfas diferentes não se combinam: {self.alfa} e {outro.alfa}')
+        if len(outro.codigos):
+            self._incorporar(outro.codigos, outro.contagens, outro.soma, outro.minimo, outro.maximo)
+
+    def _incorporar(self, codigos: np.ndarray, contagens: np.ndarray, soma: float,
+                    minimo: float, maximo: float) -> None:
+        self.codigos, self.contagens = _contar_codigos(np.concatenate([self.codigos, codigos]),
+                                                       np.concatenate([self.contagens, contagens]))
+        self.soma += soma
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+
+    def quantil(self, q: float) -> float:
+        """Valor aproximado do quantil q (NaN se o sketch estiver vazio)"""
+        return self.quantis([q])[0]
+
+    def quantis(self, qs: Sequence[float]) -> np.ndarray:
+        total = len(self)
+        if not total:
+            return np.full(len(qs), np.nan)
+        postos = np.floor(np.asarray(qs, dtype=np.float64) * (total - 1))
+        posicoes = np.searchsorted(np.cumsum(self.contagens), postos, side='right')
+        valores = self._codificador.representante(self.codigos[posicoes])
+        # Mínimo e máximo são exatos: limitar a eles só aproxima do valor real
+        return np.clip(valores, self.minimo, self.maximo)
+
+    def percentis(self, qs: Sequence[float] = PERCENTIS) -> Dict[str, float]:
+        """{'p50': ..., 'p90': ..., 'p99': ...} (vazio se não houver valores)"""
+        if not len(self):
+            return {}
+        return {_nome_percentil(q): float(v) for q, v in zip(qs, self.quantis(qs))}
+
+    def media(self) -> float:
+        total = len(self)
+        return self.soma / total if total else float('nan')
+
+    def histograma(self, bins: int = 20, intervalo: Optional[Tuple[float, float]] = None) -> Optional[Histograma]:
+        """Histograma pelos representantes dos buckets (cada valor pode mudar de faixa
+        só se estiver a menos de α·|x| de um limite)"""
+        if not len(self):
+            return None
+        intervalo = intervalo or (self.minimo, self.maximo)
+        representantes = np.clip(self._codificador.representante(self.codigos), self.minimo, self.maximo)
+        contagens, limites = np.histogram(representantes, bins=bins, range=intervalo, weights=self.contagens)
+        return Histograma(limites=limites.tolist(), contagens=contagens.astype(np.int64).tolist())
+
+
+class SketchesPorChave:
+    """Um sketch de quantis por chave (cliente ou apartamento), numa tabela esparsa
+
+    Cada linha de (`codigo_chave`, `codigos`, `contagens`) é um bucket não
+    vazio de uma chave, em ordem de chave e de bucket; os quantis de todas as
+    chaves saem de uma única busca binária sobre as contagens acumuladas. A
+    garantia de erro é a mesma de SketchQuantis (sem o ajuste ao mín./máx.).
+    """
+
+    def __init__(self, chaves: pd.Index, codigo_chave: np.ndarray, codigos: np.ndarray,
+                 contagens: np.ndarray, alfa: float = ALFA_PADRAO):
+        self.chaves = chaves
+        self.codigo_chave = codigo_chave
+        self.codigos = codigos
+        self.contagens = contagens
+        self.alfa = alfa
+
+    @classmethod
+    def de_valores(cls, chaves, valores, alfa: float = ALFA_PADRAO) -> 'SketchesPorChave':
+        """Sketches dos valores agrupados por chave (chaves ou valores ausentes são ignorados)"""
+        codigo_chave, unicas = pd.factorize(pd.Series(chaves).reset_index(drop=True))
+        valores = pd.Series(valores).to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = (codigo_chave >= 0) & np.isfinite(valores)
+        return cls.de_codigos(pd.Index(np.asarray(unicas, dtype=object), dtype=object),
+                              codigo_chave[validos], _codificador(alfa).codificar(valores[validos]), alfa)
+
+    @classmethod
+    def de_codigos(cls, chaves: pd.Index, codigo_chave: np.ndarray, codigos: np.ndarray,
+                   alfa: float = ALFA_PADRAO) -> 'SketchesPorChave':
+        """Sketches a partir do código da chave (posição em `chaves`) e do bucket de cada valor"""
+        return cls._agrupar(chaves, codigo_chave.astype(np.int64, copy=False), codigos, None, alfa)
+
+    @classmethod
+    def de_contagens(cls, chaves: pd.Index, codigo_chave: np.ndarray, codigos: np.ndarray,
+                     contagens: np.ndarray, alfa: float = ALFA_PADRAO) -> 'SketchesPorChave':
+        """Sketches a partir de contagens já agregadas por (chave, bucket), em qualquer ordem"""
+        return cls._agrupar(chaves, codigo_chave.astype(np.int64, copy=False), codigos,
+                            contagens.astype(np.int64, copy=False), alfa)
+
+    @classmethod
+    def _agrupar(cls, chaves: pd.Index, codigo_chave: np.ndarray, codigos: np.ndarray,
+                 contagens: Optional[np.ndarray], alfa: float) -> 'SketchesPorChave':
+        """Soma as contagens iguais de (chave, bucket); sem `contagens`, cada linha conta 1"""
+        if not len(codigos):
+            vazio = np.empty(0, dtype=np.int64)
+            return cls(chaves, vazio, vazio, vazio, alfa)
+        menor = codigos.min()
+        largura = int(codigos.max() - menor + 1)
+        combinados = codigo_chave * largura + (codigos - menor)
+        if contagens is None:
+            # Ordenar os inteiros (sort vetorizado) e medir as corridas sai mais barato que um groupby
+            combinados = np.sort(combinados)
+            inicios = np.flatnonzero(np.r_[True, combinados[1:] != combinados[:-1]])
+            totais = np.diff(np.r_[inicios, len(combinados)])
+        else:
+            ordem = np.argsort(combinados, kind='stable')
+            combinados = combinados[ordem]
+            inicios = np.flatnonzero(np.r_[True, combinados[1:] != combinados[:-1]])
+            totais = np.add.reduceat(contagens[ordem], inicios)
+        combinados = combinados[inicios]
+        return cls(chaves, combinados // largura, combinados % largura + menor,
+                   totais.astype(np.int64, copy=False), alfa)
+
+    def combinar(self, outro: 'SketchesPorChave') -> 'SketchesPorChave':
+        """Novo conjunto de sketches com as contagens dos dois (chaves unidas por nome)"""
+        return self.combinar_todos([self, outro])
+
+    @classmethod
+    def combinar_todos(cls, tabelas: Sequence['SketchesPorChave']) -> 'SketchesPorChave':
+        """Combina as tabelas de vários blocos ou shards de uma vez só"""
+        alfas = {tabela.alfa for tabela in tabelas}
+        if len(alfas) != 1:
+            raise ValueError(f'Sketches com alfas diferentes (ou nenhum) não se combinam: {alfas}')
+        chaves = pd.Index(pd.unique(np.concatenate([tabela.chaves.to_numpy() for tabela in tabelas])),
+                          dtype=object)
+        remapeadas = [chaves.get_indexer(tabela.chaves)[tabela.codigo_chave] for tabela in tabelas]
+        return cls._agrupar(chaves, np.concatenate(remapeadas),
+                            np.concatenate([tabela.codigos for tabela in tabelas]),
+                            np.concatenate([tabela.contagens for tabela in tabelas]), alfas.pop())
+
+    def selecionar(self, chaves: Iterable) -> 'SketchesPorChave':
+        """Só os sketches das chaves pedidas (as ausentes são ignoradas)
+
+        A tabela está em ordem de chave: cada uma é localizada por busca
+        binária, sem percorrer as demais linhas.
+        """
+        pedidas = self.chaves.get_indexer(list(chaves))
+        pedidas = np.unique(pedidas[pedidas >= 0])
+        inicios = np.searchsorted(self.codigo_chave, pedidas, side='left')
+        tamanhos = np.searchsorted(self.codigo_chave, pedidas, side='right') - inicios
+        linhas = np.repeat(inicios - np.r_[0, np.cumsum(tamanhos)[:-1]], tamanhos) + np.arange(tamanhos.sum())
+        return SketchesPorChave(self.chaves[pedidas], np.repeat(np.arange(len(pedidas)), tamanhos),
+                                self.codigos[linhas], self.contagens[linhas], self.alfa)
+
+    def quantis(self, qs: Sequence[float] = PERCENTIS, chaves: Optional[Iterable] = None) -> pd.DataFrame:
+        """Quantis aproximados por chave (colunas p50, p90, ...) e a contagem de valores"""
+        if chaves is not None:
+            return self.selecionar(chaves).quantis(qs)
+        codigo_chave, codigos, contagens = self.codigo_chave, self.codigos, self.contagens
+        inicios = np.flatnonzero(np.r_[True, codigo_chave[1:] != codigo_chave[:-1]]) if len(codigo_chave) else \
+            np.empty(0, dtype=np.int64)
+        acumuladas = np.cumsum(contagens)
+        antes = np.r_[0, acumuladas][inicios]
+        totais = np.add.reduceat(contagens, inicios) if len(inicios) else np.empty(0, dtype=np.int64)
+        colunas = {}
+        for q in qs:
+            postos = antes + np.floor(q * (totais - 1))
+            posicoes = np.searchsorted(acumuladas, postos, side='right')
+            colunas[_nome_percentil(q)] = _codificador(self.alfa).representante(codigos[posicoes])
+        colunas['contagem'] = totais
+        return pd.DataFrame(colunas, index=self.chaves[codigo_chave[inicios]])
+
+    def percentis(self, chaves: Iterable, qs: Sequence[float] = PERCENTIS) -> Dict[str, Dict[str, float]]:
+        """{chave: {'p50': ..., ...}} para as chaves pedidas (as sem valores ficam de fora)"""
+        chaves = list(chaves)
+        tabela = self.quantis(qs, chaves).drop(columns='contagem')
+        return {str(chave): {coluna: float(valor) for coluna, valor in tabela.loc[chave].items()}
+                for chave in chaves if chave in tabela.index}
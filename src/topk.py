@@ -0,0 +1,57 @@
+# src/topk.py
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def maiores(valores: pd.Series, k: int) -> pd.Series:
+    """Os `k` maiores valores em ordem decrescente, sem ordenar a série inteira"""
+    return _selecionar(valores, k, decrescente=True)
+
+
+def menores(valores: pd.Series, k: int) -> pd.Series:
+    """Os `k` menores valores em ordem crescente, sem ordenar a série inteira"""
+    return _selecionar(valores, k, decrescente=False)
+
+
+def combinar_maiores(parciais: Iterable[pd.Series], k: int) -> pd.Series:
+    """Une os top-k de vários blocos ou shards em um top-k global
+
+    Vale quando cada chave aparece em um único fragmento (ex.: shards
+    particionados por cliente ou apartamento), pois o top-k global está
+    necessariamente contido na união dos top-k parciais.
+    """
+    return maiores(pd.concat(list(parciais)), k)
+
+
+def combinar_menores(parciais: Iterable[pd.Series], k: int) -> pd.Series:
+    """Equivalente a `combinar_maiores` para os `k` menores valores"""
+    return menores(pd.concat(list(parciais)), k)
+
+
+def _selecionar(valores: pd.Series, k: int, decrescente: bool) -> pd.Series:
+    """Seleção parcial com argpartition (O(n)) seguida da ordenação só dos k escolhidos
+
+    Valores ausentes nunca entram na seleção. Empates são resolvidos pela
+    ordem original da série.
+    """
+    numeros = valores.to_numpy(dtype='float64', na_value=np.nan)
+    validos = np.flatnonzero(~np.isnan(numeros))
+    k = min(k, len(validos))
+    if k <= 0:
+        return valores.iloc[:0]
+
+    chaves = -numeros[validos] if decrescente else numeros[validos]
+    if k < len(validos):
+        # argpartition escolhe arbitrariamente entre empates no k-ésimo valor:
+        # entram todos os estritamente melhores e, dos empatados, os primeiros
+        limite = np.partition(chaves, k - 1)[k - 1]
+        melhores = np.flatnonzero(chaves < limite)
+        empatados = np.flatnonzero(chaves == limite)[:k - len(melhores)]
+        escolhidos = np.sort(np.concatenate([melhores, empatados]))
+    else:
+        escolhidos = np.arange(len(validos))
+    ordem = escolhidos[np.argsort(chaves[escolhidos], kind='stable')]
+    return valores.iloc[validos[ordem]]
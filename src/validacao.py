@@ -0,0 +1,188 @@
+# src/validacao.py
+
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Type
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from .models import VendaModel, LocacaoModel
+from .instrumentacao import rastreador
+
+# Campo do modelo -> coluna do DataFrame carregado
+COLUNAS_VENDA = {
+    'cliente': 'Cliente',
+    'valor_compra': 'Valor da compra',
+    'data_venda': 'Data de venda',
+}
+COLUNAS_LOCACAO = {
+    'apartamento': 'apartamento',
+    'valor_aluguel': 'valor_aluguel',
+    'data_combinada_pagamento': 'datas_combinadas_pagamento',
+    'data_pagamento': 'datas_de_pagamento',
+}
+
+ACOES = ('relatar', 'descartar', 'quarentena')
+
+
+class Regra(NamedTuple):
+    """Restrição de um campo do modelo, aplicada à coluna inteira"""
+    nome: str
+    coluna: str
+    # Recebe a coluna e devolve a máscara das linhas que violam a regra
+    violacoes: Callable[[pd.Series], np.ndarray]
+
+
+class ResultadoValidacao(NamedTuple):
+    """Linhas mantidas, contagem e amostra de violações por regra e, se pedido, a quarentena"""
+    dados: pd.DataFrame
+    linhas_invalidas: int
+    violacoes: Dict[str, int]
+    amostras: Dict[str, pd.DataFrame]
+    quarentena: Optional[pd.DataFrame]
+
+
+def _por_valor(serie: pd.Series, funcao: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+    """Aplica `funcao` uma vez por categoria em colunas categóricas"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        resultado = np.asarray(funcao(pd.Series(serie.cat.categories)), dtype=bool)
+        codigos = serie.cat.codes.to_numpy()
+        # Código -1 (ausente) cai no último item, que é descartado pela regra de obrigatoriedade
+        return np.append(resultado, False)[codigos]
+    return np.asarray(funcao(serie), dtype=bool)
+
+
+def _nao_texto(valores: pd.Series) -> np.ndarray:
+    """Valores presentes que não são str (colunas object)"""
+    return valores.map(lambda v: not isinstance(v, str), na_action='ignore').fillna(False).to_numpy(dtype=bool)
+
+
+def _regra_tipo(tipo: type, coluna: str) -> Optional[Regra]:
+    """Valores presentes que não são do tipo do campo"""
+    if tipo is str:
+        def violacoes(serie):
+            # Categorias com dtype de texto dispensam checar valor a valor
+            tipo_valores = (serie.cat.categories.dtype if isinstance(serie.dtype, pd.CategoricalDtype)
+                            else serie.dtype)
+            if tipo_valores == object:
+                return _por_valor(serie, _nao_texto)
+            if pd.api.types.is_string_dtype(tipo_valores):
+                return np.zeros(len(serie), dtype=bool)
+            return serie.notna().to_numpy()
+    elif tipo is float or tipo is int:
+        def violacoes(serie):
+            if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+                return np.zeros(len(serie), dtype=bool)
+            return (serie.notna() & pd.to_numeric(serie, errors='coerce').isna()).to_numpy()
+    elif tipo is datetime:
+        def violacoes(serie):
+            if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+                return np.zeros(len(serie), dtype=bool)
+            return (serie.notna() & pd.to_datetime(serie, errors='coerce', format='mixed').isna()).to_numpy()
+    else:
+        return None
+    return Regra('tipo', coluna, violacoes)
+
+
+def _numerico(serie: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def _regras_restricao(restricao, coluna: str) -> List[Regra]:
+    """Traduz as restrições de annotated_types (Field(gt=..., min_length=...)) para colunas"""
+    regras = []
+    comparacoes = {'gt': np.less_equal, 'ge': np.less, 'lt': np.greater_equal, 'le': np.greater}
+    for atributo, viola in comparacoes.items():
+        limite = getattr(restricao, atributo, None)
+        if limite is not None:
+            # NaN não viola a comparação: ausentes ficam com a regra 'obrigatorio'
+            regras.append(Regra(f'{atributo}={limite}', coluna,
+                                lambda s, viola=viola, limite=limite:
+                                    viola(_numerico(s).to_numpy(dtype=float, na_value=np.nan), limite)))
+    for atributo, viola in (('min_length', np.less), ('max_length', np.greater)):
+        limite = getattr(restricao, atributo, None)
+        if limite is not None:
+            regras.append(Regra(f'{atributo}={limite}', coluna,
+                                lambda s, viola=viola, limite=limite: _por_valor(
+                                    s, lambda v: viola(v.astype('string').str.len().fillna(limite)
+                                                       .to_numpy(dtype=np.int64), limite))))
+    return regras
+
+
+def regras_do_modelo(modelo: Type[BaseModel], colunas: Dict[str, str]) -> List[Regra]:
+    """Deriva as regras colunares dos campos de um modelo Pydantic
+
+    Cobre obrigatoriedade, tipo (str, float/int, datetime) e as restrições
+    numéricas e de tamanho declaradas em Field. Validadores de campo (como a
+    limpeza de nomes) não são reexecutados: a coluna já chega normalizada
+    por DataLoader.preparar_vendas/preparar_locacao.
+    """
+    regras = []
+    for campo, info in modelo.model_fields.items():
+        coluna = colunas[campo]
+        if info.is_required():
+            regras.append(Regra('obrigatorio', coluna, lambda s: s.isna().to_numpy()))
+        regra_tipo = _regra_tipo(info.annotation, coluna)
+        if regra_tipo is not None:
+            regras.append(regra_tipo)
+        for restricao in info.metadata:
+            regras.extend(_regras_restricao(restricao, coluna))
+    return regras
+
+
+def validar_dataframe(df: pd.DataFrame, regras: List[Regra], acao: str = 'relatar',
+                      tamanho_amostra: int = 5) -> ResultadoValidacao:
+    """Aplica as regras às colunas inteiras
+
+    `acao='relatar'` só conta; 'descartar' remove as linhas inválidas;
+    'quarentena' também as remove e as devolve, com a coluna `violacoes`
+    listando as regras quebradas por cada uma.
+    """
+    if acao not in ACOES:
+        raise ValueError(f"Ação inválida: {acao!r} (use {', '.join(ACOES)})")
+
+    with rastreador.etapa('validar_dataframe', linhas_entrada=len(df)) as etapa:
+        violacoes, amostras, mascaras = {}, {}, {}
+        invalidas = np.zeros(len(df), dtype=bool)
+        for regra in regras:
+            if regra.coluna not in df.columns:
+                raise KeyError(f"Coluna '{regra.coluna}' não encontrada")
+            mascara = regra.violacoes(df[regra.coluna])
+            chave = f'{regra.coluna}:{regra.nome}'
+            quantidade = int(np.count_nonzero(mascara))
+            violacoes[chave] = quantidade
+            if quantidade:
+                # Só as primeiras linhas de cada regra são materializadas
+                amostras[chave] = df.iloc[np.flatnonzero(mascara)[:tamanho_amostra]]
+                mascaras[chave] = mascara
+                invalidas |= mascara
+
+        quarentena = None
+        dados = df
+        if acao != 'relatar' and invalidas.any():
+            dados = df[~invalidas].reset_index(drop=True)
+            if acao == 'quarentena':
+                posicoes = np.flatnonzero(invalidas)
+                quarentena = df.iloc[posicoes].reset_index(drop=True)
+                quebradas = [[] for _ in posicoes]
+                for chave, mascara in mascaras.items():
+                    for i in np.flatnonzero(mascara[posicoes]):
+                        quebradas[i].append(chave)
+                quarentena['violacoes'] = [', '.join(q) for q in quebradas]
+        elif acao == 'quarentena':
+            quarentena = df.iloc[:0].assign(violacoes=pd.Series(dtype=object))
+        etapa.linhas_saida = len(dados)
+    return ResultadoValidacao(dados, int(np.count_nonzero(invalidas)), violacoes, amostras, quarentena)
+
+
+def validar_vendas(df: pd.DataFrame, **opcoes) -> ResultadoValidacao:
+    """Valida dados de vendas com as restrições de VendaModel"""
+    return validar_dataframe(df, regras_do_modelo(VendaModel, COLUNAS_VENDA), **opcoes)
+
+
+def validar_locacao(df: pd.DataFrame, **opcoes) -> ResultadoValidacao:
+    """Valida dados de locação com as restrições de LocacaoModel"""
+    return validar_dataframe(df, regras_do_modelo(LocacaoModel, COLUNAS_LOCACAO), **opcoes)
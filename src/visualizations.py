@@ -1,9 +1,38 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Optional
+import threading
+from typing import Optional, TYPE_CHECKING
+import numpy as np
 import pandas as pd
 from .models import RelatorioVendas, RelatorioAlugueis # Importe os modelos de relatório
-from matplotlib.patches import Patch # Necessário para a legenda personalizada
+from .topk import maiores
+from .instrumentacao import rastrear
+from .cubo_atrasos import CuboAtrasos
+
+# matplotlib e seaborn só são importados no primeiro gráfico: quem usa apenas
+# a análise não paga o custo de importação nem a configuração de estilo
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+_estilo_aplicado = False
+_trava_estilo = threading.Lock()
+
+
+def aplicar_estilo() -> None:
+    """Configura o estilo global do matplotlib uma única vez por processo"""
+    global _estilo_aplicado
+    with _trava_estilo:
+        if not _estilo_aplicado:
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            plt.style.use('seaborn-v0_8')
+            sns.set_palette("husl")
+            _estilo_aplicado = True
+
+
+def nova_figura(figsize: tuple) -> 'Figure':
+    """Cria uma figura desvinculada do pyplot, com o estilo do projeto aplicado"""
+    aplicar_estilo()
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
 
 class VisualizadorVendas:
     """Visualizações para análise de vendas"""
@@ -11,12 +40,12 @@ class VisualizadorVendas:
     def __init__(self, relatorio: RelatorioVendas, dados: pd.DataFrame):
         self.relatorio = relatorio
         self.dados = dados
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
     
-    def plot_top_clientes(self, top_n: int = 10, figsize: tuple = (12, 8)) -> plt.Figure:
+    @rastrear('VisualizadorVendas.plot_top_clientes')
+    def plot_top_clientes(self, top_n: int = 10, figsize: tuple = (12, 8)) -> 'Figure':
         """Gráfico dos top clientes"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+        fig = nova_figura(figsize)
+        ax1, ax2 = fig.subplots(1, 2)
         
         # Gráfico de barras horizontais
         top_clientes = pd.Series(self.relatorio.top_5_clientes)
@@ -35,12 +64,14 @@ class VisualizadorVendas:
         ax2.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
         ax2.set_title('Distribuição de Vendas - Top 5 vs Outros', fontsize=14, fontweight='bold')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
-    def plot_vendas_por_dia(self, figsize: tuple = (12, 6)) -> plt.Figure:
+    @rastrear('VisualizadorVendas.plot_vendas_por_dia')
+    def plot_vendas_por_dia(self, figsize: tuple = (12, 6)) -> 'Figure':
         """Gráfico de vendas por dia"""
-        fig, ax = plt.subplots(figsize=figsize)
+        fig = nova_figura(figsize)
+        ax = fig.subplots()
         vendas_diarias = (self.dados.groupby(self.dados['Data de venda'].dt.date)
                          ['Valor da compra'].sum())
         
@@ -49,13 +80,14 @@ class VisualizadorVendas:
         ax.set_xlabel('Data')
         ax.set_ylabel('Valor Total (R$)')
         ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.tick_params(axis='x', rotation=45)
+        fig.tight_layout()
         return fig
     
-    def plot_estatisticas_resumo(self, figsize: tuple = (15, 10)) -> plt.Figure:
+    @rastrear('VisualizadorVendas.plot_estatisticas_resumo')
+    def plot_estatisticas_resumo(self, figsize: tuple = (15, 10)) -> 'Figure':
         """Dashboard completo de vendas"""
-        fig = plt.figure(figsize=figsize)
+        fig = nova_figura(figsize)
         gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
         
         # Métricas principais
@@ -97,21 +129,46 @@ class VisualizadorVendas:
         ax4.set_ylabel('Valor (R$)')
         ax4.grid(True, alpha=0.3)
         
-        plt.tight_layout() # Adicione isto para evitar sobreposição
+        fig.tight_layout() # Adicione isto para evitar sobreposição
         return fig
 
 
 class VisualizadorAlugueis:
     """Visualizações para análise de aluguéis"""
     
-    def __init__(self, relatorio: RelatorioAlugueis, dados: pd.DataFrame):
+    def __init__(self, relatorio: RelatorioAlugueis, dados: pd.DataFrame,
+                 media_por_apartamento: Optional[pd.Series] = None,
+                 cubo: Optional[CuboAtrasos] = None,
+                 frequencias: Optional[pd.Series] = None):
         self.relatorio = relatorio
         self.dados = dados
-        plt.style.use('seaborn-v0_8')
+        # Médias por apartamento, para rankings maiores que o top 10 do relatório
+        self.media_por_apartamento = media_por_apartamento
+        # Agregados mês × apartamento (histogramas e tendência sem reler as linhas)
+        self._cubo = cubo
+        # Pagamentos por atraso já filtrados (índice de filtros); sem elas, vale o cubo inteiro
+        self.frequencias = frequencias
+    
+    @property
+    def cubo(self) -> CuboAtrasos:
+        if self._cubo is None:
+            self._cubo = CuboAtrasos.de_dados(self.dados)
+        return self._cubo
+    
+    def _histograma_atrasos(self, ax, bins: int) -> float:
+        """Histograma dos atrasos a partir das frequências (do cubo, se não vierem prontas); devolve a média"""
+        frequencias = self.frequencias if self.frequencias is not None else self.cubo.histograma()
+        ax.hist(frequencias.index, bins=bins, weights=frequencias.to_numpy(),
+                alpha=0.7, color='skyblue', edgecolor='black')
+        if self.frequencias is not None:
+            return np.average(frequencias.index, weights=frequencias.to_numpy())
+        return self.cubo.media_geral()
     
-    def plot_distribuicao_atrasos(self, figsize: tuple = (12, 8)) -> plt.Figure:
+    @rastrear('VisualizadorAlugueis.plot_distribuicao_atrasos')
+    def plot_distribuicao_atrasos(self, figsize: tuple = (12, 8)) -> 'Figure':
         """Gráfico da distribuição de atrasos"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
+        fig = nova_figura(figsize)
+        ax1, ax2 = fig.subplots(1, 2)
         
         # Gráfico de pizza - categorias de atraso
         labels = ['Pontuais', 'Atraso Leve', 'Atraso Moderado', 'Atraso Severo']
@@ -123,24 +180,28 @@ class VisualizadorAlugueis:
         ax1.set_title('Distribuição de Pontualidade dos Moradores', fontsize=14, fontweight='bold')
         
         # Histograma de atrasos
-        atrasos = (self.dados['datas_de_pagamento'] - self.dados['datas_combinadas_pagamento']).dt.days
-        ax2.hist(atrasos, bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-        ax2.axvline(atrasos.mean(), color='red', linestyle='--', linewidth=2, 
-                   label=f'Média: {atrasos.mean():.1f} dias')
+        media = self._histograma_atrasos(ax2, bins=30)
+        ax2.axvline(media, color='red', linestyle='--', linewidth=2, 
+                   label=f'Média: {media:.1f} dias')
         ax2.set_title('Distribuição de Atrasos (Dias)', fontsize=14, fontweight='bold')
         ax2.set_xlabel('Dias de Atraso')
         ax2.set_ylabel('Frequência')
         ax2.legend()
         ax2.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
-    def plot_ranking_apartamentos(self, top_n: int = 15, figsize: tuple = (14, 8)) -> plt.Figure:
+    @rastrear('VisualizadorAlugueis.plot_ranking_apartamentos')
+    def plot_ranking_apartamentos(self, top_n: int = 15, figsize: tuple = (14, 8)) -> 'Figure':
         """Gráfico do ranking de apartamentos mais atrasados"""
-        ranking = pd.Series(self.relatorio.ranking_atrasos).head(top_n)
+        if self.media_por_apartamento is not None:
+            ranking = maiores(self.media_por_apartamento, top_n)
+        else:
+            ranking = pd.Series(self.relatorio.ranking_atrasos).head(top_n)
         
-        fig, ax = plt.subplots(figsize=figsize)
+        fig = nova_figura(figsize)
+        ax = fig.subplots()
         
         # Define cores baseadas no nível de atraso
         colors = []
@@ -167,6 +228,7 @@ class VisualizadorAlugueis:
         ax.set_xticklabels(ranking.index, rotation=45, ha='right')
         
         # Legenda de cores
+        from matplotlib.patches import Patch
         legend_elements = [
             Patch(facecolor='red', label='Severo (>15 dias)'),
             Patch(facecolor='orange', label='Moderado (5-15 dias)'),
@@ -176,12 +238,13 @@ class VisualizadorAlugueis:
         ax.legend(handles=legend_elements, loc='upper right')
         
         ax.grid(True, alpha=0.3, axis='y')
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
-    def plot_dashboard_alugueis(self, figsize: tuple = (16, 12)) -> plt.Figure:
+    @rastrear('VisualizadorAlugueis.plot_dashboard_alugueis')
+    def plot_dashboard_alugueis(self, figsize: tuple = (16, 12)) -> 'Figure':
         """Dashboard completo de aluguéis"""
-        fig = plt.figure(figsize=figsize)
+        fig = nova_figura(figsize)
         gs = fig.add_gridspec(4, 3, hspace=0.4, wspace=0.3)
         
         # Título principal
@@ -221,10 +284,9 @@ class VisualizadorAlugueis:
         
         # Histograma de todos os atrasos
         ax4 = fig.add_subplot(gs[2, :])
-        atrasos = (self.dados['datas_de_pagamento'] - self.dados['datas_combinadas_pagamento']).dt.days
-        ax4.hist(atrasos, bins=50, alpha=0.7, color='skyblue', edgecolor='black')
-        ax4.axvline(atrasos.mean(), color='red', linestyle='--', linewidth=2, 
-                   label=f'Média: {atrasos.mean():.1f} dias')
+        media = self._histograma_atrasos(ax4, bins=50)
+        ax4.axvline(media, color='red', linestyle='--', linewidth=2, 
+                   label=f'Média: {media:.1f} dias')
         ax4.axvline(0, color='green', linestyle='-', linewidth=2, alpha=0.7, label='Pontualidade Ideal')
         ax4.set_title('Distribuição Completa de Atrasos', fontsize=12, fontweight='bold')
         ax4.set_xlabel('Dias de Atraso')
@@ -235,9 +297,7 @@ class VisualizadorAlugueis:
         # Análise temporal (se houver dados suficientes)
         ax5 = fig.add_subplot(gs[3, :])
         if 'datas_de_pagamento' in self.dados.columns:
-            atrasos_mensais = (self.dados.groupby(self.dados['datas_de_pagamento'].dt.to_period('M'))
-                              .apply(lambda x: ((x['datas_de_pagamento'] - x['datas_combinadas_pagamento'])
-                                               .dt.days.mean())))
+            atrasos_mensais = self.cubo.tendencia_mensal()
             if len(atrasos_mensais) > 1:
                 atrasos_mensais.plot(kind='line', ax=ax5, marker='o', linewidth=2, markersize=8)
                 ax5.set_title('Evolução do Atraso Médio por Mês', fontsize=12, fontweight='bold')
@@ -248,5 +308,5 @@ class VisualizadorAlugueis:
                         ha='center', va='center', transform=ax5.transAxes)
                 ax5.axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
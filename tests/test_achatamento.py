@@ -0,0 +1,76 @@
+# tests/test_achatamento.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.achatamento import ErroTamanhoListas, achatar_listas
+
+
+def assert_igual_ao_explode(df: pd.DataFrame, colunas) -> None:
+    esperado = df.explode(colunas).reset_index(drop=True)
+    # explode mantém object; os tipos só são inferidos depois, em _compactar_tipos
+    pd.testing.assert_frame_equal(achatar_listas(df, colunas).infer_objects(), esperado.infer_objects(),
+                                  check_dtype=False)
+
+
+def gerar_aninhado(registros: int, rng: np.random.Generator, vazias: bool = False) -> pd.DataFrame:
+    """Como a locação depois do json_normalize: uma coluna escalar e listas de strings"""
+    tamanhos = rng.integers(0 if vazias else 1, 12, registros)
+    datas = np.datetime_as_string(np.datetime64('2020-01-05') + rng.integers(0, 1500, tamanhos.sum()))
+    valores = np.char.add('$', rng.integers(800, 5_000, tamanhos.sum()).astype(str))
+    cortes = np.cumsum(tamanhos)[:-1]
+    return pd.DataFrame({
+        'apartamento': [f'A{i + 101}' for i in range(registros)],
+        'datas': [l.tolist() for l in np.split(datas, cortes)],
+        'valores': [l.tolist() for l in np.split(valores, cortes)],
+    }, index=pd.RangeIndex(100, 100 + registros))
+
+
+@pytest.mark.parametrize('vazias', [False, True])
+def test_igual_ao_explode(vazias):
+    df = gerar_aninhado(300, np.random.default_rng(0), vazias)
+    assert_igual_ao_explode(df, ['datas', 'valores'])
+    assert_igual_ao_explode(df, ['datas'])
+
+
+def test_listas_vazias_ausentes_e_escalares():
+    df = pd.DataFrame({
+        'chave': ['a', 'b', 'c', 'd', 'e'],
+        'numeros': [[1, 2], [], None, [3], 4],
+        'textos': [('x', 'y'), ['z'], 'w', [None], np.array(['v'])],
+    })
+    assert_igual_ao_explode(df, ['numeros', 'textos'])
+    assert len(achatar_listas(df, ['numeros', 'textos'])) == 6
+
+
+def test_tudo_vazio():
+    df = pd.DataFrame({'chave': ['a', 'b'], 'lista': [[], []]})
+    assert_igual_ao_explode(df, ['lista'])
+    assert_igual_ao_explode(df.iloc[:0], ['lista'])
+
+
+def test_sem_colunas_devolve_o_proprio_quadro():
+    df = pd.DataFrame({'lista': [[1, 2]]})
+    assert achatar_listas(df, []) is df
+
+
+def test_tamanhos_diferentes_entre_colunas():
+    df = pd.DataFrame({
+        'a': [[1, 2], [3], [], [4, 5, 6]],
+        'b': [['x', 'y'], ['z', 'w'], ['v'], ['u']],
+    })
+    with pytest.raises(ErroTamanhoListas) as erro:
+        achatar_listas(df, ['a', 'b'])
+    # Lista vazia conta 1, como no explode: só as linhas 1 e 3 divergem
+    divergencias = erro.value.divergencias
+    assert divergencias.index.tolist() == [1, 3]
+    assert divergencias.to_dict('list') == {'a': [1, 3], 'b': [2, 1]}
+    assert 'linha 1: a=1, b=2' in str(erro.value)
+    assert isinstance(erro.value, ValueError)
+
+
+def test_mensagem_resume_muitas_divergencias():
+    df = pd.DataFrame({'a': [[1, 2]] * 8, 'b': [[1]] * 8})
+    with pytest.raises(ErroTamanhoListas, match=r'8 linha\(s\).*\(e mais 3\)'):
+        achatar_listas(df, ['a', 'b'])
@@ -0,0 +1,130 @@
+# tests/test_analytics.py
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import BaseModel
+
+from src.analytics import AnalisadorAluguel, AnalisadorVendas
+
+
+def gerar_vendas(linhas: int, clientes: int, rng: np.random.Generator, estornos: bool = False) -> pd.DataFrame:
+    """Vendas já limpas, como saem do DataLoader"""
+    valores = rng.uniform(1, 10_000, linhas)
+    if estornos:
+        valores[rng.random(linhas) < 0.2] *= -1
+    return pd.DataFrame({
+        'Data de venda': pd.Timestamp('2022-06-01') + pd.to_timedelta(rng.integers(0, 30, linhas), 'D'),
+        'Cliente': np.char.add('cliente ', rng.integers(0, clientes, linhas).astype(str)).astype(object),
+        'Valor da compra': valores,
+    })
+
+
+def gerar_pagamentos(linhas: int, apartamentos: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Pagamentos já preparados, como saem de DataLoader.preparar_locacao (com datas faltando)"""
+    combinadas = pd.Timestamp('2022-01-05') + pd.to_timedelta(rng.integers(0, 365, linhas), 'D')
+    pagamentos = pd.Series(combinadas + pd.to_timedelta(rng.geometric(0.15, linhas) - 3, 'D'))
+    pagamentos[rng.random(linhas) < 0.05] = pd.NaT
+    return pd.DataFrame({
+        'apartamento': np.char.add('A', rng.integers(0, apartamentos, linhas).astype(str)).astype(object),
+        'datas_combinadas_pagamento': combinadas,
+        'datas_de_pagamento': pagamentos,
+    })
+
+
+def assert_iguais(obtido, esperado, caminho: str = '') -> None:
+    """Compara relatórios descendo em modelos, dicionários e listas (floats com isclose)"""
+    if isinstance(obtido, BaseModel):
+        obtido = obtido.model_dump()
+    if isinstance(esperado, BaseModel):
+        esperado = esperado.model_dump()
+    if isinstance(esperado, float):
+        assert math.isclose(obtido, esperado, rel_tol=1e-9), (caminho, obtido, esperado)
+    elif isinstance(esperado, dict):
+        assert list(obtido) == list(esperado), caminho
+        for chave, valor in esperado.items():
+            assert_iguais(obtido[chave], valor, f'{caminho}.{chave}')
+    elif isinstance(esperado, list):
+        assert len(obtido) == len(esperado), caminho
+        for i, (a, b) in enumerate(zip(obtido, esperado)):
+            assert_iguais(a, b, f'{caminho}[{i}]')
+    else:
+        assert obtido == esperado, (caminho, obtido, esperado)
+
+
+@pytest.mark.parametrize('estornos', [False, True])
+def test_relatorio_incremental_igual_ao_recalculo(estornos):
+    rng = np.random.default_rng(0)
+    historico = gerar_vendas(5_000, 400, rng)
+    lotes = [gerar_vendas(50, 400, rng, estornos) for _ in range(8)]
+    # Clientes novos, que só aparecem nos lotes
+    lotes.append(gerar_vendas(30, 5, rng).assign(Cliente=lambda df: 'novo ' + df['Cliente']))
+
+    analisador = AnalisadorVendas(historico)
+    acumulado = historico
+    for lote in lotes:
+        analisador.adicionar_vendas(lote)
+        acumulado = pd.concat([acumulado, lote], ignore_index=True)
+        assert_iguais(analisador.gerar_relatorio(), AnalisadorVendas(acumulado).gerar_relatorio())
+
+    pd.testing.assert_frame_equal(analisador.dados_vendas, acumulado)
+    pd.testing.assert_frame_equal(analisador.calcular_percentis_por_cliente(),
+                                  AnalisadorVendas(acumulado).calcular_percentis_por_cliente())
+
+
+def test_incremental_a_partir_de_historico_vazio():
+    rng = np.random.default_rng(1)
+    lotes = [gerar_vendas(40, 20, rng) for _ in range(3)]
+    analisador = AnalisadorVendas(lotes[0].iloc[:0])
+    for lote in lotes:
+        analisador.adicionar_vendas(lote)
+    analisador.adicionar_vendas(lotes[0].iloc[:0])
+    assert_iguais(analisador.gerar_relatorio(),
+                  AnalisadorVendas(pd.concat(lotes, ignore_index=True)).gerar_relatorio())
+
+
+def test_pagamentos_incrementais_iguais_ao_recalculo():
+    rng = np.random.default_rng(2)
+    historico = gerar_pagamentos(3_000, 60, rng)
+    lotes = [gerar_pagamentos(40, 60, rng) for _ in range(6)]
+    lotes.append(gerar_pagamentos(20, 3, rng).assign(apartamento=lambda df: 'B' + df['apartamento']))
+
+    analisador = AnalisadorAluguel(historico)
+    cubo = analisador.obter_cubo()
+    acumulado = historico
+    for lote in lotes:
+        analisador.adicionar_pagamentos(lote)
+        acumulado = pd.concat([acumulado, lote], ignore_index=True)
+        recalculado = AnalisadorAluguel(acumulado)
+        assert_iguais(analisador.gerar_relatorio(), recalculado.gerar_relatorio())
+        assert_iguais(analisador.classificar_apartamentos(), recalculado.classificar_apartamentos())
+
+    # O cubo montado antes dos lotes foi atualizado no lugar, sem remontar
+    assert analisador.obter_cubo() is cubo
+    novo = recalculado.obter_cubo()
+    pd.testing.assert_series_equal(cubo.frequencias.sort_index(), novo.frequencias.sort_index())
+    pd.testing.assert_frame_equal(cubo.por_apartamento(), novo.por_apartamento())
+    pd.testing.assert_frame_equal(analisador.calcular_percentis_por_apartamento(),
+                                  recalculado.calcular_percentis_por_apartamento())
+    pd.testing.assert_frame_equal(analisador.dados_locacao, acumulado)
+
+
+def test_empates_no_top_seguem_a_ordem_de_chegada():
+    # Trinta clientes empatados: o top deve sair na ordem em que apareceram
+    clientes = [f'cliente {i:02d}' for i in range(30)]
+    historico = pd.DataFrame({'Data de venda': pd.Timestamp('2022-06-01'),
+                              'Cliente': clientes, 'Valor da compra': 10.0})
+    lotes = [historico.iloc[[25, 3, 17]].assign(**{'Valor da compra': 0.0}),
+             pd.DataFrame({'Data de venda': pd.Timestamp('2022-06-02'),
+                           'Cliente': ['cliente 29', 'novo', 'cliente 02'], 'Valor da compra': [0.0, 10.0, 0.0]})]
+
+    analisador = AnalisadorVendas(historico)
+    acumulado = historico
+    for lote in lotes:
+        analisador.adicionar_vendas(lote)
+        acumulado = pd.concat([acumulado, lote], ignore_index=True)
+        relatorio = analisador.gerar_relatorio()
+        assert_iguais(relatorio, AnalisadorVendas(acumulado).gerar_relatorio())
+        assert list(relatorio.top_5_clientes) == clientes[:5]
@@ -0,0 +1,101 @@
+# tests/test_atualizacao.py
+
+import contextvars
+import json
+from collections import Counter
+
+import pytest
+
+from src.atualizacao import AtualizadorDados
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from src.instrumentacao import rastreador
+from src.models import DataLoaderConfig
+from benchmarks.servidor_local import servidor_json
+
+
+def conteudo_vendas(*valores: int) -> bytes:
+    return json.dumps({'dados_vendas': [{'Cliente': 'A', 'Valor da compra': f'R$ {valor}'}
+                                        for valor in valores]}).encode()
+
+
+@pytest.fixture
+def fonte():
+    """Fonte local com ETag: (arquivos servidos, contagem de respostas, configuração)"""
+    arquivos = {'/vendas.json': conteudo_vendas(1, 2)}
+    respostas = Counter()
+    with servidor_json(arquivos, respostas=respostas) as url:
+        config = DataLoaderConfig(url=url + '/vendas.json', chave='dados_vendas',
+                                  coluna_valor='Valor da compra', prefixos_remover=['R$ '])
+        yield arquivos, respostas, config
+
+
+def criar_atualizador(config: DataLoaderConfig) -> AtualizadorDados:
+    loader = DataLoader(cache=CacheDados(), tentativas=0)
+
+    def atualizar(anterior):
+        dados, mudaram = loader.revalidar(config)
+        return dados if anterior is None or mudaram else None
+
+    return AtualizadorDados(atualizar, intervalo=3600)
+
+
+def test_fonte_inalterada_responde_304_e_mantem_a_versao(fonte):
+    _, respostas, config = fonte
+    atualizador = criar_atualizador(config)
+    primeiro = atualizador.obter()
+    atualizador.renovar(esperar=True)
+
+    assert respostas == Counter({200: 1, 304: 1})
+    assert atualizador.obter().versao == 0 and atualizador.obter().valor is primeiro.valor
+    assert atualizador.estatisticas()['verificacoes'] == 2 and atualizador.trocas == 1
+
+
+def test_fonte_alterada_vira_nova_versao(fonte):
+    arquivos, respostas, config = fonte
+    atualizador = criar_atualizador(config)
+    assert atualizador.obter().valor['Valor da compra'].tolist() == [1.0, 2.0]
+
+    arquivos['/vendas.json'] = conteudo_vendas(3)
+    atualizador.renovar(esperar=True)
+
+    assert respostas == Counter({200: 2})
+    atual = atualizador.obter()
+    assert atual.versao == 1 and atual.valor['Valor da compra'].tolist() == [3.0]
+
+
+def test_falha_na_renovacao_mantem_os_dados_antigos(fonte):
+    arquivos, _, config = fonte
+    atualizador = criar_atualizador(config)
+    anterior = atualizador.obter()
+
+    del arquivos['/vendas.json']
+    atualizador.renovar(esperar=True)
+
+    assert atualizador.ultimo_erro is not None
+    assert atualizador.obter() is anterior
+
+    arquivos['/vendas.json'] = conteudo_vendas(4)
+    atualizador.renovar(esperar=True)
+    assert atualizador.ultimo_erro is None and atualizador.obter().versao == 1
+
+
+def test_falha_na_primeira_carga_e_propagada(fonte):
+    arquivos, _, config = fonte
+    arquivos.clear()
+    with pytest.raises(RuntimeError, match='primeira carga'):
+        criar_atualizador(config).obter()
+
+
+def test_etapas_da_renovacao_entram_na_coleta_de_quem_a_disparou(fonte):
+    _, _, config = fonte
+    atualizador = criar_atualizador(config)
+
+    def sessao():
+        rastreador.ativar()
+        atualizador.obter()
+        return {etapa['nome'] for etapa in rastreador.etapas}
+
+    nomes = contextvars.copy_context().run(sessao)
+    assert {'DataLoader.revalidar', 'DataLoader.download', 'DataLoader.json_normalize'} <= nomes
+    assert not rastreador.ativo
@@ -0,0 +1,38 @@
+# tests/test_cache_dados.py
+
+import numpy as np
+import pandas as pd
+
+from src import cache_dados
+from src.cache_dados import CacheDados, _copy_on_write
+
+
+def test_acertos_sao_copias_rasas_isoladas_do_cache():
+    cache = CacheDados()
+    assert _copy_on_write()
+    original = pd.DataFrame({'valor': np.arange(5, dtype=np.float64), 'nome': list('abcde')})
+    cache.guardar('chave', original)
+
+    entregue = cache.obter('chave')
+    # Cópia rasa: compartilha os buffers até alguém escrever
+    assert np.shares_memory(entregue['valor'].to_numpy(), original['valor'].to_numpy())
+    entregue.loc[0, 'valor'] = -1.0
+    entregue['nome'] = entregue['nome'].str.upper()
+
+    guardado = cache.obter('chave')
+    assert guardado['valor'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert guardado['nome'].tolist() == list('abcde')
+
+
+def test_sem_copy_on_write_acertos_sao_copias_profundas(monkeypatch):
+    monkeypatch.setattr(cache_dados, '_copy_on_write', lambda: False)
+    opcoes = []
+    monkeypatch.setattr(pd, 'set_option', lambda *args: opcoes.append(args))
+    cache = CacheDados()
+    original = pd.DataFrame({'valor': np.arange(5, dtype=np.float64)})
+    entregue = cache.guardar('chave', original)
+
+    # Criar o cache não mexe nas opções do processo
+    assert opcoes == []
+    assert not np.shares_memory(entregue['valor'].to_numpy(), original['valor'].to_numpy())
+    assert not np.shares_memory(cache.obter('chave')['valor'].to_numpy(), original['valor'].to_numpy())
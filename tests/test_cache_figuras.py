@@ -0,0 +1,121 @@
+# tests/test_cache_figuras.py
+
+import contextvars
+import os
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+from src.cache_figuras import CacheFiguras
+from src.instrumentacao import rastreador
+from src.models import Histograma
+
+
+class Gerador:
+    """Cria figuras simples, registrando em que thread cada uma foi gerada"""
+
+    def __init__(self, valor: float = 1.0, liberar: threading.Event = None):
+        self.valor = valor
+        self.liberar = liberar
+        self.threads = []
+
+    def __call__(self) -> Figure:
+        self.threads.append(threading.current_thread().name)
+        if self.liberar is not None:
+            assert self.liberar.wait(5)
+        figura = Figure(figsize=(2, 2))
+        figura.subplots().plot([0, 1], [0, self.valor])
+        return figura
+
+
+def test_chave_depende_so_do_conteudo():
+    dados = pd.DataFrame({'Cliente': ['a', 'b'], 'Valor da compra': [1.0, 2.5]})
+    relatorio = Histograma(limites=[0.0, 1.0, 2.0], contagens=[3, 4])
+    chave = CacheFiguras.chave('plot', relatorio, dados, (8, 6))
+
+    copia = pd.DataFrame({'Cliente': ['a', 'b'], 'Valor da compra': [1.0, 2.5]}, index=[10, 20])
+    assert CacheFiguras.chave('plot', Histograma(**relatorio.model_dump()), copia, (8, 6)) == chave
+
+    assert CacheFiguras.chave('plot', relatorio, dados.assign(**{'Valor da compra': [1.0, 2.6]}), (8, 6)) != chave
+    assert CacheFiguras.chave('plot', relatorio.model_copy(update={'contagens': [3, 5]}), dados, (8, 6)) != chave
+    assert CacheFiguras.chave('plot', relatorio, dados, (8, 5)) != chave
+    assert CacheFiguras.chave('outro_plot', relatorio, dados, (8, 6)) != chave
+    # As partes são separadas: juntar ou dividir textos muda a chave
+    assert CacheFiguras.chave('ab', 'c') != CacheFiguras.chave('a', 'bc')
+
+
+def test_chave_estavel_entre_processos():
+    codigo = ("import pandas as pd; from src.cache_figuras import CacheFiguras; "
+              "print(CacheFiguras.chave('plot', pd.Series(['x', 'y']), {'a': 1}, (8, 6)))")
+    chaves = {subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             env={**os.environ, 'PYTHONHASHSEED': semente}).stdout.strip()
+              for semente in ('1', '2')}
+    assert chaves == {CacheFiguras.chave('plot', pd.Series(['x', 'y']), {'a': 1}, (8, 6))}
+
+
+def test_acerto_devolve_os_mesmos_bytes_sem_renderizar():
+    cache = CacheFiguras()
+    gerador = Gerador()
+    conteudo = cache.obter('a', gerador).result()
+    assert conteudo.startswith(b'\x89PNG')
+    assert cache.obter('a', gerador).result() == conteudo
+    assert (cache.acertos, cache.faltas, len(gerador.threads)) == (1, 1, 1)
+
+
+def test_lru_descarta_a_menos_usada():
+    cache = CacheFiguras(capacidade=2)
+    geradores = {chave: Gerador(valor) for valor, chave in enumerate('abc')}
+    obter = lambda chave: cache.obter(chave, geradores[chave]).result()
+
+    obter('a')
+    obter('b')
+    obter('a')  # 'a' passa a ser a mais recente
+    obter('c')  # descarta 'b'
+    obter('a')
+    obter('b')
+    assert {chave: len(gerador.threads) for chave, gerador in geradores.items()} == {'a': 1, 'b': 2, 'c': 1}
+    assert (cache.acertos, cache.faltas) == (2, 4)
+
+    cache.limpar()
+    obter('a')
+    assert len(geradores['a'].threads) == 2
+
+
+def test_renderiza_no_pool_e_compartilha_pedidos_simultaneos():
+    cache = CacheFiguras(max_workers=2)
+    liberar = threading.Event()
+    gerador = Gerador(liberar=liberar)
+    futuros = [cache.obter('a', gerador) for _ in range(3)]
+    assert all(futuro is futuros[0] for futuro in futuros)
+    assert not futuros[0].done()
+
+    liberar.set()
+    assert futuros[0].result(timeout=5).startswith(b'\x89PNG')
+    assert len(gerador.threads) == 1 and gerador.threads[0].startswith('render-figuras')
+    assert (cache.acertos, cache.faltas) == (0, 1)
+
+
+def test_falha_nao_fica_em_cache():
+    cache = CacheFiguras()
+
+    def falhar():
+        raise RuntimeError('dados inválidos')
+
+    with pytest.raises(RuntimeError):
+        cache.obter('a', falhar).result()
+    assert cache.obter('a', Gerador()).result().startswith(b'\x89PNG')
+    assert cache.faltas == 2
+
+
+def test_renderizacao_entra_na_coleta_de_quem_pediu():
+    def sessao():
+        rastreador.ativar()
+        CacheFiguras().obter('a', Gerador()).result()
+        return [etapa['nome'] for etapa in rastreador.etapas]
+
+    assert contextvars.copy_context().run(sessao) == ['CacheFiguras.renderizar']
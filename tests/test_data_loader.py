@@ -0,0 +1,95 @@
+# tests/test_data_loader.py
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.cache_dados import CacheDados
+from src.data_loader import DataLoader
+from src.models import DataLoaderConfig
+
+
+@pytest.mark.parametrize('valores', [
+    ['05/01/2023', '13/01/2023', '05/01/2023', None],
+    ['2023-01-05', '2023-01-05', 'ontem', '2023-02-30', '2023-03-01'],
+    ['2023-01-05 10:00:00', None, '2023-01-06 11:30:00'],
+])
+def test_processar_datas_igual_ao_to_datetime_da_coluna(valores):
+    df = pd.DataFrame({'data': valores, 'outra': range(len(valores))})
+    falhas = {}
+    resultado = DataLoader.processar_datas(df, ['data'], falhas=falhas)
+
+    esperado = pd.to_datetime(pd.Series(valores, dtype=object), errors='coerce')
+    pd.testing.assert_series_equal(resultado['data'], esperado, check_names=False, check_dtype=False)
+    presentes = pd.Series(valores).notna()
+    assert falhas['data'] == int((presentes & esperado.isna()).sum())
+    assert resultado['outra'].tolist() == df['outra'].tolist()
+
+
+def test_valor_fora_do_formato_detectado_vira_falha():
+    falhas = {}
+    resultado = DataLoader.processar_datas(pd.DataFrame({'data': ['05/01/2023', '13/01/2023']}), ['data'],
+                                           falhas=falhas)
+    assert resultado['data'].iloc[0] == pd.Timestamp('2023-05-01')
+    assert pd.isna(resultado['data'].iloc[1])
+    assert falhas == {'data': 1}
+
+
+def test_falhas_de_datas_ficam_por_conjunto():
+    loader = DataLoader()
+    loader.preparar_vendas(pd.DataFrame({'Cliente': ['A', 'B'], 'Data de venda': ['2023-01-05', 'ontem']}))
+    loader.preparar_locacao(pd.DataFrame({
+        'apartamento': ['A101 (blocoAP)'] * 2,
+        'datas_combinadas_pagamento': ['2023-01-05', '2023-02-05'],
+        'datas_de_pagamento': ['2023-01-07', None],
+    }))
+    assert loader.falhas_datas == {
+        'vendas': {'Data de venda': 1},
+        'locacao': {'datas_combinadas_pagamento': 0, 'datas_de_pagamento': 0},
+    }
+
+
+def test_cache_em_disco_guarda_so_a_versao_mais_recente(tmp_path):
+    diretorio = tmp_path / 'cache'
+    diretorio.mkdir()
+    legado = diretorio / f"{'a' * 32}.parquet"
+    legado.write_bytes(b'')
+    loader = DataLoader(diretorio_cache=str(diretorio))
+    config = DataLoaderConfig(url=str(tmp_path / 'vendas.json'), chave='dados_vendas',
+                              coluna_valor='Valor', prefixos_remover=['R$ '])
+    outra = config.model_copy(update={'url': str(tmp_path / 'outra.json')})
+
+    def conteudo(valor):
+        return json.dumps({'dados_vendas': [{'Cliente': 'A', 'Valor': f'R$ {valor}'}]}).encode()
+
+    # Um loader por carga: o cache em memória não pode esconder o de disco
+    def carregar(config, valor):
+        loader = DataLoader(diretorio_cache=str(diretorio), cache=CacheDados())
+        return loader.carregar_dados(config, conteudo(valor))
+
+    carregar(outra, 1)
+    carregar(config, 1)
+    dados = carregar(config, 2)
+
+    arquivos = sorted(p.name for p in diretorio.iterdir())
+    assert not legado.exists() and len(arquivos) == 2
+    assert os.path.basename(loader._caminho_cache(config, conteudo(2))) in arquivos
+    assert os.path.basename(loader._caminho_cache(outra, conteudo(1))) in arquivos
+    assert dados['Valor'].tolist() == [2.0]
+
+
+def test_conteudo_informado_nao_e_trocado_pelo_cache_em_memoria(tmp_path):
+    config = DataLoaderConfig(url=str(tmp_path / 'vendas.json'), chave='dados_vendas',
+                              coluna_valor='Valor', prefixos_remover=['R$ '])
+
+    def conteudo(valor):
+        return json.dumps({'dados_vendas': [{'Cliente': 'A', 'Valor': f'R$ {valor}'}]}).encode()
+
+    (tmp_path / 'vendas.json').write_bytes(conteudo(1))
+    loader = DataLoader(cache=CacheDados())
+    assert loader.carregar_dados(config)['Valor'].tolist() == [1.0]
+    assert loader.carregar_dados(config, conteudo(2))['Valor'].tolist() == [2.0]
+    # Sem conteúdo, vale o cache em memória: a versão mais recente processada
+    assert loader.carregar_dados(config)['Valor'].tolist() == [2.0]
@@ -0,0 +1,157 @@
+# tests/test_indice_filtros.py
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics import AnalisadorAluguel, AnalisadorVendas, faixas_pontualidade
+from src.indice_filtros import Filtro, IndiceAlugueis, IndiceVendas
+from test_analytics import assert_iguais, gerar_pagamentos, gerar_vendas
+
+FILTROS = [
+    Filtro(),
+    Filtro(inicio=pd.Timestamp('2022-06-03'), fim=pd.Timestamp('2022-06-20')),
+    Filtro(inicio=pd.Timestamp('2022-06-10')),  # só início
+    Filtro(fim=pd.Timestamp('2022-06-07 12:00')),  # só fim, no meio de um dia
+    Filtro(inicio=pd.Timestamp('2022-06-05'), fim=pd.Timestamp('2022-06-05')),  # um único dia
+    Filtro(inicio=pd.Timestamp('2022-06-01'), fim=pd.Timestamp('2022-06-25'), valor_min=2_000, valor_max=8_000),
+]
+
+
+def filtrar(dados: pd.DataFrame, filtro: Filtro, coluna_data: str, coluna_chave: str,
+            coluna_valor: str) -> pd.DataFrame:
+    """O que o índice deveria selecionar, com máscaras sobre o DataFrame"""
+    mascara = pd.Series(True, index=dados.index)
+    if filtro.inicio is not None:
+        mascara &= dados[coluna_data] >= filtro.inicio
+    if filtro.fim is not None:
+        mascara &= dados[coluna_data] <= filtro.fim
+    if filtro.chaves is not None:
+        mascara &= dados[coluna_chave].isin(filtro.chaves)
+    if filtro.valor_min is not None:
+        mascara &= dados[coluna_valor] >= filtro.valor_min
+    if filtro.valor_max is not None:
+        mascara &= dados[coluna_valor] <= filtro.valor_max
+    return dados[mascara].reset_index(drop=True)
+
+
+def assert_alugueis_equivalentes(obtido, esperado, media_por_apartamento: pd.Series) -> None:
+    """Como assert_iguais, mas aceitando outro apartamento entre os empatados na mesma média
+
+    Atrasos são dias inteiros, então médias empatadas são comuns em recortes pequenos.
+    """
+    obtido, esperado = obtido.model_dump(), esperado.model_dump()
+    media = lambda apartamento: media_por_apartamento[apartamento]
+    for chave, valor in [('apartamento_mais_atrasado', 'atraso_maximo_medio'),
+                         ('apartamento_mais_pontual', 'atraso_minimo_medio')]:
+        assert math.isclose(media(obtido.pop(chave)), obtido[valor])
+        esperado.pop(chave)
+
+    ranking, ranking_esperado = obtido.pop('ranking_atrasos'), esperado.pop('ranking_atrasos')
+    np.testing.assert_allclose(list(ranking.values()), list(ranking_esperado.values()))
+    assert all(math.isclose(media(apartamento), atraso) for apartamento, atraso in ranking.items())
+
+    percentis, percentis_esperados = obtido.pop('percentis_ranking'), esperado.pop('percentis_ranking')
+    assert list(percentis) == list(ranking)
+    assert_iguais({a: percentis[a] for a in ranking_esperado if a in percentis},
+                  {a: percentis_esperados[a] for a in ranking_esperado if a in percentis})
+    assert_iguais(obtido, esperado)
+
+
+@pytest.fixture(scope='module')
+def vendas():
+    dados = gerar_vendas(6_000, 300, np.random.default_rng(0))
+    dados.loc[dados.sample(frac=0.03, random_state=0).index, 'Data de venda'] = pd.NaT
+    return dados
+
+
+@pytest.fixture(scope='module')
+def pagamentos():
+    rng = np.random.default_rng(1)
+    dados = gerar_pagamentos(8_000, 150, rng)
+    dados['valor_aluguel'] = rng.integers(800, 5_000, len(dados)).astype(float)
+    return dados
+
+
+def filtros_aluguel(filtro: Filtro) -> Filtro:
+    """Os mesmos recortes, deslocados para o ano dos pagamentos"""
+    deslocar = lambda data: None if data is None else data - pd.DateOffset(months=3)
+    return filtro._replace(inicio=deslocar(filtro.inicio), fim=deslocar(filtro.fim))
+
+
+@pytest.mark.parametrize('filtro', FILTROS)
+def test_relatorio_vendas_igual_ao_analisador(vendas, filtro):
+    indice = IndiceVendas(vendas)
+    selecionadas = filtrar(vendas, filtro, 'Data de venda', 'Cliente', 'Valor da compra')
+    assert_iguais(indice.relatorio(filtro), AnalisadorVendas(selecionadas).gerar_relatorio())
+
+
+@pytest.mark.parametrize('filtro', FILTROS)
+def test_relatorio_alugueis_igual_ao_analisador(pagamentos, filtro):
+    filtro = filtros_aluguel(filtro)
+    indice = IndiceAlugueis(pagamentos)
+    selecionadas = filtrar(pagamentos, filtro, 'datas_combinadas_pagamento', 'apartamento', 'valor_aluguel')
+    analisador = AnalisadorAluguel(selecionadas)
+    assert_alugueis_equivalentes(indice.relatorio(filtro), analisador.gerar_relatorio(),
+                                 analisador.calcular_media_atraso_por_apartamento())
+
+
+def test_filtro_por_chaves(vendas, pagamentos):
+    clientes = tuple(sorted(vendas['Cliente'].unique()[:7])) + ('cliente inexistente',)
+    filtro = Filtro(inicio=pd.Timestamp('2022-06-04'), fim=pd.Timestamp('2022-06-22'), chaves=clientes)
+    selecionadas = filtrar(vendas, filtro, 'Data de venda', 'Cliente', 'Valor da compra')
+    assert_iguais(IndiceVendas(vendas).relatorio(filtro), AnalisadorVendas(selecionadas).gerar_relatorio())
+
+    apartamentos = tuple(pagamentos['apartamento'].unique()[:5])
+    filtro = Filtro(inicio=pd.Timestamp('2022-03-01'), fim=pd.Timestamp('2022-09-30'), chaves=apartamentos)
+    selecionadas = filtrar(pagamentos, filtro, 'datas_combinadas_pagamento', 'apartamento', 'valor_aluguel')
+    analisador = AnalisadorAluguel(selecionadas)
+    indice = IndiceAlugueis(pagamentos)
+    media = analisador.calcular_media_atraso_por_apartamento()
+    assert_alugueis_equivalentes(indice.relatorio(filtro), analisador.gerar_relatorio(), media)
+    pd.testing.assert_series_equal(indice.media_por_apartamento(filtro).sort_index(), media.sort_index(),
+                                   check_names=False, check_index_type=False)
+
+
+def test_series_diarias_iguais_ao_agrupamento(vendas, pagamentos):
+    filtro = FILTROS[1]
+    selecionadas = filtrar(vendas, filtro, 'Data de venda', 'Cliente', 'Valor da compra')
+    esperado = selecionadas.groupby(selecionadas['Data de venda'].dt.normalize())['Valor da compra'].sum()
+    obtido = IndiceVendas(vendas).vendas_por_dia(filtro)
+    np.testing.assert_array_equal(obtido['Data de venda'], esperado.index)
+    np.testing.assert_allclose(obtido['Valor da compra'], esperado.to_numpy(), rtol=1e-12)
+
+    filtro = filtros_aluguel(filtro)
+    selecionadas = filtrar(pagamentos, filtro, 'datas_combinadas_pagamento', 'apartamento', 'valor_aluguel')
+    esperado = AnalisadorAluguel(selecionadas).obter_atrasos().dropna().astype(int).value_counts().sort_index()
+    obtido = IndiceAlugueis(pagamentos).frequencias_atraso(filtro)
+    assert obtido.to_dict() == esperado.to_dict()
+
+
+def test_selecao_vazia(vendas, pagamentos):
+    filtro = Filtro(inicio=pd.Timestamp('2030-01-01'))
+    assert IndiceVendas(vendas).relatorio(filtro) is None
+    assert IndiceVendas(vendas).vendas_por_dia(filtro).empty
+    assert IndiceAlugueis(pagamentos).relatorio(filtro) is None
+    assert IndiceAlugueis(pagamentos).frequencias_atraso(filtro).empty
+
+
+def test_relatorios_memorizados_em_lru(vendas):
+    indice = IndiceVendas(vendas, capacidade_cache=2)
+    primeiro = indice.relatorio(FILTROS[1])
+    assert indice.relatorio(FILTROS[1]) is primeiro
+    assert (indice.acertos, indice.faltas) == (1, 1)
+
+    indice.relatorio(FILTROS[2])
+    indice.relatorio(FILTROS[3])  # descarta o menos recente (FILTROS[1])
+    assert indice.relatorio(FILTROS[1]) is not primeiro
+    assert indice.faltas == 4
+
+
+def test_faixas_pontualidade():
+    media = pd.Series([-2.0, 0.0, 0.5, 5.0, 5.1, 15.0, 15.5], index=list('abcdefg'))
+    faixas = {faixa: media[mascara].index.tolist() for faixa, mascara in faixas_pontualidade(media).items()}
+    assert faixas == {'pontuais': ['a', 'b'], 'atraso_leve': ['c', 'd'],
+                      'atraso_moderado': ['e', 'f'], 'atraso_severo': ['g']}
@@ -0,0 +1,56 @@
+# tests/test_instrumentacao.py
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.instrumentacao import rastreador, rastrear
+
+
+@rastrear('tarefa')
+def tarefa(nome: str) -> None:
+    with rastreador.etapa(nome):
+        pass
+
+
+def test_sessoes_simultaneas_nao_se_afetam():
+    # Duas "sessões" intercaladas passo a passo: uma desativa e a outra limpa
+    # enquanto a primeira ainda está coletando
+    passos = [threading.Barrier(2) for _ in range(4)]
+    resultados = {}
+
+    def sessao(nome: str, outra_limpa: bool) -> None:
+        rastreador.ativar()
+        passos[0].wait()
+        tarefa(f'{nome}.1')
+        passos[1].wait()
+        if outra_limpa:
+            rastreador.limpar()
+            rastreador.desativar()
+        passos[2].wait()
+        tarefa(f'{nome}.2')
+        passos[3].wait()
+        resultados[nome] = [etapa['nome'] for etapa in rastreador.etapas]
+
+    threads = [threading.Thread(target=sessao, args=('a', False)),
+               threading.Thread(target=sessao, args=('b', True))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resultados['a'] == ['tarefa', 'a.1', 'tarefa', 'a.2']
+    assert resultados['b'] == []
+    assert not rastreador.ativo
+
+
+def test_tarefas_submetidas_com_o_contexto_entram_na_coleta():
+    def sessao():
+        rastreador.ativar()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(contextvars.copy_context().run, tarefa, 'no pool').result()
+            executor.submit(tarefa, 'sem contexto').result()
+        return [etapa['nome'] for etapa in rastreador.etapas]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(sessao).result() == ['tarefa', 'no pool']
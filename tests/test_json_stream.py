@@ -0,0 +1,55 @@
+# tests/test_json_stream.py
+
+import io
+import json
+
+import pytest
+
+from src.json_stream import LeitorJSONIncremental, iterar_blocos
+
+REGISTROS = [
+    {'Cliente': 'Ana', 'Valor': 'R$ 1.234,56', 'itens': [1, 2.5, -3e2, 1.5E-3, 0]},
+    {'Cliente': 'José "Zé"', 'texto': 'barra \\ aspas " nova\nlinha \t tab ☃ 😀'},
+    {'vazio': [], 'objeto': {}, 'nulo': None, 'sim': True, 'nao': False, 'numero': 12345678901234567890},
+    'texto solto', 42, -0.5, [['aninhado', {'a': [1, {'b': None}]}]],
+]
+DOCUMENTO = json.dumps({'antes': {'ignorar': [1, 2, {'x': '}]'}]}, 'dados': REGISTROS, 'depois': 1},
+                       ensure_ascii=False, indent=1)
+
+
+@pytest.mark.parametrize('tamanho_leitura', [*range(1, 18), 64, 1 << 20])
+def test_qualquer_corte_de_pedacos_igual_ao_json_load(tamanho_leitura):
+    # Pedaços pequenos cortam chaves, strings, escapes, literais e números em toda posição
+    leitor = LeitorJSONIncremental(io.StringIO(DOCUMENTO), tamanho_leitura)
+    assert list(leitor.iterar_array('dados')) == json.loads(DOCUMENTO)['dados']
+
+
+@pytest.mark.parametrize('tamanho_leitura', [1, 2, 3, 5])
+def test_escapes_ascii_cortados(tamanho_leitura):
+    documento = json.dumps({'dados': REGISTROS})  # \uXXXX, \", \\ e \n como escapes
+    leitor = LeitorJSONIncremental(io.StringIO(documento), tamanho_leitura)
+    assert list(leitor.iterar_array('dados')) == REGISTROS
+
+
+def test_iterar_blocos():
+    blocos = list(iterar_blocos(io.StringIO(DOCUMENTO), 'dados', 3))
+    assert [len(bloco) for bloco in blocos] == [3, 3, 1]
+    assert sum(blocos, []) == REGISTROS
+    assert list(iterar_blocos(io.StringIO('{"dados": []}'), 'dados', 3)) == []
+
+
+@pytest.mark.parametrize('documento, erro', [
+    ('{"outros": [1, 2]}', "não encontrada"),
+    ('[1, 2]', "esperado '{'"),
+    ('{"dados" [1]}', "esperado ':'"),
+    ('{"dados": {"a": 1}}', "esperado '\\['"),
+    ('{"dados": [1, 2', 'Fim inesperado'),
+    ('{"dados": [{"a": 1}, {"a": ]}', 'Expecting value'),
+    ('{"dados": ["sem fim]}', 'Unterminated string'),
+    ('', 'Fim inesperado'),
+])
+@pytest.mark.parametrize('tamanho_leitura', [1, 4, 1 << 20])
+def test_json_malformado(documento, erro, tamanho_leitura):
+    leitor = LeitorJSONIncremental(io.StringIO(documento), tamanho_leitura)
+    with pytest.raises(ValueError, match=erro):
+        list(leitor.iterar_array('dados'))
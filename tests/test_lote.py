@@ -0,0 +1,85 @@
+# tests/test_lote.py
+
+import json
+import os
+
+import pytest
+
+from src import lote
+from src.cache_dados import cache_dados
+from src.lote import carregar_manifesto, executar_lote, processar_item
+from src.models import ItemLote
+from benchmarks.gerador_dados import gerar_locacao, gerar_vendas
+
+
+@pytest.fixture
+def itens(tmp_path):
+    vendas = gerar_vendas(tmp_path / 'vendas.json', 200)
+    locacao = gerar_locacao(tmp_path / 'locacao.json', 200)
+    return [ItemLote(nome='vendas', tipo='vendas', config=vendas),
+            ItemLote(nome='locacao', tipo='locacao', config=locacao)]
+
+
+def test_retoma_pulando_conjuntos_inalterados(itens, tmp_path):
+    saida = str(tmp_path / 'saida')
+    item = itens[0]
+
+    assert processar_item(item, saida)['situacao'] == 'gerado'
+    arquivos = sorted(os.listdir(os.path.join(saida, item.nome)))
+    assert arquivos == sorted(['_estado.json', 'relatorio.json', 'top_clientes.png',
+                               'vendas_por_dia.png', 'estatisticas_resumo.png'])
+    assert processar_item(item, saida)['situacao'] == 'inalterado'
+    assert processar_item(item, saida, forcar=True)['situacao'] == 'gerado'
+
+    # Conteúdo novo na fonte muda a impressão digital
+    gerar_vendas(tmp_path / 'vendas.json', 200, seed=1)
+    assert processar_item(item, saida)['situacao'] == 'gerado'
+    assert processar_item(item, saida)['situacao'] == 'inalterado'
+
+
+def test_falha_no_meio_forca_nova_geracao(itens, tmp_path, monkeypatch):
+    saida = str(tmp_path / 'saida')
+    item = itens[0]
+    processar_item(item, saida)
+
+    gerar_saidas = lote._gerar_saidas
+
+    def falhar(*args):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(lote, '_gerar_saidas', falhar)
+    resultado = processar_item(item, saida, forcar=True)
+    assert resultado['situacao'] == 'falhou' and 'disco cheio' in resultado['erro']
+    assert not os.path.exists(os.path.join(saida, item.nome, lote.ARQUIVO_ESTADO))
+
+    monkeypatch.setattr(lote, '_gerar_saidas', gerar_saidas)
+    assert processar_item(item, saida)['situacao'] == 'gerado'
+
+
+def test_nao_usa_o_cache_compartilhado_do_processo(itens, tmp_path):
+    antes = len(cache_dados)
+    processar_item(itens[1], str(tmp_path / 'saida'))
+    assert len(cache_dados) == antes
+
+
+def test_lote_com_item_ruim_segue_e_grava_o_resumo(itens, tmp_path):
+    ruim = ItemLote(nome='ruim', tipo='vendas',
+                    config=itens[0].config.model_copy(update={'url': str(tmp_path / 'nao_existe.json')}))
+    manifesto = tmp_path / 'manifesto.json'
+    manifesto.write_text(json.dumps({'itens': [
+        {'nome': 'vendas', 'tipo': 'vendas', 'config': {**itens[0].config.model_dump(), 'url': 'vendas.json'}},
+        {'nome': 'locacao', 'tipo': 'locacao', 'config': itens[1].config.model_dump()},
+        ruim.model_dump(),
+    ]}))
+    carregado = carregar_manifesto(str(manifesto))
+    assert carregado.itens[0].config.url == str(tmp_path / 'vendas.json')
+
+    saida = str(tmp_path / 'saida')
+    resultados = executar_lote(carregado, saida, processos=1)
+    assert [(r['nome'], r['situacao']) for r in resultados] == [
+        ('vendas', 'gerado'), ('locacao', 'gerado'), ('ruim', 'falhou')]
+    with open(os.path.join(saida, lote.ARQUIVO_RESUMO), encoding='utf-8') as arquivo:
+        assert json.load(arquivo) == resultados
+
+    resultados = executar_lote(carregado, saida, processos=1)
+    assert [r['situacao'] for r in resultados] == ['inalterado', 'inalterado', 'falhou']
@@ -0,0 +1,72 @@
+# tests/test_moeda.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.moeda import converter_valores_monetarios
+
+
+def conversao_original(valores: pd.Series, prefixos=(), sufixos=(), separador_milhar=None) -> pd.Series:
+    """Cadeia de str.replace anterior ao conversor vetorizado (com sufixos e milhar)"""
+    for texto in [*prefixos, *sufixos, separador_milhar]:
+        if texto:
+            valores = valores.str.replace(texto, '', regex=False)
+    valores = valores.str.replace(',', '.', regex=False).str.strip()
+    return pd.to_numeric(valores, errors='coerce')
+
+
+VALORES = ['R$ 1234,56', 'R$ 0,5', 'R$ +5', 'R$ -12,3', ',75', '10', '  R$ 7,00  ', 'R$ 1e3',
+           'nan', 'NaN', 'inf', '-inf', None, np.nan]
+INVALIDOS = ['', 'R$ ', 'abc', 'R$ 1,2,3', '1_000', '0x10', 'R$ 12,3x']
+
+
+def test_igual_ao_parser_original_e_sem_falhas_nos_validos():
+    valores = pd.Series(VALORES, dtype=object)
+    resultado = converter_valores_monetarios(valores, ['R$ '])
+    np.testing.assert_array_equal(resultado.valores, conversao_original(valores, ['R$ ']).to_numpy())
+    assert resultado.falhas == 0
+
+
+@pytest.mark.parametrize('quantidade_validos', [0, 3, len(VALORES)])
+def test_invalidos_viram_nan_e_contam_como_falha(quantidade_validos):
+    # A contagem não depende de quais outros valores estão na coluna
+    valores = pd.Series(VALORES[:quantidade_validos] + INVALIDOS, dtype=object)
+    resultado = converter_valores_monetarios(valores, ['R$ '])
+    np.testing.assert_array_equal(resultado.valores, conversao_original(valores, ['R$ ']).to_numpy())
+    assert resultado.falhas == len(INVALIDOS)
+
+
+def test_separador_de_milhar_e_sufixos():
+    valores = pd.Series(['$1.234.567,89 reais', '$ 12,00 reais', '$1.000 reais', 'reais'], dtype=object)
+    resultado = converter_valores_monetarios(valores, ['$'], [' reais'], ',', '.')
+    esperado = conversao_original(valores, ['$'], [' reais'], '.')
+    np.testing.assert_array_equal(resultado.valores, esperado.to_numpy())
+    assert resultado.valores[:3].tolist() == [1234567.89, 12.0, 1000.0]
+    assert resultado.falhas == 1
+
+
+def test_separador_decimal_ponto():
+    valores = pd.Series(['USD 1,234.5', 'USD 3'], dtype=object)
+    resultado = converter_valores_monetarios(valores, ['USD '], separador_decimal='.', separador_milhar=',')
+    assert resultado.valores.tolist() == [1234.5, 3.0] and resultado.falhas == 0
+
+
+def test_espacos_internos_sao_removidos():
+    resultado = converter_valores_monetarios(pd.Series(['R$ 1 234,5'], dtype=object), ['R$'])
+    assert resultado.valores.tolist() == [1234.5]
+
+
+def test_colunas_numericas_e_mistas():
+    numericos = converter_valores_monetarios(pd.Series([1, 2, None], dtype='Int64'))
+    np.testing.assert_array_equal(numericos.valores, [1.0, 2.0, np.nan])
+    assert numericos.falhas == 0
+
+    mistos = converter_valores_monetarios(pd.Series([3.5, 'R$ 2,5', 7, 'x', None], dtype=object), ['R$ '])
+    np.testing.assert_array_equal(mistos.valores, [3.5, 2.5, 7.0, np.nan, np.nan])
+    assert mistos.falhas == 1
+
+
+def test_vazio():
+    resultado = converter_valores_monetarios(pd.Series([], dtype=object), ['R$ '])
+    assert len(resultado.valores) == 0 and resultado.falhas == 0
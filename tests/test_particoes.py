@@ -0,0 +1,112 @@
+# tests/test_particoes.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.particoes import ArmazemParticionado
+
+
+def gerar_dados(rng: np.random.Generator, linhas: int = 400) -> pd.DataFrame:
+    """Datas espalhadas de jan a abr de 2023, com algumas ausentes"""
+    datas = pd.Series(pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 120 * 24, linhas), 'h'))
+    datas[rng.random(linhas) < 0.05] = pd.NaT
+    return pd.DataFrame({'data': datas, 'valor': rng.uniform(0, 100, linhas)})
+
+
+def esperado(dados: pd.DataFrame, inicio, fim) -> pd.DataFrame:
+    mascara = (dados['data'] >= pd.Timestamp(inicio)) & (dados['data'] <= pd.Timestamp(fim))
+    return dados[mascara].sort_values(['data', 'valor'], ignore_index=True)
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    dados = gerar_dados(np.random.default_rng(0))
+    armazem = ArmazemParticionado(str(tmp_path / 'vendas'), 'data')
+    armazem.gravar(dados)
+    return armazem, dados
+
+
+def test_intervalo_le_so_os_meses_que_se_sobrepoem(armazem, monkeypatch):
+    armazem, dados = armazem
+    assert armazem.particoes(pd.Timestamp('2023-02-10'), pd.Timestamp('2023-03-05')) == ['2023-02', '2023-03']
+
+    lidos = []
+    ler_parquet = pd.read_parquet
+    monkeypatch.setattr(pd, 'read_parquet', lambda caminho, **opcoes: lidos.append(caminho) or
+                        ler_parquet(caminho, **opcoes))
+    armazem.ler('2023-02-10', '2023-03-05')
+    assert sorted(os.path.basename(caminho) for caminho in lidos) == ['mes=2023-02.parquet',
+                                                                      'mes=2023-03.parquet']
+
+
+@pytest.mark.parametrize('inicio, fim', [
+    ('2023-01-15', '2023-03-10 12:00'),  # primeiro e último meses parciais
+    ('2023-02-01', '2023-02-28 23:59:59'),  # um mês inteiro
+    ('2023-03-25', '2023-04-05 06:00'),  # virada de mês
+    ('2022-06-01', '2023-01-03 05:00'),  # começa antes dos dados
+])
+def test_ler_intervalo_igual_ao_filtro_das_linhas(armazem, inicio, fim):
+    armazem, dados = armazem
+    lido = armazem.ler(inicio, fim).sort_values(['data', 'valor'], ignore_index=True)
+    pd.testing.assert_frame_equal(lido, esperado(dados, inicio, fim), check_dtype=False)
+
+
+def test_particao_sem_data_so_entra_sem_limites(armazem):
+    armazem, dados = armazem
+    assert armazem.estatisticas[ArmazemParticionado.SEM_DATA]['data_min'] is None
+    assert armazem.estatisticas[ArmazemParticionado.SEM_DATA]['linhas'] == dados['data'].isna().sum()
+    assert ArmazemParticionado.SEM_DATA in armazem.particoes()
+    assert ArmazemParticionado.SEM_DATA not in armazem.particoes(fim=pd.Timestamp('2030-01-01'))
+
+    assert len(armazem.ler()) == len(dados)
+    assert armazem.ler(inicio='2000-01-01')['data'].notna().all()
+    assert armazem.data_maxima() == dados['data'].max()
+
+
+def test_periodo_sem_dados(armazem):
+    armazem, _ = armazem
+    with pytest.raises(ValueError):
+        armazem.ler('2024-01-01', '2024-02-01')
+
+
+def test_regravar_substitui_o_armazem_inteiro(armazem, tmp_path):
+    armazem, _ = armazem
+    novos = pd.DataFrame({'data': pd.to_datetime(['2024-05-03']), 'valor': [1.0]})
+    armazem.gravar(novos)
+
+    assert sorted(os.listdir(armazem.diretorio)) == ['_estatisticas.json', 'mes=2024-05.parquet']
+    assert os.listdir(tmp_path) == ['vendas']
+    pd.testing.assert_frame_equal(ArmazemParticionado(armazem.diretorio, 'data').ler(), novos,
+                                  check_dtype=False)
+
+
+def test_falha_na_gravacao_mantem_o_armazem_anterior(armazem, tmp_path, monkeypatch):
+    armazem, dados = armazem
+
+    def falhar(*args):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(ArmazemParticionado, '_gravar_particoes', falhar)
+    with pytest.raises(OSError):
+        armazem.gravar(dados.iloc[:10])
+
+    assert os.listdir(tmp_path) == ['vendas']
+    assert len(ArmazemParticionado(armazem.diretorio, 'data').ler()) == len(dados)
+
+
+def test_nao_apaga_diretorio_que_nao_e_armazem(tmp_path):
+    diretorio = tmp_path / 'documentos'
+    diretorio.mkdir()
+    (diretorio / 'importante.txt').write_text('não apagar')
+
+    with pytest.raises(FileExistsError):
+        ArmazemParticionado(str(diretorio), 'data').gravar(gerar_dados(np.random.default_rng(1)))
+    assert os.listdir(diretorio) == ['importante.txt']
+
+    vazio = tmp_path / 'vazio'
+    vazio.mkdir()
+    ArmazemParticionado(str(vazio), 'data').gravar(gerar_dados(np.random.default_rng(1)))
+    assert '_estatisticas.json' in os.listdir(vazio)
@@ -0,0 +1,207 @@
+# tests/test_servidor_relatorios.py
+
+import asyncio
+import json
+
+import matplotlib
+import pytest
+import requests
+
+from src.analytics import AnalisadorVendas
+from src.cliente_relatorios import ClienteRelatorios
+from src.data_loader import DataLoader
+from src.models import ItemLote, RelatorioAlugueis, RelatorioVendas
+from src.servidor_relatorios import CacheTTL, Resposta, ServicoRelatorios
+from benchmarks.gerador_dados import gerar_locacao, gerar_vendas
+
+matplotlib.use('Agg')
+
+
+class Relogio:
+    """Relógio manual para vencer o TTL sem esperar"""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+@pytest.fixture
+def itens(tmp_path):
+    return [ItemLote(nome='vendas', tipo='vendas', config=gerar_vendas(tmp_path / 'vendas.json', 300)),
+            ItemLote(nome='locacao', tipo='locacao', config=gerar_locacao(tmp_path / 'locacao.json', 300))]
+
+
+def criar_servico(itens, relogio: Relogio, ttl: float = 60.0) -> ServicoRelatorios:
+    servico = ServicoRelatorios(itens, ttl)
+    servico.cache = CacheTTL(ttl, relogio=relogio)
+    return servico
+
+
+def test_cache_ttl_vence_e_coalesce():
+    relogio = Relogio()
+    cache = CacheTTL(ttl=10, relogio=relogio)
+    calculos = []
+
+    async def calcular():
+        calculos.append(relogio.agora)
+        await asyncio.sleep(0.01)
+        return len(calculos)
+
+    async def cenario():
+        resultados = await asyncio.gather(*(cache.obter('a', calcular) for _ in range(5)))
+        assert resultados == [(1, 'falta')] + [(1, 'coalescido')] * 4
+        relogio.agora = 9.9
+        assert await cache.obter('a', calcular) == (1, 'acerto')
+        assert cache.restante('a') == pytest.approx(0.1)
+        relogio.agora = 10.0
+        assert cache.restante('a') == 0.0
+        assert await cache.obter('a', calcular) == (2, 'falta')
+
+    asyncio.run(cenario())
+    assert calculos == [0.0, 10.0]
+    assert cache.estatisticas() == {'itens': 1, 'em_andamento': 0, 'acertos': 1, 'faltas': 2,
+                                    'coalescidos': 4, 'falhas': 0, 'ttl_s': 10}
+
+
+def test_cache_ttl_nao_guarda_falhas_e_respeita_capacidade():
+    cache = CacheTTL(ttl=10, capacidade=2, relogio=Relogio())
+
+    async def falhar():
+        raise RuntimeError('fonte fora do ar')
+
+    async def valor(v):
+        return v
+
+    async def cenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.obter('a', falhar)
+        assert await cache.obter('a', lambda: valor(1)) == (1, 'falta')
+        await cache.obter('b', lambda: valor(2))
+        await cache.obter('a', lambda: valor(1))  # 'a' passa a ser a mais recente
+        await cache.obter('c', lambda: valor(3))  # descarta 'b'
+        assert await cache.obter('b', lambda: valor(20)) == (20, 'falta')
+
+    asyncio.run(cenario())
+    assert cache.falhas == 2 and cache.faltas == 6
+
+
+def test_pedidos_simultaneos_carregam_uma_vez(itens):
+    relogio = Relogio()
+    servico = criar_servico(itens, relogio)
+    rotas = ['/relatorios/vendas', '/graficos/vendas/top_clientes.png',
+             '/graficos/vendas/vendas_por_dia.png'] * 10
+
+    async def rodada():
+        return await asyncio.gather(*(servico.responder('GET', rota) for rota in rotas))
+
+    respostas = asyncio.run(rodada())
+    assert all(resposta.status == 200 for resposta in respostas)
+    assert servico.cargas == 1 and servico.renderizacoes == 2
+    assert {resposta.cabecalhos['X-Cache'] for resposta in respostas} == {'falta', 'coalescido'}
+    assert respostas[0].cabecalhos['Cache-Control'] == 'max-age=60'
+    assert respostas[1].corpo.startswith(b'\x89PNG')
+
+    # Ainda no prazo: tudo sai do cache
+    relogio.agora = 59
+    respostas = asyncio.run(rodada())
+    assert {resposta.cabecalhos['X-Cache'] for resposta in respostas} == {'acerto'}
+    assert respostas[0].cabecalhos['Cache-Control'] == 'max-age=1'
+    assert servico.cargas == 1
+
+    # Dados vencidos: uma nova carga, e os gráficos (ligados à versão) são refeitos
+    relogio.agora = 61
+    asyncio.run(rodada())
+    assert servico.cargas == 2 and servico.renderizacoes == 4
+
+
+def test_relatorio_igual_ao_do_analisador(itens):
+    servico = criar_servico(itens, Relogio())
+    resposta = asyncio.run(servico.responder('GET', '/relatorios/vendas'))
+    loader = DataLoader()
+    dados = loader.preparar_vendas(loader.carregar_dados(itens[0].config))
+    assert RelatorioVendas.model_validate_json(resposta.corpo) == AnalisadorVendas(dados).gerar_relatorio()
+
+
+@pytest.mark.parametrize('metodo, alvo, status', [
+    ('GET', '/relatorios/inexistente', 404),
+    ('GET', '/graficos/vendas/ranking_apartamentos.png', 404),  # gráfico de outro tipo
+    ('GET', '/graficos/inexistente/top_clientes.png', 404),
+    ('GET', '/relatorios', 404),
+    ('GET', '/', 404),
+    ('POST', '/relatorios/vendas', 405),
+])
+def test_rotas_invalidas(itens, metodo, alvo, status):
+    servico = criar_servico(itens, Relogio())
+    resposta = asyncio.run(servico.responder(metodo, alvo))
+    assert resposta.status == status
+    assert 'erro' in json.loads(resposta.corpo)
+    assert servico.cargas == 0
+
+
+def test_falha_na_carga_vira_500_e_tenta_de_novo(itens, tmp_path):
+    servico = criar_servico(itens, Relogio())
+    caminho = tmp_path / 'vendas.json'
+    conteudo = caminho.read_bytes()
+    caminho.unlink()
+    resposta = asyncio.run(servico.responder('GET', '/relatorios/vendas'))
+    assert resposta.status == 500 and 'erro' in json.loads(resposta.corpo)
+
+    caminho.write_bytes(conteudo)
+    assert asyncio.run(servico.responder('GET', '/relatorios/vendas')).status == 200
+    assert servico.cargas == 2
+
+
+def test_cliente_pela_rede(itens):
+    servico = ServicoRelatorios(itens, ttl=60)
+
+    def consultar(porta: int) -> None:
+        cliente = ClienteRelatorios(f'http://127.0.0.1:{porta}/')
+        assert cliente.primeiro_do_tipo('locacao') == 'locacao'
+        # Sem a lista de conjuntos, o cliente a busca para saber o modelo do relatório
+        assert isinstance(ClienteRelatorios(cliente.url_base).relatorio('locacao'), RelatorioAlugueis)
+        assert isinstance(cliente.relatorio('vendas'), RelatorioVendas)
+        assert cliente.grafico('vendas', 'top_clientes.png').startswith(b'\x89PNG')
+        with pytest.raises(RuntimeError, match='404.*Recurso não encontrado'):
+            cliente.grafico('vendas', 'inexistente.png')
+        with pytest.raises(KeyError):
+            cliente.relatorio('inexistente')
+
+    async def cenario():
+        porta = await servico.iniciar(porta=0)
+        try:
+            await asyncio.to_thread(consultar, porta)
+        finally:
+            await servico.encerrar()
+        return porta
+
+    porta = asyncio.run(cenario())
+    assert servico.cargas == 2
+
+    # Serviço fora do ar: o erro chega a quem chamou (o app mostra o aviso)
+    with pytest.raises(requests.ConnectionError):
+        ClienteRelatorios(f'http://127.0.0.1:{porta}', timeout=5).conjuntos()
+
+
+def test_cliente_usa_o_texto_quando_o_erro_nao_e_json(itens):
+    servico = ServicoRelatorios(itens)
+
+    async def responder(metodo, alvo):
+        return Resposta(500, 'text/plain', 'proxy sem resposta'.encode('utf-8'))
+
+    servico.responder = responder
+
+    def consultar(porta: int) -> None:
+        with pytest.raises(RuntimeError, match='500: proxy sem resposta'):
+            ClienteRelatorios(f'http://127.0.0.1:{porta}').conjuntos()
+
+    async def cenario():
+        porta = await servico.iniciar(porta=0)
+        try:
+            await asyncio.to_thread(consultar, porta)
+        finally:
+            await servico.encerrar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,99 @@
+# tests/test_sketch_quantis.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sketch_quantis import ALFA_PADRAO, MINIMO_INDEXAVEL, SketchQuantis, SketchesPorChave
+
+QUANTIS = (0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 1.0)
+
+
+def erro_relativo(aproximado, exato) -> np.ndarray:
+    aproximado, exato = np.asarray(aproximado), np.asarray(exato)
+    return np.abs(aproximado - exato) / np.maximum(np.abs(exato), MINIMO_INDEXAVEL)
+
+
+def distribuicoes():
+    rng = np.random.default_rng(0)
+    return {
+        'compras': rng.uniform(1, 10_000, 20_000),
+        'atrasos': rng.integers(-10, 60, 20_000).astype(np.float64),
+        'lognormal_com_negativos': np.concatenate([rng.lognormal(3, 2, 15_000), -rng.lognormal(1, 1, 4_000),
+                                                   np.zeros(1_000)]),
+    }
+
+
+@pytest.mark.parametrize('nome', list(distribuicoes()))
+def test_quantis_dentro_do_erro_relativo(nome):
+    valores = distribuicoes()[nome]
+    sketch = SketchQuantis.de_valores(valores)
+    exatos = np.quantile(valores, QUANTIS, method='lower')
+    assert (erro_relativo(sketch.quantis(QUANTIS), exatos) <= ALFA_PADRAO + 1e-12).all()
+    assert (sketch.minimo, sketch.maximo, len(sketch)) == (valores.min(), valores.max(), len(valores))
+
+
+def test_ausentes_e_infinitos_sao_ignorados():
+    sketch = SketchQuantis.de_valores(pd.Series([1.0, np.nan, np.inf, 3.0, None]))
+    assert len(sketch) == 2
+    assert SketchQuantis().percentis() == {}
+    assert np.isnan(SketchQuantis().quantil(0.5))
+
+
+@pytest.mark.parametrize('nome', list(distribuicoes()))
+def test_combinado_igual_a_uma_passada(nome):
+    valores = distribuicoes()[nome]
+    unico = SketchQuantis.de_valores(valores)
+    combinado = SketchQuantis.combinar_todos(SketchQuantis.de_valores(parte)
+                                             for parte in np.array_split(valores, 7))
+    fluxo = SketchQuantis()
+    for parte in np.array_split(valores, 7):
+        fluxo.adicionar(parte)
+    for outro in (combinado, fluxo):
+        assert np.array_equal(outro.codigos, unico.codigos)
+        assert np.array_equal(outro.contagens, unico.contagens)
+        assert (outro.minimo, outro.maximo, len(outro)) == (unico.minimo, unico.maximo, len(unico))
+        assert outro.soma == pytest.approx(unico.soma)
+        assert outro.percentis() == unico.percentis()
+
+
+def test_alfas_diferentes_nao_se_combinam():
+    with pytest.raises(ValueError):
+        SketchQuantis(0.01).combinar(SketchQuantis.de_valores([1.0], alfa=0.02))
+
+
+def dados_por_chave():
+    rng = np.random.default_rng(1)
+    chaves = pd.Series(np.char.add('cliente ', rng.integers(0, 300, 30_000).astype(str)))
+    return chaves, pd.Series(rng.lognormal(5, 1.5, 30_000))
+
+
+def test_quantis_por_chave_dentro_do_erro_relativo():
+    chaves, valores = dados_por_chave()
+    tabela = SketchesPorChave.de_valores(chaves, valores).quantis()
+    exatos = (valores.groupby(chaves).quantile([0.5, 0.9, 0.99], interpolation='lower')
+              .unstack().loc[tabela.index])
+    for q, coluna in zip((0.5, 0.9, 0.99), ('p50', 'p90', 'p99')):
+        assert (erro_relativo(tabela[coluna], exatos[q]) <= ALFA_PADRAO + 1e-12).all(), coluna
+    assert tabela['contagem'].to_dict() == chaves.value_counts().to_dict()
+
+
+def test_por_chave_combinado_igual_a_uma_passada():
+    chaves, valores = dados_por_chave()
+    unico = SketchesPorChave.de_valores(chaves, valores).quantis()
+    limites = np.linspace(0, len(chaves), 6).astype(int)
+    combinado = SketchesPorChave.combinar_todos([SketchesPorChave.de_valores(chaves[i:j], valores[i:j])
+                                                 for i, j in zip(limites[:-1], limites[1:])])
+    pd.testing.assert_frame_equal(combinado.quantis().loc[unico.index], unico)
+
+
+def test_selecionar_igual_a_filtrar_a_tabela():
+    chaves, valores = dados_por_chave()
+    sketches = SketchesPorChave.de_valores(chaves, valores)
+    pedidas = ['cliente 7', 'cliente 250', 'inexistente', 'cliente 7', 'cliente 0']
+    selecionados = sketches.selecionar(pedidas).quantis()
+    assert sorted(selecionados.index) == ['cliente 0', 'cliente 250', 'cliente 7']
+    pd.testing.assert_frame_equal(selecionados, sketches.quantis().loc[selecionados.index])
+    assert sketches.percentis(pedidas) == {chave: sketches.percentis([chave])[chave]
+                                           for chave in ('cliente 7', 'cliente 250', 'cliente 0')}
+    assert sketches.selecionar([]).quantis().empty
@@ -0,0 +1,30 @@
+# tests/test_topk.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.topk import maiores, menores
+
+
+def referencia(valores: pd.Series, k: int, decrescente: bool) -> pd.Series:
+    """Ordenação completa e estável: empates ficam na ordem original"""
+    return valores.dropna().sort_values(ascending=not decrescente, kind='stable').head(k)
+
+
+@pytest.mark.parametrize('k', [1, 3, 5, 10, 50, 200])
+@pytest.mark.parametrize('decrescente', [True, False])
+def test_selecao_igual_a_ordenacao_estavel_com_empates(k, decrescente):
+    rng = np.random.default_rng(k)
+    # Poucos valores distintos: muitos empates na fronteira do top-k
+    numeros = rng.integers(0, 6, 120).astype(np.float64)
+    numeros[rng.random(120) < 0.1] = np.nan
+    valores = pd.Series(numeros, index=[f'chave {i}' for i in range(120)])
+
+    obtido = (maiores if decrescente else menores)(valores, k)
+    pd.testing.assert_series_equal(obtido, referencia(valores, k, decrescente))
+
+
+def test_serie_vazia_ou_so_ausentes():
+    assert maiores(pd.Series([], dtype=float), 3).empty
+    assert menores(pd.Series([np.nan, np.nan]), 1).empty
@@ -0,0 +1,150 @@
+# tests/test_validacao.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from src.models import LocacaoModel, VendaModel
+from src.validacao import (COLUNAS_LOCACAO, COLUNAS_VENDA, regras_do_modelo, validar_dataframe,
+                           validar_locacao, validar_vendas)
+
+
+def gerar_vendas_sujas(linhas: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Vendas com ausentes, valores não positivos, nomes vazios e clientes que não são texto"""
+    rng = np.random.default_rng(seed)
+    clientes = np.char.add('cliente ', rng.integers(0, 40, linhas).astype(str)).astype(object)
+    sorteio = rng.random(linhas)
+    clientes[sorteio < 0.04] = ''
+    clientes[(sorteio >= 0.04) & (sorteio < 0.07)] = None
+    clientes[(sorteio >= 0.07) & (sorteio < 0.09)] = 123
+    valores = rng.uniform(-50, 1_000, linhas)
+    valores[rng.random(linhas) < 0.05] = np.nan
+    valores[rng.random(linhas) < 0.03] = 0.0
+    datas = pd.Series(pd.Timestamp('2022-06-01') + pd.to_timedelta(rng.integers(0, 30, linhas), 'D'))
+    datas[rng.random(linhas) < 0.05] = pd.NaT
+    return pd.DataFrame({'Cliente': clientes, 'Valor da compra': valores, 'Data de venda': datas})
+
+
+def gerar_locacao_suja(linhas: int = 300, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    apartamentos = np.char.add('A', rng.integers(100, 130, linhas).astype(str)).astype(object)
+    apartamentos[rng.random(linhas) < 0.05] = ''
+    valores = rng.uniform(-100, 3_000, linhas)
+    valores[rng.random(linhas) < 0.05] = np.nan
+    combinadas = pd.Series(pd.Timestamp('2022-01-05') + pd.to_timedelta(rng.integers(0, 365, linhas), 'D'))
+    pagamentos = combinadas + pd.to_timedelta(rng.integers(-3, 20, linhas), 'D')
+    combinadas[rng.random(linhas) < 0.03] = pd.NaT
+    pagamentos[rng.random(linhas) < 0.05] = pd.NaT
+    return pd.DataFrame({'apartamento': apartamentos, 'valor_aluguel': valores,
+                         'datas_combinadas_pagamento': combinadas, 'datas_de_pagamento': pagamentos})
+
+
+def invalidas_pelo_modelo(df: pd.DataFrame, modelo, colunas) -> np.ndarray:
+    """Linhas que o modelo Pydantic rejeita, validando uma a uma (ausentes viram None)"""
+    invalidas = []
+    for registro in df.to_dict('records'):
+        dados = {campo: None if pd.isna(registro[coluna]) else registro[coluna]
+                 for campo, coluna in colunas.items()}
+        try:
+            modelo(**dados)
+            invalidas.append(False)
+        except ValidationError:
+            invalidas.append(True)
+    return np.array(invalidas)
+
+
+def test_regras_derivadas_dos_modelos():
+    nomes = [f'{regra.coluna}:{regra.nome}' for regra in regras_do_modelo(VendaModel, COLUNAS_VENDA)]
+    assert nomes == ['Cliente:obrigatorio', 'Cliente:tipo', 'Cliente:min_length=1',
+                     'Valor da compra:obrigatorio', 'Valor da compra:tipo', 'Valor da compra:gt=0',
+                     'Data de venda:obrigatorio', 'Data de venda:tipo']
+
+    nomes = [f'{regra.coluna}:{regra.nome}' for regra in regras_do_modelo(LocacaoModel, COLUNAS_LOCACAO)]
+    assert nomes == ['apartamento:obrigatorio', 'apartamento:tipo', 'apartamento:min_length=1',
+                     'valor_aluguel:obrigatorio', 'valor_aluguel:tipo', 'valor_aluguel:gt=0',
+                     'datas_combinadas_pagamento:obrigatorio', 'datas_combinadas_pagamento:tipo',
+                     'datas_de_pagamento:obrigatorio', 'datas_de_pagamento:tipo']
+
+
+@pytest.mark.parametrize('categorico', [False, True])
+def test_linhas_invalidas_iguais_as_do_modelo(categorico):
+    vendas = gerar_vendas_sujas()
+    esperado = invalidas_pelo_modelo(vendas, VendaModel, COLUNAS_VENDA)
+    if categorico:
+        vendas = vendas.assign(Cliente=vendas['Cliente'].astype('category'))
+    resultado = validar_vendas(vendas, acao='quarentena')
+    assert 0 < resultado.linhas_invalidas == esperado.sum()
+    pd.testing.assert_frame_equal(resultado.dados, vendas[~esperado].reset_index(drop=True))
+
+    locacao = gerar_locacao_suja()
+    esperado = invalidas_pelo_modelo(locacao, LocacaoModel, COLUNAS_LOCACAO)
+    if categorico:
+        locacao = locacao.assign(apartamento=locacao['apartamento'].astype('category'))
+    resultado = validar_locacao(locacao, acao='descartar')
+    assert 0 < resultado.linhas_invalidas == esperado.sum()
+    pd.testing.assert_frame_equal(resultado.dados, locacao[~esperado].reset_index(drop=True))
+
+
+def test_regras_de_tipo():
+    df = pd.DataFrame({
+        'Cliente': pd.Series(['ana', 'bia', None], dtype='string'),
+        'Valor da compra': pd.Series(['10', 'dez', None], dtype=object),
+        'Data de venda': pd.Series(['2022-06-01', 'ontem', None], dtype=object),
+    })
+    violacoes = validar_vendas(df).violacoes
+    assert violacoes['Cliente:tipo'] == 0
+    assert violacoes['Valor da compra:tipo'] == 1
+    assert violacoes['Data de venda:tipo'] == 1
+    assert violacoes['Valor da compra:gt=0'] == 0  # o texto inválido conta só na regra de tipo
+
+
+def test_relatar_so_conta():
+    vendas = gerar_vendas_sujas()
+    resultado = validar_vendas(vendas, tamanho_amostra=2)
+    assert resultado.dados is vendas
+    assert resultado.quarentena is None
+    assert resultado.linhas_invalidas > 0
+    assert resultado.violacoes['Valor da compra:gt=0'] == int((vendas['Valor da compra'] <= 0).sum())
+    assert resultado.violacoes['Data de venda:obrigatorio'] == int(vendas['Data de venda'].isna().sum())
+    # Amostras só das regras violadas, com no máximo `tamanho_amostra` linhas
+    assert set(resultado.amostras) == {chave for chave, n in resultado.violacoes.items() if n}
+    amostra = resultado.amostras['Valor da compra:gt=0']
+    assert len(amostra) == 2 and (amostra['Valor da compra'] <= 0).all()
+
+
+def test_descartar_remove_as_invalidas():
+    vendas = gerar_vendas_sujas()
+    resultado = validar_vendas(vendas, acao='descartar')
+    assert resultado.quarentena is None
+    assert len(resultado.dados) == len(vendas) - resultado.linhas_invalidas
+    assert validar_vendas(resultado.dados).linhas_invalidas == 0
+    assert resultado.dados.index.equals(pd.RangeIndex(len(resultado.dados)))
+
+
+def test_quarentena_lista_as_regras_quebradas():
+    df = pd.DataFrame({
+        'Cliente': ['ana', '', None, 'bia'],
+        'Valor da compra': [10.0, -1.0, np.nan, 5.0],
+        'Data de venda': pd.to_datetime(['2022-06-01', None, '2022-06-03', '2022-06-04']),
+    })
+    resultado = validar_vendas(df, acao='quarentena')
+    pd.testing.assert_frame_equal(resultado.dados, df.iloc[[0, 3]].reset_index(drop=True))
+    assert resultado.quarentena['violacoes'].tolist() == [
+        'Cliente:min_length=1, Valor da compra:gt=0, Data de venda:obrigatorio',
+        'Cliente:obrigatorio, Valor da compra:obrigatorio',
+    ]
+    assert resultado.linhas_invalidas == 2
+    assert 'violacoes' not in df.columns
+
+    limpos = validar_vendas(resultado.dados, acao='quarentena')
+    assert limpos.quarentena.empty and 'violacoes' in limpos.quarentena.columns
+    assert len(limpos.dados) == 2
+
+
+def test_acao_e_colunas_invalidas():
+    vendas = gerar_vendas_sujas(10)
+    with pytest.raises(ValueError):
+        validar_vendas(vendas, acao='ignorar')
+    with pytest.raises(KeyError):
+        validar_dataframe(vendas.drop(columns='Cliente'), regras_do_modelo(VendaModel, COLUNAS_VENDA))